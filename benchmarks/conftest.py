@@ -0,0 +1,62 @@
+"""
+Shared fixtures for the Chinook benchmark suite.
+
+Benchmarks use pytest-benchmark. Results are saved as JSON under
+`benchmarks/.results` on every run, so two runs can be compared with
+`pytest benchmarks --benchmark-compare`. Scale factors default to 1, 10 and 100 and
+can be narrowed with `--scale-factors 1,10`.
+"""
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, create_engine
+
+from chinook.models import init_db
+from chinook.scaling import seed_scaled_data
+
+
+RESULTS_DIR = Path(__file__).parent / ".results"
+
+
+def pytest_addoption(parser):
+    """Register the benchmark suite's command line options."""
+    parser.addoption(
+        "--scale-factors",
+        default="1,10,100",
+        help="comma-separated scale factors for data-dependent benchmarks"
+    )
+
+
+def pytest_configure(config):
+    """Save every run as machine-readable JSON unless told otherwise."""
+    if not hasattr(config.option, "benchmark_autosave"):
+        return
+
+    if not config.option.benchmark_save and not config.option.benchmark_autosave:
+        from pytest_benchmark.utils import get_tag
+        config.option.benchmark_autosave = get_tag()
+
+    if config.option.benchmark_storage == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{RESULTS_DIR}"
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize the `scale` fixture from `--scale-factors`."""
+    if "scale" in metafunc.fixturenames:
+        factors = [int(f) for f in metafunc.config.getoption("--scale-factors").split(",")]
+        metafunc.parametrize("scale", factors, ids=[f"x{f}" for f in factors], scope="session")
+
+
+@pytest.fixture(scope="session")
+def scaled_engine(scale, tmp_path_factory) -> Engine:
+    """Provide a file-backed SQLite database seeded at the requested scale factor."""
+    path = tmp_path_factory.mktemp("scaled") / f"chinook_x{scale}.db"
+    engine = create_engine(f"sqlite:///{path}")
+
+    init_db(engine)
+    seed_scaled_data(engine, scale)
+
+    yield engine
+
+    engine.dispose()
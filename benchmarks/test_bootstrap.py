@@ -0,0 +1,39 @@
+"""
+Benchmark package import and `initialize()`.
+"""
+
+import subprocess
+import sys
+
+from kink import di
+from sqlalchemy import Engine
+
+from chinook import initialize
+
+
+def test_import_chinook(benchmark):
+    """Time a cold `import chinook` in a fresh interpreter"""
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", "import chinook"],),
+        kwargs={"check": True},
+        rounds=5
+    )
+
+
+def test_initialize_in_memory(benchmark, monkeypatch):
+    """Time `initialize()` against an in-memory SQLite database"""
+    monkeypatch.setenv("CHINOOK_SQLITE_IN_MEMORY", "1")
+
+    benchmark.pedantic(initialize, teardown=lambda: di[Engine].dispose(), rounds=3)
+
+
+def test_initialize_file(benchmark, monkeypatch, tmp_path):
+    """Time `initialize()` against a file-backed SQLite database"""
+    monkeypatch.setenv("CHINOOK_SQLITE", "0")
+    counter = iter(range(1000))
+
+    def setup():
+        monkeypatch.setenv("CHINOOK_CONN_STRING", f"sqlite:///{tmp_path}/{next(counter)}.db")
+
+    benchmark.pedantic(initialize, setup=setup, teardown=lambda: di[Engine].dispose(), rounds=3)
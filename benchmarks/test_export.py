@@ -0,0 +1,33 @@
+"""
+Benchmark columnar snapshot export against a CSV dump.
+"""
+
+import pandas as pd
+import pytest
+from kink import di
+from sqlalchemy import select
+from sqlalchemy.orm import DeclarativeBase
+
+pytest.importorskip("pyarrow")
+
+from chinook.export import export_snapshot  # noqa: E402
+
+
+def dump_csv(engine, directory):
+    """Write every table to a CSV file, as the snapshot jobs used to"""
+    with engine.connect() as connection:
+        for table in di[DeclarativeBase].metadata.sorted_tables:
+            pd.read_sql(select(table), connection).to_csv(directory / f"{table.name}.csv", index=False)
+
+
+def test_export_parquet(benchmark, scaled_engine, tmp_path):
+    """Time a zstd-compressed Parquet snapshot"""
+    benchmark(export_snapshot, scaled_engine, tmp_path / "parquet", "parquet", "zstd")
+    benchmark.extra_info["bytes"] = sum(
+        path.stat().st_size for path in (tmp_path / "parquet").rglob("*.parquet"))
+
+
+def test_export_csv(benchmark, scaled_engine, tmp_path):
+    """Time the equivalent CSV dump"""
+    benchmark(dump_csv, scaled_engine, tmp_path)
+    benchmark.extra_info["bytes"] = sum(path.stat().st_size for path in tmp_path.glob("*.csv"))
@@ -0,0 +1,34 @@
+"""
+Benchmark the invoice ingestion write path.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import create_engine
+
+from chinook.commit_samples import commit_sample_data
+from chinook.ingest import InvoiceIngestor
+from chinook.models import init_db
+
+
+BATCH = [
+    {
+        "customer_id": invoice % 59 + 1,
+        "invoice_date": datetime(2025, 1, 1),
+        "lines": [{"track_id": (invoice * 7 + line) % 3503 + 1} for line in range(5)]
+    }
+    for invoice in range(1000)
+]
+
+
+def test_ingest_invoices(benchmark, tmp_path):
+    """Time ingesting 1000 invoices of 5 lines each and record invoices/sec"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    init_db(engine)
+    commit_sample_data(engine)
+    ingestor = InvoiceIngestor(engine)
+
+    report = benchmark(ingestor.ingest, BATCH)
+    benchmark.extra_info["invoices_per_second"] = report.invoices_per_second
+
+    engine.dispose()
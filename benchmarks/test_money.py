@@ -0,0 +1,89 @@
+"""
+Benchmark revenue totals with float, Decimal and integer cents amounts.
+"""
+
+import shutil
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from kink import di
+from sqlalchemy import create_engine, func, select
+
+from chinook.migrations import ensure_schema
+from chinook.models import InvoiceItems
+from chinook.models.types import cents
+from chinook.protocols.sql_alchemy_config import ISQLAlchemyConfig
+
+
+@pytest.fixture(name="cents_engine")
+def fixture_cents_engine(scaled_engine, tmp_path):
+    """Copy of the scaled database converted to integer cents"""
+    path = tmp_path / "cents.db"
+    shutil.copyfile(scaled_engine.url.database, path)
+
+    previous = di[ISQLAlchemyConfig] if ISQLAlchemyConfig in di else None
+    di[ISQLAlchemyConfig] = SimpleNamespace(
+        connection_string=f"sqlite:///{path}", money_storage="cents")
+    engine = create_engine(f"sqlite:///{path}")
+    ensure_schema(engine)
+
+    yield engine
+
+    engine.dispose()
+
+    if previous is None:
+        del di[ISQLAlchemyConfig]
+    else:
+        di[ISQLAlchemyConfig] = previous
+
+
+def test_float_revenue(benchmark, scaled_engine):
+    """Time summing float amounts in SQL"""
+    statement = select(func.sum(InvoiceItems.unit_price * InvoiceItems.quantity))
+
+    def total():
+        with scaled_engine.connect() as connection:
+            return connection.execute(statement).scalar()
+
+    benchmark(total)
+
+
+def test_decimal_revenue(benchmark, scaled_engine):
+    """Time summing amounts as `Decimal`, as a `Numeric` column would return them"""
+    statement = select(InvoiceItems.unit_price, InvoiceItems.quantity)
+
+    def total():
+        with scaled_engine.connect() as connection:
+            return sum(
+                (Decimal(str(price)) * quantity
+                 for price, quantity in connection.execute(statement)),
+                Decimal(0)
+            )
+
+    benchmark(total)
+
+
+def test_cents_revenue(benchmark, cents_engine):
+    """Time summing integer cents in SQL"""
+    statement = select(func.sum(InvoiceItems.unit_price * InvoiceItems.quantity))
+
+    def total():
+        with cents_engine.connect() as connection:
+            return connection.execute(statement).scalar()
+
+    benchmark(total)
+
+
+def test_cents_revenue_vectorized(benchmark, cents_engine):
+    """Time fetching integer cents and summing them with NumPy"""
+    statement = select(cents(InvoiceItems.unit_price), InvoiceItems.quantity)
+
+    def total():
+        with cents_engine.connect() as connection:
+            prices, quantities = np.asarray(connection.execute(statement).all(),
+                                            dtype=np.int64).T
+        return int(prices @ quantities) / 100
+
+    benchmark(total)
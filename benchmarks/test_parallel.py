@@ -0,0 +1,27 @@
+"""
+Benchmark process-pool analytics over invoice ranges at each scale factor.
+
+Compare the `processes` variants of a scale factor to see how throughput scales
+with the number of cores.
+"""
+
+import pytest
+
+from chinook.parallel import LineAggregate, ParallelExecutor, WorkerConfig
+
+
+@pytest.mark.parametrize("processes", [1, 2, 4])
+def test_revenue_by_month(benchmark, scaled_engine, processes):
+    """Time aggregating revenue per month across worker processes"""
+    config = WorkerConfig.from_config(
+        WorkerConfig(scaled_engine.url.render_as_string(hide_password=False)))
+
+    with ParallelExecutor(config, processes) as executor:
+        report = LineAggregate("month")
+        executor.run(report, by="invoice_date")
+
+        result = benchmark(executor.run, report, by="invoice_date")
+
+    if benchmark.stats:
+        benchmark.extra_info["lines_per_second"] = \
+            int(result["lines"].sum() / benchmark.stats.stats.mean)
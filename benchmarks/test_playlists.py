@@ -0,0 +1,98 @@
+"""
+Benchmark set-based playlist operations on playlists with 100k+ tracks.
+"""
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from chinook.models import PlaylistTrack, Tracks, init_db
+from chinook.playlists import PlaylistService
+from chinook.scaling import seed_scaled_data
+
+
+# Roughly 105,000 tracks.
+PLAYLIST_SCALE = 30
+
+
+@pytest.fixture(scope="module")
+def playlists(tmp_path_factory):
+    """Provide a service on a database whose playlist 'All' holds every track"""
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('playlists') / 'playlists.db'}")
+    init_db(engine)
+    seed_scaled_data(engine, PLAYLIST_SCALE)
+
+    service = PlaylistService(engine)
+    service.everything = service.create("All")
+    service.add_query(service.everything, select(Tracks.track_id))
+
+    yield service
+
+    engine.dispose()
+
+
+def test_add_every_track(benchmark, playlists):
+    """Time filling a new playlist with 100k+ tracks in one INSERT ... SELECT"""
+    def add():
+        return playlists.add_query(playlists.create("Copy"), select(Tracks.track_id))
+
+    assert benchmark.pedantic(add, rounds=3) > 100_000
+
+
+def test_add_genre_orm(benchmark, playlists):
+    """Time adding a genre with one ORM object per track, as a baseline"""
+    def add():
+        playlist = playlists.create("Rock (ORM)")
+
+        with Session(playlists.engine) as session:
+            track_ids = session.scalars(select(Tracks.track_id).where(Tracks.genre_id == 1))
+            session.add_all(PlaylistTrack(playlist_id=playlist, track_id=track_id)
+                            for track_id in track_ids)
+            session.commit()
+
+    benchmark.pedantic(add, rounds=1)
+
+
+def test_add_genre(benchmark, playlists):
+    """Time adding a genre with one INSERT ... SELECT"""
+    assert benchmark.pedantic(
+        lambda: playlists.add_genre(playlists.create("Rock"), 1), rounds=3) > 0
+
+
+@pytest.mark.parametrize("operation", ["union", "intersect", "difference"])
+def test_combine(benchmark, playlists, operation):
+    """Time combining the 100k-track playlist with the sample playlist 'Music'"""
+    benchmark.pedantic(
+        lambda: playlists.combine(playlists.create(operation), playlists.everything, 1, operation),
+        rounds=3)
+
+
+def test_remove_query(benchmark, playlists):
+    """Time removing a genre from a 100k-track playlist with DELETE ... WHERE EXISTS"""
+    def setup():
+        playlist = playlists.create("Copy")
+        playlists.add_query(playlist, select(Tracks.track_id))
+        return (playlist,), {}
+
+    benchmark.pedantic(
+        lambda playlist: playlists.remove_query(
+            playlist, select(Tracks.track_id).where(Tracks.genre_id == 1)),
+        setup=setup, rounds=3)
+
+
+def test_move_block(benchmark, playlists):
+    """Time moving 100 tracks to the middle of a 100k-track playlist"""
+    with playlists.engine.connect() as connection:
+        size = connection.execute(
+            select(func.count()).where(PlaylistTrack.playlist_id == playlists.everything)).scalar()
+
+    blocks = iter(range(0, size // 2, 1_000))
+
+    def setup():
+        start = next(blocks)
+        return (playlists.everything, list(range(start + 1, start + 101))), \
+            {"before": size // 2 + start}
+
+    moved = benchmark.pedantic(playlists.move, setup=setup, rounds=20)
+
+    assert moved == 100
@@ -0,0 +1,43 @@
+"""
+Benchmark canonical Chinook queries at each scale factor.
+"""
+
+from chinook.models import Tracks
+from chinook.queries import (
+    customer_invoice_history,
+    playlist_contents,
+    top_artists_by_revenue
+)
+from chinook.read_models import track_details_source, track_page
+
+
+def run(engine, statement):
+    """Execute a statement and fetch every row"""
+    with engine.connect() as connection:
+        return connection.execute(statement).all()
+
+
+def test_top_artists_by_revenue(benchmark, scaled_engine):
+    """Time ranking artists by revenue"""
+    assert benchmark(run, scaled_engine, top_artists_by_revenue(10))
+
+
+def test_playlist_contents(benchmark, scaled_engine):
+    """Time listing the largest sample playlist"""
+    assert benchmark(run, scaled_engine, playlist_contents(1))
+
+
+def test_customer_invoice_history(benchmark, scaled_engine):
+    """Time listing one customer's invoices"""
+    assert benchmark(run, scaled_engine, customer_invoice_history(1))
+
+
+def test_catalog_page_join(benchmark, scaled_engine):
+    """Time a catalog page sorted by name from the five-way join"""
+    statement = track_details_source().order_by(Tracks.name, Tracks.track_id).limit(50)
+    assert benchmark(run, scaled_engine, statement)
+
+
+def test_catalog_page_read_model(benchmark, scaled_engine):
+    """Time the same catalog page from the track_details read model"""
+    assert benchmark(run, scaled_engine, track_page("name", limit=50))
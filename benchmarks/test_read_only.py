@@ -0,0 +1,43 @@
+"""
+Benchmark reader startup and scans in read-write and memory-mapped read-only mode.
+"""
+
+import pytest
+from sqlalchemy import func, select
+
+from chinook.config import ChinookConfig
+from chinook.models import InvoiceItems
+from chinook.models.engine import create_db_engine
+
+
+@pytest.fixture(name="reader_config", params=[False, True], ids=["read_write", "read_only"])
+def fixture_reader_config(request, scaled_engine):
+    """Configuration of the scaled database in either mode"""
+    return ChinookConfig(connection_string=str(scaled_engine.url), seed="none",
+                         read_only=request.param)
+
+
+def test_reader_startup(benchmark, reader_config):
+    """Time creating an engine and running a first query, as a new worker does"""
+    def start():
+        engine = create_db_engine(sql_config=reader_config)
+
+        with engine.connect() as connection:
+            connection.execute(select(func.count()).select_from(InvoiceItems)).scalar()
+
+        engine.dispose()
+
+    benchmark(start)
+
+
+def test_reader_scan(benchmark, reader_config):
+    """Time a revenue scan of every invoice line on a warm engine"""
+    engine = create_db_engine(sql_config=reader_config)
+    statement = select(func.sum(InvoiceItems.unit_price * InvoiceItems.quantity))
+
+    def scan():
+        with engine.connect() as connection:
+            return connection.execute(statement).scalar()
+
+    benchmark(scan)
+    engine.dispose()
@@ -0,0 +1,42 @@
+"""
+Benchmark RFM and CLV scoring at each scale factor.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import create_engine
+
+from chinook.ingest import ingest_invoices
+from chinook.models import init_db
+from chinook.scaling import seed_scaled_data
+from chinook.scoring import CustomerScorer
+
+
+def test_full_scoring(benchmark, scaled_engine):
+    """Time scoring every customer from every invoice"""
+    scorer = CustomerScorer(scaled_engine)
+    report = benchmark(scorer.score, full=True)
+    benchmark.extra_info.update(vars(report))
+
+
+def test_incremental_scoring(benchmark, scale, tmp_path):
+    """Time rescoring after ten new invoices"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'scores.db'}")
+    init_db(engine)
+    seed_scaled_data(engine, scale)
+
+    scorer = CustomerScorer(engine)
+    scorer.score(full=True)
+
+    def setup():
+        ingest_invoices(engine, [
+            {"customer_id": customer_id, "invoice_date": datetime(2014, 1, 1),
+             "lines": [{"track_id": 1}]}
+            for customer_id in range(1, 11)
+        ])
+        return (), {}
+
+    report = benchmark.pedantic(scorer.score, setup=setup, rounds=5)
+    assert report.incremental and report.invoices == 10
+
+    engine.dispose()
@@ -0,0 +1,38 @@
+"""
+Benchmark sample data loaders and per-table ORM seeding.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from chinook.commit_samples import SAMPLE_TABLES, add_sample_rows
+from chinook.models import init_db
+
+
+@pytest.mark.parametrize(
+    "loader", [loader for _, loader in SAMPLE_TABLES], ids=lambda loader: loader.__name__)
+def test_load_data(benchmark, loader):
+    """Time a single `load_*_data` CSV loader"""
+    benchmark(loader)
+
+
+@pytest.mark.parametrize(
+    "model, loader", SAMPLE_TABLES, ids=[model.__tablename__ for model, _ in SAMPLE_TABLES])
+def test_commit_table(benchmark, model, loader):
+    """Time adding and committing one table's sample rows through the ORM"""
+    frame = loader()
+
+    def setup():
+        engine = create_engine("sqlite://")
+        init_db(engine)
+        return (engine,), {}
+
+    def commit(engine):
+        with Session(engine) as session:
+            add_sample_rows(session, model, frame)
+            session.commit()
+
+        engine.dispose()
+
+    benchmark.pedantic(commit, setup=setup, rounds=3)
@@ -0,0 +1,33 @@
+"""
+Benchmark streaming ORM updates with and without periodic identity-map clearing.
+"""
+
+import pytest
+from sqlalchemy import select
+
+from chinook.models import Tracks
+from chinook.sessions import clear_periodically, create_session_factory
+
+
+@pytest.mark.parametrize("every", [None, 1_000], ids=["unbounded", "cleared"])
+def test_streaming_updates(benchmark, scaled_engine, every):
+    """Time touching every track in one session, rolled back afterwards"""
+    factory = create_session_factory(scaled_engine).session_factory
+
+    def stream():
+        with factory() as session:
+            tracks = session.scalars(select(Tracks).execution_options(yield_per=1_000))
+            peak = 0
+
+            if every is not None:
+                tracks = clear_periodically(session, tracks, every=every)
+
+            for track in tracks:
+                track.milliseconds += 1
+                peak = max(peak, len(session.identity_map))
+
+            session.flush()
+            return peak
+
+    peak = benchmark.pedantic(stream, rounds=3)
+    benchmark.extra_info["peak_identity_map"] = peak
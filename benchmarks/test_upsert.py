@@ -0,0 +1,34 @@
+"""
+Benchmark a catalog refresh through the bulk upsert API.
+"""
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from chinook.models import Tracks, init_db
+from chinook.scaling import scale_sample_data, seed_scaled_data
+from chinook.upsert import upsert_frames
+
+
+# Roughly 105,000 tracks.
+REFRESH_SCALE = 30
+
+
+def test_refresh_tracks(benchmark, tmp_path):
+    """Time upserting 100k+ tracks of which 10% changed price and 1% are new"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'refresh.db'}")
+    init_db(engine)
+    seed_scaled_data(engine, REFRESH_SCALE)
+
+    tracks = scale_sample_data(REFRESH_SCALE)[Tracks]
+    changed = tracks.index % 10 == 0
+    tracks.loc[changed, "unit_price"] = tracks.loc[changed, "unit_price"] + 0.5
+    new = tracks.iloc[:len(tracks) // 100].assign(
+        track_id=lambda frame: frame["track_id"] + len(tracks))
+
+    refresh = pd.concat([tracks, new], ignore_index=True)
+
+    report = benchmark.pedantic(upsert_frames, args=(engine, {Tracks: refresh}), rounds=1)
+    benchmark.extra_info.update(vars(report["tracks"]))
+
+    engine.dispose()
@@ -0,0 +1,34 @@
+"""
+Benchmark verification of invoice totals at each scale factor.
+"""
+
+from sqlalchemy import func, select
+
+from chinook.models import InvoiceItems, Invoices
+from chinook.verification import verify_invoice_totals
+
+
+def test_verify_invoice_totals(benchmark, scaled_engine):
+    """Time checking every invoice total with grouped range queries"""
+    report = benchmark(verify_invoice_totals, scaled_engine)
+    assert report.consistent
+
+    benchmark.extra_info.update(invoices=report.invoices, ranges=report.ranges)
+
+
+def test_verify_invoice_totals_per_invoice(benchmark, scaled_engine):
+    """Time the baseline of one query per invoice"""
+    lines = select(func.sum(InvoiceItems.unit_price * InvoiceItems.quantity))
+
+    def verify():
+        with scaled_engine.connect() as connection:
+            return [
+                invoice_id
+                for invoice_id, total in connection.execute(
+                    select(Invoices.invoice_id, Invoices.total)).all()
+                if round(connection.execute(
+                    lines.where(InvoiceItems.invoice_id == invoice_id)).scalar() or 0, 2)
+                != round(total, 2)
+            ]
+
+    assert benchmark.pedantic(verify, rounds=1) == []
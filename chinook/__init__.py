@@ -1,23 +1,35 @@
 import os
+from typing import Optional
 
 from kink import di
 from sqlalchemy import Engine
 from .bootstrap import initialize
+from .config import ChinookConfig
+from .registry import EngineRegistry
 
 
-def get_engine() -> Engine:
+def get_engine(name: Optional[str] = None) -> Engine:
     """
     Retrieve the SQLAlchemy Engine instance.
 
     This engine is configured to connect to the Chinook database and is 
     registered with the dependency injection container.
 
+    Parameters
+    ----------
+    name : str, optional
+        Name of an engine in the `EngineRegistry`. When omitted, the default
+        engine registered as `di[Engine]` is returned.
+
     Returns
     -------
     Engine
         The SQLAlchemy Engine connected to the Chinook database.
     """
-    return di[Engine]
+    if name is None:
+        return di[Engine]
+
+    return di[EngineRegistry].get_engine(name)
 
 
 def remove_sqlite_database(db_name: str):
@@ -1,4 +1,6 @@
-from . import initialize, get_engine
+import sys
+
+from .cli import main
 
 if __name__ == "__main__":
-    initialize()
+    sys.exit(main())
@@ -2,12 +2,17 @@
 
 """ Kink bootstrapping module """
 
-from os import getenv
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional
+
 from sqlalchemy.orm import DeclarativeBase, Session
 from sqlalchemy import Engine
 
 from kink import di
 
+from .config import ChinookConfig
+from .profiling import SeedingProfiler, SeedingReport
 from .protocols.sql_alchemy_config import ISQLAlchemyConfig
 
 
@@ -17,42 +22,167 @@ class Base(DeclarativeBase):
 
 di[DeclarativeBase] = Base
 
+from .registry import DEFAULT_ENGINE, EngineRegistry
+
+di[EngineRegistry] = EngineRegistry()
+
+
+def initialize(profile: bool = False, name: str = DEFAULT_ENGINE,
+               config: Optional[ChinookConfig] = None,
+               engine_options: Optional[Dict[str, Any]] = None) -> SeedingReport:
+    """
+    Bootstrap the application for setup
+
+    Parameters
+    ----------
+    name : str
+        Name the seeded engine is registered under in the `EngineRegistry`. The
+        default engine is also registered as `di[Engine]`; other names leave it
+        untouched, so several databases can be initialized side by side.
+
+    profile : bool
+        Whether to trace peak memory per phase with `tracemalloc`. Phase and table
+        timings are always recorded.
+
+    config : ChinookConfig, optional
+        Configuration of the database, its seeding, engine, pool and pragmas.
+        Defaults to `ChinookConfig.from_env()`. It is registered as
+        `di[ISQLAlchemyConfig]` for the default engine, or when none is registered.
+        In read-only mode the database is opened as it is, without migrating or
+        seeding it.
+
+    engine_options : dict, optional
+        Extra keyword arguments for `create_engine`, taking precedence over the
+        config's.
+
+    Returns
+    -------
+    SeedingReport
+        Timings of the `config`, `init_db`, `load_csv` and `insert` phases (or
+        `restore`, when a snapshot is reused) and of each seeded table.
+
+    Notes
+    -----
+    After seeding, a `TrackDetailsSync` registered as `di[TrackDetailsSync]` watches
+    the engine, so ORM catalog writes through sessions bound to it keep
+    `track_details` current. Sessions of other engines are not affected.
+
+    The default engine also gets session factories: `di[sessionmaker]` and a
+    thread- or task-local `di[scoped_session]`, configured by the config's
+    `session_scope`, `expire_on_commit` and `autoflush`.
+    """
+    from .models.engine import create_db_engine
+    from .read_models import TrackDetailsSync
+    from .sessions import register_sessions
+
+    profiler = SeedingProfiler(memory=profile)
+
+    with profiler.phase("config"):
+        config = ChinookConfig.from_env() if config is None else config
+
+        if name == DEFAULT_ENGINE or ISQLAlchemyConfig not in di:
+            di[ISQLAlchemyConfig] = config
+
+    engine = create_db_engine(sql_config=config, engine_options=engine_options)
+
+    if not config.read_only:
+        seed_database(engine, config, profiler)
+
+    di[EngineRegistry].register_engine(name, engine, config)
+
+    if name == DEFAULT_ENGINE:
+        di[Engine] = engine
+        register_sessions(engine, config)
 
-def initialize():
-    """ Bootstrap the application for setup """
-    from .models import init_db as init_db
+    if TrackDetailsSync not in di:
+        di[TrackDetailsSync] = TrackDetailsSync(engines=())
+
+    di[TrackDetailsSync].watch(engine).attach()
+
+    return profiler.report
+
+
+def seed_database(engine: Engine, config: ChinookConfig,
+                  profiler: Optional[SeedingProfiler] = None) -> SeedingReport:
+    """
+    Create or migrate the schema and fill it as configured.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the database.
+
+    config : ChinookConfig
+        Configuration providing the seeding strategy, scale, batch size and snapshot.
+
+    profiler : SeedingProfiler, optional
+        Profiler recording the `init_db` phase and the phases of the seeding.
+
+    Returns
+    -------
+    SeedingReport
+        The profiler's report.
+
+    Raises
+    ------
+    ValueError
+        If the configuration is read-only, or a SQLite database file is given as
+        snapshot of a database of another dialect.
+
+    FileNotFoundError
+        If the snapshot does not exist.
+    """
+    from .models import init_db
     from .commit_samples import commit_sample_data
+    from .scaling import seed_scaled_data
 
-    use_sqlite = getenv("CHINOOK_SQLITE", "1")
-    db_name = getenv("CHINOOK_SQLITE_DB_NAME", "chinook")
-    in_memory = getenv("CHINOOK_SQLITE_IN_MEMORY", "1")
+    if config.read_only:
+        raise ValueError("A read-only database cannot be seeded.")
 
-    try:
-        use_sqlite = int(use_sqlite)
-    except ValueError:
-        raise ValueError("CHINOOK_SQLITE expects a value of 0 or 1.")
+    profiler = profiler or SeedingProfiler()
+    snapshot = Path(config.snapshot) if config.snapshot else None
 
-    try:
-        in_memory = int(in_memory)
-    except ValueError:
-        raise ValueError("CHINOOK_SQLITE_IN_MEMORY expects a value of 0 or 1.")
+    if snapshot is not None and not snapshot.exists():
+        raise FileNotFoundError(f"Snapshot {snapshot} does not exist.")
+
+    if snapshot is not None and snapshot.is_file():
+        if engine.dialect.name != "sqlite":
+            raise ValueError("A SQLite snapshot can only be restored into SQLite.")
+
+        with profiler.phase("restore"):
+            _restore_sqlite(engine, snapshot)
+
+    with profiler.phase("init_db"):
+        init_db(engine)
 
-    conn_string = getenv("CHINOOK_CONN_STRING", "")
+    if snapshot is not None:
+        if snapshot.is_dir():
+            from .export import import_snapshot
 
-    if use_sqlite:
-        conn_string = f"sqlite:///db/{db_name}.db" if not in_memory else "sqlite:///:memory:"
+            with profiler.phase("restore"):
+                for table, rows in import_snapshot(engine, snapshot).items():
+                    profiler.table(table).rows = rows
 
-    SQLAlchemyConfig = type(
-        "SQLAlchemyConfig",
-        (),
-        {
-            "connection_string": property(lambda self: conn_string)
-        }
-    )
+        return profiler.report
 
-    di[ISQLAlchemyConfig] = SQLAlchemyConfig()
+    if config.seed == "orm":
+        commit_sample_data(engine, profiler)
+    elif config.seed == "bulk":
+        with profiler.phase("insert"):
+            counts = seed_scaled_data(engine, config.scale, config.batch_size, config.jobs)
 
-    engine = init_db()
-    commit_sample_data(engine)
+        for table, rows in counts.items():
+            profiler.table(table).rows = rows
 
-    di[Engine] = engine
+    return profiler.report
+
+
+def _restore_sqlite(engine: Engine, snapshot: Path):
+    source = sqlite3.connect(snapshot)
+    target = engine.raw_connection()
+
+    try:
+        source.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,483 @@
+"""
+cdc.py
+
+Defines change data capture for Chinook tables.
+
+Changes to tracked tables are appended to the `change_log` outbox in the same
+transaction as the change, by one of two capture mechanisms:
+
+- `ChangeCapture` listens to ORM flushes. It needs no database support but only sees
+  writes made through ORM sessions.
+- `install_triggers` creates `AFTER INSERT/UPDATE/DELETE` triggers on SQLite or
+  PostgreSQL. They also capture Core and bulk writes, such as `ingest_invoices` and
+  `upsert_frames`.
+
+Use one mechanism per table; using both logs every ORM change twice.
+
+`ChangeFeed` reads the log in `change_id` order, in batches, and stores each
+consumer's position in `change_cursors`, so consumers resume where they stopped.
+Delivery is at least once: a batch is only acknowledged when the next one is
+requested or `commit` is called.
+
+On SQLite writers are serialized, so `change_id` order is commit order. On PostgreSQL
+a transaction may commit after a later one has; consumers that cannot tolerate a
+skipped change should read with a lag or from a serializable snapshot.
+
+Classes
+-------
+ChangeRecord
+    A decoded `change_log` row.
+
+ChangeCapture
+    Captures ORM flushes of tracked tables into the change log.
+
+ChangeFeed
+    Ordered, batched, resumable reader of the change log.
+
+Functions
+---------
+install_triggers(engine: Engine, tables: Sequence[str])
+    Creates capture triggers on tracked tables.
+
+drop_triggers(engine: Engine, tables: Sequence[str])
+    Drops capture triggers from tracked tables.
+
+prune_change_log(engine: Engine) -> int
+    Deletes changes every consumer has acknowledged.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Type, Union
+
+from kink import di
+from sqlalchemy import Engine, Table, delete, event, func, insert, inspect, select, update
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from .models import ChangeCursors, ChangeLog
+
+
+CAPTURED_TABLES = ("tracks", "invoices", "invoice_items", "customers")
+
+OPERATIONS = ("insert", "update", "delete")
+
+_POSTGRESQL_FUNCTION = """
+CREATE OR REPLACE FUNCTION chinook_capture_change() RETURNS trigger AS $$
+DECLARE
+    row_data jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    INSERT INTO change_log (table_name, operation, row_key, data, changed_at)
+    VALUES (
+        TG_TABLE_NAME,
+        lower(TG_OP),
+        (SELECT jsonb_object_agg(name, row_data -> name) FROM unnest(TG_ARGV) AS name)::text,
+        row_data::text,
+        now()
+    );
+
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _dumps(values: Dict[str, Any]) -> str:
+    return json.dumps(values, separators=(",", ":"), default=str)
+
+
+@dataclass
+class ChangeRecord:
+    """
+    A captured change.
+
+    Attributes
+    ----------
+    change_id : int
+        Position of the change in the log.
+
+    table : str
+        Name of the changed table.
+
+    operation : str
+        One of `insert`, `update` or `delete`.
+
+    key : Dict[str, Any]
+        Primary key of the changed row.
+
+    data : Dict[str, Any], optional
+        Column values of the row: the new values for inserts and updates, the last
+        known values for deletes.
+
+    changed_at : datetime
+        Time the change was captured, in UTC.
+    """
+
+    change_id: int
+    table: str
+    operation: str
+    key: Dict[str, Any]
+    data: Optional[Dict[str, Any]]
+    changed_at: datetime
+
+    @classmethod
+    def from_row(cls, row) -> "ChangeRecord":
+        """Decode a `change_log` row."""
+        return cls(
+            change_id=row.change_id,
+            table=row.table_name,
+            operation=row.operation,
+            key=json.loads(row.row_key),
+            data=json.loads(row.data) if row.data is not None else None,
+            changed_at=row.changed_at
+        )
+
+
+def _tables(tables: Sequence[str]) -> List[Table]:
+    metadata = di[DeclarativeBase].metadata
+    return [metadata.tables[name] for name in tables]
+
+
+class ChangeCapture:
+    """
+    Captures ORM flushes of tracked tables into the change log.
+
+    Parameters
+    ----------
+    tables : Sequence[str]
+        Names of the tables to capture.
+
+    Examples
+    --------
+    >>> capture = ChangeCapture().attach()
+    >>> with Session(engine) as session:
+    ...     session.get(Tracks, 1).unit_price = 1.29
+    ...     session.commit()
+    >>> capture.detach()
+    """
+
+    def __init__(self, tables: Sequence[str] = CAPTURED_TABLES):
+        self.tables = set(tables)
+        self._targets = []
+
+    def attach(self, target: Union[Session, Type[Session]] = Session) -> "ChangeCapture":
+        """
+        Start capturing flushes of a session or of every session of a class.
+
+        Parameters
+        ----------
+        target : Session or type
+            Session instance, `Session` subclass or `sessionmaker` to listen to.
+            Defaults to every `Session`.
+
+        Returns
+        -------
+        ChangeCapture
+            This capture, for chaining.
+        """
+        event.listen(target, "before_flush", self._before_flush)
+        event.listen(target, "after_flush", self._after_flush)
+        self._targets.append(target)
+        return self
+
+    def detach(self):
+        """Stop capturing on every target this capture is attached to."""
+        for target in self._targets:
+            for name, listener in (("before_flush", self._before_flush),
+                                   ("after_flush", self._after_flush)):
+                if event.contains(target, name, listener):
+                    event.remove(target, name, listener)
+
+        self._targets.clear()
+
+    def _before_flush(self, session: Session, flush_context, instances):
+        # Columns left unloaded, by `load_only`, deferral or expiry, are read before the
+        # flush, so the log holds the row's values rather than `None`. Deleted rows
+        # could not be read back afterwards.
+        for instance in (*session.dirty, *session.deleted):
+            state = inspect(instance)
+
+            if state.mapper.local_table.name not in self.tables or not state.unloaded:
+                continue
+
+            unloaded = [attribute.key for attribute in state.mapper.column_attrs
+                        if attribute.key in state.unloaded]
+
+            if unloaded:
+                session.refresh(instance, unloaded)
+
+    def _record(self, instance, operation: str) -> Optional[Dict[str, Any]]:
+        state = inspect(instance)
+        mapper = state.mapper
+
+        if mapper.local_table.name not in self.tables:
+            return None
+
+        if operation == "update" and not state.session.is_modified(instance):
+            return None
+
+        columns = {
+            attribute.columns[0].name: state.dict.get(attribute.key)
+            for attribute in mapper.column_attrs
+        }
+        key = {
+            column.name: value
+            for column, value in zip(mapper.primary_key, mapper.primary_key_from_instance(instance))
+        }
+
+        return {
+            "table_name": mapper.local_table.name,
+            "operation": operation,
+            "row_key": _dumps(key),
+            "data": _dumps(columns),
+            # UTC, like the triggers' CURRENT_TIMESTAMP.
+            "changed_at": datetime.now(timezone.utc).replace(tzinfo=None)
+        }
+
+    def _after_flush(self, session: Session, flush_context):
+        changes = [
+            self._record(instance, operation)
+            for operation, instances in (
+                ("insert", session.new),
+                ("update", session.dirty),
+                ("delete", session.deleted)
+            )
+            for instance in instances
+        ]
+        changes = [change for change in changes if change is not None]
+
+        if changes:
+            session.connection().execute(insert(ChangeLog), changes)
+
+
+def _sqlite_trigger(table: Table, operation: str) -> str:
+    row = "OLD" if operation == "delete" else "NEW"
+
+    def json_object(columns) -> str:
+        pairs = ", ".join(f"'{column.name}', {row}.\"{column.name}\"" for column in columns)
+        return f"json_object({pairs})"
+
+    return (
+        f'CREATE TRIGGER IF NOT EXISTS "cdc_{table.name}_{operation}" '
+        f'AFTER {operation.upper()} ON "{table.name}" BEGIN '
+        f"INSERT INTO change_log (table_name, operation, row_key, data, changed_at) "
+        f"VALUES ('{table.name}', '{operation}', {json_object(table.primary_key.columns)}, "
+        f"{json_object(table.columns)}, CURRENT_TIMESTAMP); END"
+    )
+
+
+def install_triggers(engine: Engine, tables: Sequence[str] = CAPTURED_TABLES):
+    """
+    Create triggers capturing every insert, update and delete of tracked tables.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of a SQLite or PostgreSQL database with the Chinook schema.
+
+    tables : Sequence[str]
+        Names of the tables to capture.
+
+    Raises
+    ------
+    NotImplementedError
+        On dialects other than SQLite and PostgreSQL.
+    """
+    dialect = engine.dialect.name
+
+    if dialect not in ("sqlite", "postgresql"):
+        raise NotImplementedError(f"Capture triggers are not available on {dialect}.")
+
+    with engine.begin() as connection:
+        if dialect == "postgresql":
+            connection.exec_driver_sql(_POSTGRESQL_FUNCTION)
+
+        for table in _tables(tables):
+            if dialect == "sqlite":
+                for operation in OPERATIONS:
+                    connection.exec_driver_sql(_sqlite_trigger(table, operation))
+                continue
+
+            keys = ", ".join(f"'{column.name}'" for column in table.primary_key.columns)
+            connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS "cdc_{table.name}" ON "{table.name}"')
+            connection.exec_driver_sql(
+                f'CREATE TRIGGER "cdc_{table.name}" AFTER INSERT OR UPDATE OR DELETE '
+                f'ON "{table.name}" FOR EACH ROW EXECUTE FUNCTION chinook_capture_change({keys})'
+            )
+
+
+def drop_triggers(engine: Engine, tables: Sequence[str] = CAPTURED_TABLES):
+    """
+    Drop the capture triggers of tracked tables.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine the triggers were installed with.
+
+    tables : Sequence[str]
+        Names of the tables to stop capturing.
+    """
+    with engine.begin() as connection:
+        for name in tables:
+            if engine.dialect.name == "postgresql":
+                connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS "cdc_{name}" ON "{name}"')
+                continue
+
+            for operation in OPERATIONS:
+                connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS "cdc_{name}_{operation}"')
+
+
+class ChangeFeed:
+    """
+    Ordered, batched and resumable reader of the change log.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the database holding the change log.
+
+    consumer : str
+        Name under which the position is stored in `change_cursors`.
+
+    tables : Sequence[str], optional
+        Only yield changes of these tables. Defaults to every table.
+
+    batch_size : int
+        Maximum number of changes per batch.
+
+    Examples
+    --------
+    >>> feed = ChangeFeed(engine, "search-index")
+    >>> for batch in feed:
+    ...     index.apply(batch)
+    """
+
+    def __init__(self, engine: Engine, consumer: str,
+                 tables: Optional[Sequence[str]] = None, batch_size: int = 500):
+        self.engine = engine
+        self.consumer = consumer
+        self.tables = list(tables) if tables is not None else None
+        self.batch_size = batch_size
+        self._position: Optional[int] = None
+
+    @property
+    def position(self) -> int:
+        """Returns the `change_id` of the last acknowledged change."""
+        if self._position is None:
+            with self.engine.connect() as connection:
+                self._position = connection.execute(
+                    select(ChangeCursors.position)
+                    .where(ChangeCursors.consumer == self.consumer)
+                ).scalar() or 0
+
+        return self._position
+
+    def poll(self) -> List[ChangeRecord]:
+        """
+        Read the next batch of changes after the acknowledged position.
+
+        The position does not move until `commit` is called, so polling twice
+        returns the same batch.
+
+        Returns
+        -------
+        List[ChangeRecord]
+            Up to `batch_size` changes in `change_id` order.
+        """
+        statement = (
+            select(ChangeLog)
+            .where(ChangeLog.change_id > self.position)
+            .order_by(ChangeLog.change_id)
+            .limit(self.batch_size)
+        )
+
+        if self.tables is not None:
+            statement = statement.where(ChangeLog.table_name.in_(self.tables))
+
+        with self.engine.connect() as connection:
+            return [ChangeRecord.from_row(row) for row in connection.execute(statement)]
+
+    def commit(self, records: Union[int, Iterable[ChangeRecord]]):
+        """
+        Acknowledge changes up to and including a position.
+
+        Parameters
+        ----------
+        records : int or Iterable[ChangeRecord]
+            Last processed `change_id`, or the processed batch.
+        """
+        if not isinstance(records, int):
+            records = max((record.change_id for record in records), default=self.position)
+
+        if records <= self.position:
+            return
+
+        with self.engine.begin() as connection:
+            updated = connection.execute(
+                update(ChangeCursors)
+                .where(ChangeCursors.consumer == self.consumer)
+                .values(position=records)
+            ).rowcount
+
+            if not updated:
+                connection.execute(
+                    insert(ChangeCursors).values(consumer=self.consumer, position=records))
+
+        self._position = records
+
+    def __iter__(self) -> Iterator[List[ChangeRecord]]:
+        """
+        Yield batches until the log is drained.
+
+        Each batch is acknowledged when the next one is requested, so a consumer that
+        stops while processing a batch receives it again on restart.
+        """
+        while True:
+            batch = self.poll()
+
+            if not batch:
+                return
+
+            yield batch
+            self.commit(batch)
+
+    def lag(self) -> int:
+        """Returns the number of changes not yet acknowledged."""
+        statement = select(func.count()).select_from(ChangeLog) \
+            .where(ChangeLog.change_id > self.position)
+
+        if self.tables is not None:
+            statement = statement.where(ChangeLog.table_name.in_(self.tables))
+
+        with self.engine.connect() as connection:
+            return connection.execute(statement).scalar()
+
+
+def prune_change_log(engine: Engine) -> int:
+    """
+    Delete changes every registered consumer has acknowledged.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the database holding the change log.
+
+    Returns
+    -------
+    int
+        Number of deleted changes.
+    """
+    with engine.begin() as connection:
+        oldest = connection.execute(select(func.min(ChangeCursors.position))).scalar()
+
+        if oldest is None:
+            return 0
+
+        return connection.execute(delete(ChangeLog).where(ChangeLog.change_id <= oldest)).rowcount
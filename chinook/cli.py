@@ -0,0 +1,337 @@
+"""
+cli.py
+
+Defines the `python -m chinook` command line interface.
+
+Every subcommand connects to the database given by `--url`, or, without it, to the
+one configured by the `CHINOOK_*` environment variables (`ChinookConfig.from_env()`),
+and accepts engine, pool and pragma options that are passed to `create_db_engine`:
+
+    python -m chinook --url sqlite:///chinook.db seed --scale 50 --bulk
+    python -m chinook --url postgresql://... seed --scale 50 --jobs 8 --bulk
+    python -m chinook --url postgresql://... --pool-size 10 export snapshot/
+    python -m chinook --url sqlite:///chinook.db verify --repair
+    python -m chinook --url sqlite:///chinook.db profile --json
+    python -m chinook bench --scale-factors 1,10 -- -k queries
+
+Without a subcommand, the database is initialized as before, with the global options
+applied and `--profile` printing the seeding report. `bench` runs the `benchmarks/`
+suite of a source checkout, which is not installed with the package.
+
+Reports are printed as text, or as JSON with `--json`, so the commands can be
+scripted in pipelines.
+
+Functions
+---------
+build_parser() -> ArgumentParser
+    Builds the argument parser of every subcommand.
+
+engine_options(args: Namespace) -> Dict[str, Any]
+    Collects the engine and pool options given on the command line.
+
+main(argv: Sequence[str]) -> int
+    Runs the command line interface and returns its exit code.
+"""
+
+import json
+from argparse import REMAINDER, SUPPRESS, ArgumentParser, ArgumentTypeError, Namespace
+from ast import literal_eval
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from kink import di
+from sqlalchemy import Engine
+
+from .config import PRAGMA_PROFILES, ChinookConfig
+from .profiling import SeedingProfiler
+from .protocols.sql_alchemy_config import ISQLAlchemyConfig
+
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent.parent / "benchmarks"
+
+# Pool options with a dedicated flag, and the type of their value.
+POOL_OPTIONS = {
+    "pool_size": int,
+    "max_overflow": int,
+    "pool_timeout": float,
+    "pool_recycle": int
+}
+
+
+def _option(value: str) -> Tuple[str, Any]:
+    key, separator, text = value.partition("=")
+
+    if not separator or not key:
+        raise ArgumentTypeError(f"expected KEY=VALUE, got {value!r}")
+
+    try:
+        return key, literal_eval(text)
+    except (ValueError, SyntaxError):
+        return key, text
+
+
+def _add_global_options(parser: ArgumentParser):
+    parser.add_argument("--url", help="connection string; defaults to the CHINOOK_* environment")
+    parser.add_argument("--money-storage", choices=("float", "cents"),
+                        help="storage of money columns")
+    parser.add_argument("--echo", action="store_true", help="log every statement")
+    parser.add_argument("--pool-pre-ping", action="store_true",
+                        help="test pooled connections before use")
+
+    for name, kind in POOL_OPTIONS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=kind, metavar="N")
+
+    parser.add_argument("--engine-option", type=_option, action="append",
+                        metavar="KEY=VALUE", help="extra `create_engine` keyword argument")
+    parser.add_argument("--pragmas", choices=tuple(PRAGMA_PROFILES),
+                        help="SQLite pragma profile")
+    parser.add_argument("--read-only", action="store_true",
+                        help="open the SQLite file read-only, immutable and memory-mapped")
+    parser.add_argument("--json", action="store_true", help="print reports as JSON")
+
+
+def build_parser() -> ArgumentParser:
+    """
+    Build the argument parser of the command line interface.
+
+    Returns
+    -------
+    ArgumentParser
+        Parser of the global options and the `seed`, `bench`, `export`, `verify` and
+        `profile` subcommands.
+    """
+    parser = ArgumentParser(prog="python -m chinook",
+                            description="Seed, benchmark, export and verify the Chinook database.")
+    _add_global_options(parser)
+    parser.add_argument("--profile", action="store_true",
+                        help="without a subcommand: print phase and per-table timings, "
+                             "including peak memory")
+
+    # Global options are also accepted after the subcommand. There they default to
+    # SUPPRESS, so options given before the subcommand are not reset.
+    common = ArgumentParser(add_help=False, argument_default=SUPPRESS)
+    _add_global_options(common)
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    seed = commands.add_parser("seed", parents=[common],
+                               help="create the schema and insert sample data")
+    profile = commands.add_parser(
+        "profile", parents=[common],
+        help="seed like `seed`, tracing time and peak memory per phase and table")
+
+    for command in (seed, profile):
+        command.add_argument("--scale", type=int, default=1,
+                             help="scale factor of the sample data (default: 1)")
+        command.add_argument("--bulk", action="store_true",
+                             help="insert with Core executemany instead of the ORM; "
+                                  "always used when --scale is above 1")
+        command.add_argument("--batch-size", type=int, default=10_000,
+                             help="rows per executemany batch of bulk inserts")
+        command.add_argument("--jobs", type=int, default=1, metavar="N",
+                             help="concurrent writers of bulk inserts, which implies "
+                                  "--bulk; not supported on SQLite (default: 1)")
+        command.add_argument("--snapshot",
+                             help="SQLite file or exported snapshot to restore instead")
+
+    bench = commands.add_parser("bench", parents=[common], help="run the benchmark suite")
+    bench.add_argument("--scale-factors", default="1,10,100",
+                       help="comma-separated scale factors (default: 1,10,100)")
+    bench.add_argument("--path", type=Path, default=BENCHMARKS_DIR,
+                       help="benchmark suite to run")
+    bench.add_argument("pytest_args", nargs=REMAINDER,
+                       help="extra pytest arguments, after `--`")
+
+    export = commands.add_parser("export", parents=[common],
+                                 help="export every table to columnar files")
+    export.add_argument("directory", type=Path)
+    export.add_argument("--format", dest="file_format", choices=("parquet", "feather"),
+                        default="parquet")
+    export.add_argument("--compression", default="zstd",
+                        help="codec such as zstd, lz4 or snappy, or `none`")
+    export.add_argument("--chunk-size", type=int, default=50_000)
+    export.add_argument("--partition-by", type=_option, action="append", default=[],
+                        metavar="TABLE=COLUMN", help="split a table by a date column")
+    export.add_argument("--granularity", choices=("year", "month"), default="year")
+
+    verify = commands.add_parser("verify", parents=[common],
+                                 help="check invoice totals against their lines")
+    verify.add_argument("--repair", action="store_true", help="overwrite mismatched totals")
+    verify.add_argument("--range-size", type=int, default=100_000)
+    verify.add_argument("--batch-size", type=int, default=5_000)
+
+    return parser
+
+
+def engine_options(args: Namespace) -> Dict[str, Any]:
+    """
+    Collect the engine and pool options given on the command line.
+
+    Parameters
+    ----------
+    args : Namespace
+        Parsed arguments.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Keyword arguments for `sqlalchemy.create_engine`. Options left out are not
+        included, so the dialect's defaults apply.
+    """
+    options = {name: getattr(args, name) for name in POOL_OPTIONS
+               if getattr(args, name) is not None}
+
+    if args.echo:
+        options["echo"] = True
+
+    if args.pool_pre_ping:
+        options["pool_pre_ping"] = True
+
+    options.update(args.engine_option or ())
+    return options
+
+
+def _config(args: Namespace) -> ChinookConfig:
+    changes = {}
+
+    if args.url is not None:
+        changes["connection_string"] = args.url
+
+    if args.money_storage is not None:
+        changes["money_storage"] = args.money_storage
+
+    if args.pragmas is not None:
+        changes["pragmas"] = args.pragmas
+
+    if args.read_only:
+        changes["read_only"] = True
+
+    if args.command in ("seed", "profile"):
+        if args.read_only:
+            raise ValueError("A read-only database cannot be seeded.")
+
+        changes.update(
+            seed="bulk" if args.bulk or args.scale > 1 or args.jobs > 1 else "orm",
+            scale=args.scale,
+            batch_size=args.batch_size,
+            jobs=args.jobs,
+            snapshot=args.snapshot
+        )
+
+    return replace(ChinookConfig.from_env(), **changes)
+
+
+def _engine(args: Namespace, config: ChinookConfig) -> Engine:
+    from .models.engine import create_db_engine
+
+    di[ISQLAlchemyConfig] = config
+    return create_db_engine(sql_config=config, engine_options=engine_options(args))
+
+
+def _print(args: Namespace, report: dict, text: Optional[str] = None):
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    elif text is not None:
+        print(text)
+    else:
+        for key, value in report.items():
+            print(f"{key}: {value}")
+
+
+def _bench(args: Namespace) -> int:
+    try:
+        import pytest
+    except ImportError as error:
+        raise SystemExit("`bench` requires pytest-benchmark: pip install chinook[bench]") \
+            from error
+
+    if not args.path.exists():
+        raise SystemExit(f"No benchmark suite at {args.path}: the benchmarks are not "
+                         "installed with the package. Run `bench` from a source checkout "
+                         "or pass --path.")
+
+    extra = args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+    return int(pytest.main([str(args.path), "--scale-factors", args.scale_factors, *extra]))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the command line interface.
+
+    Parameters
+    ----------
+    argv : Sequence[str], optional
+        Arguments, without the program name. Defaults to `sys.argv[1:]`.
+
+    Returns
+    -------
+    int
+        Exit code: 0 on success, 1 if `verify` found mismatches it did not repair, or
+        the exit code of pytest for `bench`.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        return _bench(args)
+
+    try:
+        config = _config(args)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.command is None:
+        from .bootstrap import initialize
+
+        report = initialize(profile=args.profile, config=config,
+                            engine_options=engine_options(args))
+
+        if args.profile:
+            _print(args, report.as_dict(), report.format())
+
+        return 0
+
+    engine = _engine(args, config)
+
+    try:
+        if args.command in ("seed", "profile"):
+            from .bootstrap import seed_database
+
+            report = seed_database(
+                engine, config, SeedingProfiler(memory=args.command == "profile"))
+            summary = {"total_seconds": report.total_seconds,
+                       **{name: timing.rows for name, timing in report.tables.items()}}
+
+            if args.command == "profile":
+                _print(args, report.as_dict(), report.format())
+            else:
+                _print(args, summary)
+
+            return 0
+
+        if args.command == "export":
+            from .export import export_snapshot
+
+            manifest = export_snapshot(
+                engine, args.directory, args.file_format,
+                compression=None if args.compression == "none" else args.compression,
+                chunk_size=args.chunk_size,
+                partition_by=dict(args.partition_by) or None,
+                granularity=args.granularity
+            )
+            _print(args, manifest, f"exported {len(manifest['tables'])} tables "
+                                   f"to {args.directory}")
+            return 0
+
+        from .verification import verify_invoice_totals
+
+        report = verify_invoice_totals(engine, repair=args.repair, range_size=args.range_size,
+                                       batch_size=args.batch_size)
+        _print(args, {**asdict(report), "consistent": report.consistent},
+               f"{report.invoices} invoices checked, {len(report.mismatches)} mismatched, "
+               f"{report.repaired} repaired in {report.seconds:.3f}s")
+
+        return 0 if report.consistent or args.repair else 1
+    finally:
+        engine.dispose()
@@ -1,5 +1,8 @@
+from typing import TYPE_CHECKING, Optional, Union
+
+import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import Engine
+from sqlalchemy import Connection, Engine, Table, insert
 
 from .models import (
     MediaTypes,
@@ -29,8 +32,103 @@ from .sample_data import (
     load_invoice_item_data
 )
 
+from .profiling import SeedingProfiler
+from .read_models import refresh_track_details
+
+if TYPE_CHECKING:
+    from .sharding import ShardSet
+
+
+# Models and their sample data loaders, in foreign key dependency order.
+SAMPLE_TABLES = (
+    (MediaTypes, load_media_type_data),
+    (Genres, load_genre_data),
+    (Playlists, load_playlist_data),
+    (Artists, load_artist_data),
+    (Employees, load_employees_data),
+    (Customers, load_customer_data),
+    (Invoices, load_invoice_data),
+    (Albums, load_album_data),
+    (Tracks, load_track_data),
+    (PlaylistTrack, load_playlist_track_data),
+    (InvoiceItems, load_invoice_item_data)
+)
+
+
+def frame_records(frame: pd.DataFrame) -> list:
+    """
+    Convert a DataFrame into a list of row dictionaries suitable for `executemany`.
+
+    Missing values become `None` and NumPy scalars become Python objects, so every
+    DBAPI driver can bind them.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+        Rows to convert.
+
+    Returns
+    -------
+    list
+        One dictionary per row, keyed by column name.
+    """
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def insert_frame(connection: Connection, table: Table, frame: pd.DataFrame,
+                 batch_size: int = 10_000):
+    """
+    Bulk-insert a DataFrame into a table with batched Core `executemany` calls.
+
+    Only columns present in the table are inserted. This bypasses the ORM unit of
+    work and is the fast path used for scaled and re-imported data.
+
+    Parameters
+    ----------
+    connection : Connection
+        Connection inside the transaction to insert in.
+
+    table : Table
+        Target table.
+
+    frame : pd.DataFrame
+        Rows to insert.
+
+    batch_size : int
+        Rows per `executemany` call.
+    """
+    frame = frame[[column for column in frame.columns if column in table.columns]]
+
+    for start in range(0, len(frame), batch_size):
+        records = frame_records(frame.iloc[start:start + batch_size])
+
+        if records:
+            connection.execute(insert(table), records)
+
+
+def add_sample_rows(session: Session, model: type, frame: pd.DataFrame):
+    """
+    Add one ORM object per row of a sample DataFrame to a session.
+
+    Parameters
+    ----------
+    session : Session
+        Session the objects are added to.
+
+    model : type
+        ORM model class whose mapped columns match the DataFrame columns.
+
+    frame : pd.DataFrame
+        Sample data as returned by one of the `load_*_data` functions.
+    """
+    columns = [column for column in frame.columns if column in model.__table__.columns]
+
+    for record in frame_records(frame[columns]):
+        session.add(model(**record))
+
 
-def commit_sample_data(engine: Engine):
+def commit_sample_data(engine: Union[Engine, "ShardSet"],
+                       profiler: Optional[SeedingProfiler] = None):
     """
     Load and insert sample data into the database using the provided SQLAlchemy engine.
 
@@ -40,129 +138,52 @@ def commit_sample_data(engine: Engine):
 
     Parameters
     ----------
-    engine : Engine
+    engine : Engine or ShardSet
         SQLAlchemy engine connected to the target database where the sample data
-        should be inserted.
+        should be inserted. When a `ShardSet` is given, catalog tables are copied to
+        every shard, customers and their sales are split between shards, and rows
+        are bulk-inserted per shard. The `track_details` read model is rebuilt from
+        the seeded catalog on every database.
+
+    profiler : SeedingProfiler, optional
+        Profiler recording the `load_csv` and `insert` phases and per-table parse,
+        insert and flush timings. Each table is flushed separately so that its
+        flush time can be attributed to it.
     """
-    media_types = load_media_type_data()
-    genres = load_genre_data()
-    playlists = load_playlist_data()
-    artists = load_artist_data()
-    employees = load_employees_data()
-    customers = load_customer_data()
-    invoices = load_invoice_data()
-    albums = load_album_data()
-    tracks = load_track_data()
-    playlist_tracks = load_playlist_track_data()
-    invoice_items = load_invoice_item_data()
-
-    with Session(engine) as session:
-        for _, row in media_types.iterrows():
-            session.add(MediaTypes(
-                media_type_id=row["media_type_id"],
-                name=row["name"]
-            ))
-
-        for _, row in genres.iterrows():
-            session.add(Genres(
-                genre_id=row["genre_id"],
-                name=row["name"]
-            ))
-
-        for _, row in playlists.iterrows():
-            session.add(Playlists(
-                playlist_id=row["playlist_id"],
-                name=row["name"]
-            ))
-
-        for _, row in artists.iterrows():
-            session.add(Artists(
-                artist_id=row["artist_id"],
-                name=row["name"]
-            ))
-
-        for _, row in employees.iterrows():
-            session.add(Employees(
-                employee_id=row["employee_id"],
-                last_name=row["last_name"],
-                first_name=row["first_name"],
-                title=row["title"],
-                reports_to=row["reports_to"],
-                birth_date=row["birth_date"],
-                hire_date=row["hire_date"],
-                address=row["address"],
-                city=row["city"],
-                state=row["state"],
-                country=row["country"],
-                postal_code=row["postal_code"],
-                phone=row["phone"],
-                fax=row["fax"],
-                email=row["email"]
-            ))
-
-        for _, row in customers.iterrows():
-            session.add(Customers(
-                customer_id=row["customer_id"],
-                first_name=row["first_name"],
-                last_name=row["last_name"],
-                company=row["company"],
-                address=row["address"],
-                city=row["city"],
-                state=row["state"],
-                country=row["country"],
-                postal_code=row["postal_code"],
-                phone=row["phone"],
-                fax=row["fax"],
-                email=row["email"],
-                support_rep_id=row["support_rep_id"]
-            ))
-
-        for _, row in invoices.iterrows():
-            session.add(Invoices(
-                invoice_id=row["invoice_id"],
-                customer_id=row["customer_id"],
-                invoice_date=row["invoice_date"],
-                billing_address=row["billing_address"],
-                billing_city=row["billing_city"],
-                billing_state=row["billing_state"],
-                billing_country=row["billing_country"],
-                billing_postal_code=row["billing_postal_code"],
-                total=row["total"]
-            ))
-
-        for _, row in albums.iterrows():
-            session.add(Albums(
-                album_id=row["album_id"],
-                title=row["title"],
-                artist_id=row["artist_id"]
-            ))
-
-        for _, row in tracks.iterrows():
-            session.add(Tracks(
-                track_id=row["track_id"],
-                name=row["name"],
-                album_id=row["album_id"],
-                media_type_id=row["media_type_id"],
-                genre_id=row["genre_id"],
-                composer=row["composer"],
-                milliseconds=row["milliseconds"],
-                total_bytes=row["total_bytes"],
-                unit_price=row["unit_price"]
-            ))
-
-        for _, row in playlist_tracks.iterrows():
-            session.add(PlaylistTrack(
-                playlist_id=row["playlist_id"],
-                track_id=row["track_id"]
-            ))
-
-        for _, row in invoice_items.iterrows():
-            session.add(InvoiceItems(
-                invoice_line_id=row["invoice_line_id"],
-                invoice_id=row["invoice_id"],
-                track_id=row["track_id"],
-                unit_price=row["unit_price"],
-                quantity=row["quantity"]
-            ))
-
-        session.commit()
+    profiler = profiler or SeedingProfiler()
+    frames = {}
+
+    with profiler.phase("load_csv"):
+        for model, loader in SAMPLE_TABLES:
+            with profiler.stage(model.__tablename__, "parse") as timing:
+                frames[model] = loader()
+                timing.rows = len(frames[model])
+
+    from .sharding import ShardSet
+
+    if isinstance(engine, ShardSet):
+        with profiler.phase("insert"):
+            for name, shard_frames in engine.partition_frames(frames).items():
+                with engine.engines[name].begin() as connection:
+                    for model, frame in shard_frames.items():
+                        with profiler.stage(model.__tablename__, "insert"):
+                            insert_frame(connection, model.__table__, frame)
+
+                    with profiler.stage("track_details", "insert"):
+                        refresh_track_details(connection)
+
+        return
+
+    with profiler.phase("insert"):
+        with Session(engine) as session:
+            for model, _ in SAMPLE_TABLES:
+                with profiler.stage(model.__tablename__, "insert"):
+                    add_sample_rows(session, model, frames[model])
+
+                with profiler.stage(model.__tablename__, "flush"):
+                    session.flush()
+
+            with profiler.stage("track_details", "insert") as timing:
+                timing.rows = refresh_track_details(session.connection())
+
+            session.commit()
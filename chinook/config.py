@@ -0,0 +1,333 @@
+"""
+config.py
+
+Defines the typed configuration of a Chinook database.
+
+`ChinookConfig` implements `ISQLAlchemyConfig` and carries every option that tunes a
+database in one frozen object: the connection, how it is seeded, engine and pool
+settings, SQLite pragmas and caches, a snapshot to reuse instead of seeding, and a
+read-only mode for many processes reading one seeded file.
+`initialize(config=...)` seeds and registers a database from it, so one process can
+run several differently tuned databases side by side. `ChinookConfig.from_env()`
+reads the `CHINOOK_*` environment variables, which `initialize()` falls back to.
+
+Classes
+-------
+ChinookConfig
+    Frozen configuration of a Chinook database.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import make_url
+
+
+SEED_STRATEGIES = ("orm", "bulk", "none")
+
+SESSION_SCOPES = ("thread", "task")
+
+# Bytes memory-mapped per connection in read-only mode. Mapped pages live in the OS
+# page cache, shared by every process reading the file.
+READ_ONLY_MMAP_SIZE = 2 ** 30
+
+# SQLite pragmas applied to every new connection, by profile name.
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "fast": {"journal_mode": "WAL", "synchronous": "NORMAL", "temp_store": "MEMORY"},
+    "bulk_load": {"journal_mode": "OFF", "synchronous": "OFF", "temp_store": "MEMORY"}
+}
+
+
+def _flag(environ: Mapping[str, str], name: str, default: str) -> bool:
+    try:
+        return bool(int(environ.get(name, default)))
+    except ValueError:
+        raise ValueError(f"{name} expects a value of 0 or 1.") from None
+
+
+def _number(environ: Mapping[str, str], name: str, kind: type = int) -> Optional[Any]:
+    value = environ.get(name, "")
+
+    if not value:
+        return None
+
+    try:
+        return kind(value)
+    except ValueError:
+        raise ValueError(f"{name} expects a number.") from None
+
+
+@dataclass(frozen=True)
+class ChinookConfig:
+    """
+    Configuration of a Chinook database.
+
+    Implements `ISQLAlchemyConfig`.
+
+    Attributes
+    ----------
+    connection_string : str
+        Connection string of the database. Defaults to an in-memory SQLite database.
+
+    replica_connection_strings : Tuple[str, ...]
+        Connection strings of read replicas.
+
+    money_storage : str
+        Storage of `Money` columns, `float` or `cents`, of this database. Engines
+        built by `create_db_engine` record it, so databases with different storages
+        can be used side by side.
+
+    seed : str
+        How `initialize()` fills the schema: `orm` (sample data through ORM sessions),
+        `bulk` (Core `executemany` inserts, required for `scale` above 1) or `none`.
+
+    scale : int
+        Scale factor of the seeded sample data.
+
+    batch_size : int
+        Rows per `executemany` batch of bulk seeding.
+
+    jobs : int
+        Concurrent writers of bulk seeding. Above 1 each table is inserted in `jobs`
+        parts on separate connections, which SQLite, serializing writers, rejects.
+
+    snapshot : str, optional
+        Seeded data to reuse instead of seeding: a SQLite database file, copied with
+        the SQLite backup API into a SQLite target, or a directory written by
+        `export_snapshot`, imported into the new schema.
+
+    pool_size, max_overflow, pool_timeout, pool_recycle : optional
+        Connection pool settings passed to `create_engine`. Unset values keep the
+        dialect's defaults.
+
+    pool_pre_ping : bool
+        Whether pooled connections are tested before use.
+
+    echo : bool
+        Whether every statement is logged.
+
+    query_cache_size : int, optional
+        Size of SQLAlchemy's compiled statement cache.
+
+    pragmas : str
+        SQLite pragma profile: `default`, `fast` (WAL journal, `synchronous=NORMAL`,
+        in-memory temporary tables) or `bulk_load` (no journal, no fsync; for
+        throwaway databases only).
+
+    sqlite_cache_kib : int, optional
+        SQLite page cache per connection, in KiB.
+
+    session_scope : str
+        Scope of the registered `scoped_session`: `thread` or asyncio `task`.
+
+    expire_on_commit : bool
+        Whether registered sessions expire their objects after commit.
+
+    autoflush : bool
+        Whether registered sessions flush pending changes before queries.
+
+    read_only : bool
+        Whether to open a seeded SQLite file read-only, immutable and with a shared
+        page cache, for many reader processes. `initialize()` then neither migrates
+        nor seeds the database, and nothing may write to the file meanwhile.
+
+    mmap_size : int, optional
+        Bytes of the SQLite file to memory-map. Defaults to `READ_ONLY_MMAP_SIZE` in
+        read-only mode, and to SQLite's default otherwise.
+    """
+
+    connection_string: str = "sqlite:///:memory:"
+    replica_connection_strings: Tuple[str, ...] = ()
+    money_storage: str = "float"
+    seed: str = "orm"
+    scale: int = 1
+    batch_size: int = 10_000
+    jobs: int = 1
+    snapshot: Optional[str] = None
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    pool_timeout: Optional[float] = None
+    pool_recycle: Optional[int] = None
+    pool_pre_ping: bool = False
+    echo: bool = False
+    query_cache_size: Optional[int] = None
+    pragmas: str = "default"
+    sqlite_cache_kib: Optional[int] = None
+    session_scope: str = "thread"
+    expire_on_commit: bool = True
+    autoflush: bool = True
+    read_only: bool = False
+    mmap_size: Optional[int] = None
+
+    def __post_init__(self):
+        if self.money_storage not in ("float", "cents"):
+            raise ValueError("`money_storage` must be `float` or `cents`.")
+
+        if self.seed not in SEED_STRATEGIES:
+            raise ValueError(f"`seed` must be one of {SEED_STRATEGIES}.")
+
+        if self.pragmas not in PRAGMA_PROFILES:
+            raise ValueError(f"`pragmas` must be one of {tuple(PRAGMA_PROFILES)}.")
+
+        if self.session_scope not in SESSION_SCOPES:
+            raise ValueError(f"`session_scope` must be one of {SESSION_SCOPES}.")
+
+        if self.scale < 1 or self.batch_size < 1 or self.jobs < 1:
+            raise ValueError("`scale`, `batch_size` and `jobs` must be positive.")
+
+        if self.read_only and (self.in_memory
+                               or make_url(self.connection_string).get_backend_name()
+                               != "sqlite"):
+            raise ValueError("Read-only mode needs a SQLite database file.")
+
+        if self.scale > 1 and self.seed == "orm":
+            raise ValueError("Scaled sample data is seeded with `seed='bulk'`.")
+
+        if self.jobs > 1 and self.seed != "bulk":
+            raise ValueError("Parallel seeding needs `seed='bulk'`.")
+
+        if self.jobs > 1 and make_url(self.connection_string).get_backend_name() == "sqlite":
+            raise ValueError("SQLite serializes writers; seed it with a single job.")
+
+        object.__setattr__(
+            self, "replica_connection_strings", tuple(self.replica_connection_strings))
+
+    @property
+    def in_memory(self) -> bool:
+        """Returns whether the database is an in-memory SQLite database."""
+        url = make_url(self.connection_string)
+        return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+    @property
+    def engine_options(self) -> Dict[str, Any]:
+        """Returns the keyword arguments for `create_engine` that are set."""
+        options = {
+            name: getattr(self, name)
+            for name in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle",
+                         "query_cache_size")
+            if getattr(self, name) is not None
+        }
+
+        if self.pool_pre_ping:
+            options["pool_pre_ping"] = True
+
+        if self.echo:
+            options["echo"] = True
+
+        return options
+
+    @property
+    def sqlite_pragmas(self) -> Dict[str, Any]:
+        """Returns the pragmas to run on every new SQLite connection."""
+        pragmas = dict(PRAGMA_PROFILES[self.pragmas])
+
+        if self.sqlite_cache_kib is not None:
+            pragmas["cache_size"] = -self.sqlite_cache_kib
+
+        if self.read_only:
+            # An immutable file has no journal, and switching its mode would write.
+            pragmas.pop("journal_mode", None)
+            pragmas["query_only"] = 1
+
+        mmap_size = READ_ONLY_MMAP_SIZE if self.read_only and self.mmap_size is None \
+            else self.mmap_size
+
+        if mmap_size is not None:
+            pragmas["mmap_size"] = mmap_size
+
+        return pragmas
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "ChinookConfig":
+        """
+        Read a configuration from `CHINOOK_*` environment variables.
+
+        `CHINOOK_SQLITE` (default 1) selects a SQLite database, in memory unless
+        `CHINOOK_SQLITE_IN_MEMORY=0`, in which case it is stored at
+        `db/<CHINOOK_SQLITE_DB_NAME>.db`. With `CHINOOK_SQLITE=0`,
+        `CHINOOK_CONN_STRING` is used. The other variables map to the attribute of
+        the same name: `CHINOOK_REPLICA_CONN_STRINGS` (comma-separated),
+        `CHINOOK_MONEY_STORAGE`, `CHINOOK_SEED`, `CHINOOK_SCALE`,
+        `CHINOOK_BATCH_SIZE`, `CHINOOK_JOBS`, `CHINOOK_SNAPSHOT`, `CHINOOK_POOL_SIZE`,
+        `CHINOOK_MAX_OVERFLOW`, `CHINOOK_POOL_TIMEOUT`, `CHINOOK_POOL_RECYCLE`,
+        `CHINOOK_POOL_PRE_PING`, `CHINOOK_ECHO`, `CHINOOK_QUERY_CACHE_SIZE`,
+        `CHINOOK_PRAGMAS`, `CHINOOK_SQLITE_CACHE_KIB`, `CHINOOK_SESSION_SCOPE`,
+        `CHINOOK_EXPIRE_ON_COMMIT`, `CHINOOK_AUTOFLUSH`, `CHINOOK_READ_ONLY` and
+        `CHINOOK_MMAP_SIZE`.
+
+        Parameters
+        ----------
+        environ : Mapping[str, str], optional
+            Variables to read. Defaults to `os.environ`.
+
+        Returns
+        -------
+        ChinookConfig
+            The configuration.
+
+        Raises
+        ------
+        ValueError
+            If a variable has an invalid value.
+        """
+        environ = os.environ if environ is None else environ
+
+        if _flag(environ, "CHINOOK_SQLITE", "1"):
+            db_name = environ.get("CHINOOK_SQLITE_DB_NAME", "chinook")
+            connection_string = "sqlite:///:memory:" \
+                if _flag(environ, "CHINOOK_SQLITE_IN_MEMORY", "1") \
+                else f"sqlite:///db/{db_name}.db"
+        else:
+            connection_string = environ.get("CHINOOK_CONN_STRING", "")
+
+        money_storage = environ.get("CHINOOK_MONEY_STORAGE", "float")
+
+        if money_storage not in ("float", "cents"):
+            raise ValueError("CHINOOK_MONEY_STORAGE expects a value of float or cents.")
+
+        seed = environ.get("CHINOOK_SEED", "orm")
+
+        if seed not in SEED_STRATEGIES:
+            raise ValueError(f"CHINOOK_SEED expects one of {', '.join(SEED_STRATEGIES)}.")
+
+        session_scope = environ.get("CHINOOK_SESSION_SCOPE", "thread")
+
+        if session_scope not in SESSION_SCOPES:
+            raise ValueError(
+                f"CHINOOK_SESSION_SCOPE expects one of {', '.join(SESSION_SCOPES)}.")
+
+        pragmas = environ.get("CHINOOK_PRAGMAS", "default")
+
+        if pragmas not in PRAGMA_PROFILES:
+            raise ValueError(f"CHINOOK_PRAGMAS expects one of {', '.join(PRAGMA_PROFILES)}.")
+
+        return cls(
+            connection_string=connection_string,
+            replica_connection_strings=tuple(
+                replica.strip()
+                for replica in environ.get("CHINOOK_REPLICA_CONN_STRINGS", "").split(",")
+                if replica.strip()
+            ),
+            money_storage=money_storage,
+            seed=seed,
+            scale=_number(environ, "CHINOOK_SCALE") or 1,
+            batch_size=_number(environ, "CHINOOK_BATCH_SIZE") or 10_000,
+            jobs=_number(environ, "CHINOOK_JOBS") or 1,
+            snapshot=environ.get("CHINOOK_SNAPSHOT") or None,
+            pool_size=_number(environ, "CHINOOK_POOL_SIZE"),
+            max_overflow=_number(environ, "CHINOOK_MAX_OVERFLOW"),
+            pool_timeout=_number(environ, "CHINOOK_POOL_TIMEOUT", float),
+            pool_recycle=_number(environ, "CHINOOK_POOL_RECYCLE"),
+            pool_pre_ping=_flag(environ, "CHINOOK_POOL_PRE_PING", "0"),
+            echo=_flag(environ, "CHINOOK_ECHO", "0"),
+            query_cache_size=_number(environ, "CHINOOK_QUERY_CACHE_SIZE"),
+            pragmas=pragmas,
+            sqlite_cache_kib=_number(environ, "CHINOOK_SQLITE_CACHE_KIB"),
+            session_scope=session_scope,
+            expire_on_commit=_flag(environ, "CHINOOK_EXPIRE_ON_COMMIT", "1"),
+            autoflush=_flag(environ, "CHINOOK_AUTOFLUSH", "1"),
+            read_only=_flag(environ, "CHINOOK_READ_ONLY", "0"),
+            mmap_size=_number(environ, "CHINOOK_MMAP_SIZE")
+        )
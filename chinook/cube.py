@@ -0,0 +1,447 @@
+"""
+cube.py
+
+Defines an in-process columnar cube over the Chinook sales fact tables.
+
+The cube loads the `invoice_items ⋈ tracks ⋈ albums ⋈ genres ⋈ invoices ⋈ customers`
+join once into NumPy arrays. Dimensions are dictionary-encoded into small integer
+codes so that filtered group-bys reduce to vectorized `bincount` / `np.add.at`
+kernels instead of row-at-a-time ORM work.
+
+Classes
+-------
+Dimension
+    Dictionary encoding of a single categorical dimension.
+
+InvoiceCube
+    Columnar cube supporting filtered sum/count/avg aggregations and top-N queries.
+"""
+
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Engine, select
+
+from .models import (
+    Albums,
+    Artists,
+    Customers,
+    Genres,
+    InvoiceItems,
+    Invoices,
+    MediaTypes,
+    Tracks
+)
+from .models.types import cents
+
+if TYPE_CHECKING:
+    from .cdc import ChangeRecord
+
+
+DIMENSIONS = (
+    "country",
+    "billing_country",
+    "genre",
+    "media_type",
+    "artist",
+    "month",
+    "year",
+    "customer_id"
+)
+
+MEASURES = ("revenue", "quantity", "lines")
+
+AGGREGATIONS = ("sum", "count", "avg")
+
+# Tables read by the cube, whose captured changes can affect it.
+SOURCE_TABLES = (
+    "invoice_items",
+    "invoices",
+    "customers",
+    "tracks",
+    "albums",
+    "artists",
+    "genres",
+    "media_types"
+)
+
+
+class Dimension:
+    """
+    Dictionary encoding of a categorical dimension.
+
+    Each distinct label is assigned a dense integer code in first-seen order, so
+    that codes can be used directly as `bincount` bins.
+
+    Attributes
+    ----------
+    name : str
+        Name of the dimension.
+
+    labels : list
+        Labels indexed by their code.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.labels: list = []
+        self._codes: Dict[object, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        """
+        Encode a column of labels, extending the dictionary with unseen values.
+
+        Parameters
+        ----------
+        values : pd.Series
+            Raw labels to encode.
+
+        Returns
+        -------
+        np.ndarray
+            Array of `int32` codes aligned with `values`.
+        """
+        inverse, uniques = pd.factorize(values.fillna("<unknown>"), sort=False)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+
+        for position, label in enumerate(uniques):
+            code = self._codes.get(label)
+
+            if code is None:
+                code = len(self.labels)
+                self._codes[label] = code
+                self.labels.append(label)
+
+            mapping[position] = code
+
+        return mapping[inverse]
+
+    def lookup(self, labels: Union[object, Iterable[object]]) -> np.ndarray:
+        """
+        Translate one or more labels into codes, ignoring unknown labels.
+
+        Parameters
+        ----------
+        labels : object or Iterable[object]
+            A single label or a collection of labels.
+
+        Returns
+        -------
+        np.ndarray
+            Array of matching codes.
+        """
+        if isinstance(labels, (str, int, np.integer)) or not isinstance(labels, Iterable):
+            labels = [labels]
+
+        return np.array(
+            [self._codes[label] for label in labels if label in self._codes],
+            dtype=np.int32
+        )
+
+
+class InvoiceCube:
+    """
+    Columnar cube over invoice lines joined with their catalog and customer dimensions.
+
+    The cube is loaded once from the database and can then be refreshed incrementally
+    with invoices whose ids are greater than the highest id already loaded.
+
+    Parameters
+    ----------
+    engine : Engine
+        SQLAlchemy engine connected to a Chinook database.
+
+    Examples
+    --------
+    >>> cube = InvoiceCube(get_engine())
+    >>> cube.aggregate("genre", where={"country": "USA"})
+    >>> cube.top("artist", n=5)
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self.dimensions = {name: Dimension(name) for name in DIMENSIONS}
+        self.max_invoice_id = 0
+        self._codes = {name: np.empty(0, dtype=np.int32) for name in DIMENSIONS}
+        self._measures = {
+            "revenue": np.empty(0, dtype=np.int64),
+            "quantity": np.empty(0, dtype=np.int64),
+            "lines": np.empty(0, dtype=np.int64)
+        }
+
+    def __len__(self) -> int:
+        return len(self._measures["lines"])
+
+    def refresh(self) -> int:
+        """
+        Load invoice lines that were added since the last load.
+
+        Returns
+        -------
+        int
+            Number of invoice lines appended to the cube.
+        """
+        statement = (
+            select(
+                InvoiceItems.invoice_id,
+                cents(InvoiceItems.unit_price).label("cents"),
+                InvoiceItems.quantity,
+                Invoices.invoice_date,
+                Invoices.billing_country,
+                Invoices.customer_id,
+                Customers.country,
+                Genres.name.label("genre"),
+                MediaTypes.name.label("media_type"),
+                Artists.name.label("artist")
+            )
+            .join(Invoices, Invoices.invoice_id == InvoiceItems.invoice_id)
+            .join(Customers, Customers.customer_id == Invoices.customer_id)
+            .join(Tracks, Tracks.track_id == InvoiceItems.track_id)
+            .join(Albums, Albums.album_id == Tracks.album_id)
+            .join(Artists, Artists.artist_id == Albums.artist_id)
+            .join(Genres, Genres.genre_id == Tracks.genre_id)
+            .join(MediaTypes, MediaTypes.media_type_id == Tracks.media_type_id)
+            .where(InvoiceItems.invoice_id > self.max_invoice_id)
+        )
+
+        with self.engine.connect() as connection:
+            frame = pd.read_sql(statement, connection)
+
+        if frame.empty:
+            return 0
+
+        self._append(frame)
+        self.max_invoice_id = int(frame["invoice_id"].max())
+
+        return len(frame)
+
+    def reload(self) -> int:
+        """
+        Discard the loaded data and load every invoice line again.
+
+        Returns
+        -------
+        int
+            Number of invoice lines loaded.
+        """
+        self._reset()
+        return self.refresh()
+
+    def apply_changes(self, changes: Iterable["ChangeRecord"]) -> int:
+        """
+        Bring the cube up to date with changes read from a `ChangeFeed`.
+
+        New invoices and lines of new invoices are appended incrementally. Updates
+        and deletes of any source table, and lines added to invoices that are already
+        loaded, trigger a full reload.
+
+        Parameters
+        ----------
+        changes : Iterable[ChangeRecord]
+            Captured changes, in any order.
+
+        Returns
+        -------
+        int
+            Number of invoice lines appended or reloaded.
+        """
+        changes = [change for change in changes if change.table in SOURCE_TABLES]
+
+        if not changes:
+            return 0
+
+        stale = any(
+            change.operation != "insert"
+            or (change.table == "invoice_items"
+                and (change.data or {}).get("invoice_id", 0) <= self.max_invoice_id)
+            for change in changes
+        )
+
+        return self.reload() if stale else self.refresh()
+
+    def _append(self, frame: pd.DataFrame):
+        dates = pd.to_datetime(frame["invoice_date"])
+        columns = {
+            "country": frame["country"],
+            "billing_country": frame["billing_country"],
+            "genre": frame["genre"],
+            "media_type": frame["media_type"],
+            "artist": frame["artist"],
+            "month": dates.dt.strftime("%Y-%m"),
+            "year": dates.dt.year,
+            "customer_id": frame["customer_id"]
+        }
+
+        for name, values in columns.items():
+            codes = self.dimensions[name].encode(values)
+            self._codes[name] = np.concatenate([self._codes[name], codes])
+
+        quantity = frame["quantity"].to_numpy(dtype=np.int64)
+        unit_cents = frame["cents"].to_numpy(dtype=np.int64)
+
+        self._measures["revenue"] = np.concatenate(
+            [self._measures["revenue"], unit_cents * quantity])
+        self._measures["quantity"] = np.concatenate(
+            [self._measures["quantity"], quantity])
+        self._measures["lines"] = np.concatenate(
+            [self._measures["lines"], np.ones(len(frame), dtype=np.int64)])
+
+    def _mask(self, where: Optional[Dict[str, object]]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+
+        mask = np.ones(len(self), dtype=bool)
+
+        for name, labels in where.items():
+            if name not in self.dimensions:
+                raise ValueError(f"Unknown dimension `{name}`.")
+
+            codes = self.dimensions[name].lookup(labels)
+            mask &= np.isin(self._codes[name], codes)
+
+        return mask
+
+    def _group_codes(self, by: Tuple[str, ...]) -> Tuple[np.ndarray, int]:
+        codes = np.zeros(len(self), dtype=np.int64)
+        size = 1
+
+        for name in by:
+            if name not in self.dimensions:
+                raise ValueError(f"Unknown dimension `{name}`.")
+
+            cardinality = len(self.dimensions[name])
+            codes = codes * cardinality + self._codes[name]
+            size *= cardinality
+
+        return codes, size
+
+    def _index(self, by: Tuple[str, ...], bins: np.ndarray) -> pd.Index:
+        if len(by) == 1:
+            labels = self.dimensions[by[0]].labels
+            return pd.Index([labels[code] for code in bins], name=by[0])
+
+        sizes = [len(self.dimensions[name]) for name in by]
+        positions = np.unravel_index(bins, sizes)
+        arrays = [
+            [self.dimensions[name].labels[code] for code in codes]
+            for name, codes in zip(by, positions)
+        ]
+
+        return pd.MultiIndex.from_arrays(arrays, names=list(by))
+
+    def aggregate(
+        self,
+        by: Union[str, Sequence[str]],
+        measure: str = "revenue",
+        func: str = "sum",
+        where: Optional[Dict[str, object]] = None
+    ) -> pd.Series:
+        """
+        Aggregate a measure grouped by one or more dimensions.
+
+        Parameters
+        ----------
+        by : str or Sequence[str]
+            Dimension name, or several names for a multi-dimensional group-by.
+
+        measure : str
+            One of `revenue`, `quantity` or `lines`. Revenue is returned in USD.
+
+        func : str
+            One of `sum`, `count` or `avg`.
+
+        where : dict, optional
+            Mapping of dimension name to a label or list of labels to keep.
+
+        Returns
+        -------
+        pd.Series
+            Aggregated values indexed by the group labels. Empty groups are omitted.
+
+        Raises
+        ------
+        ValueError
+            If the dimension, measure or aggregation is unknown.
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"`measure` must be one of {MEASURES}.")
+
+        if func not in AGGREGATIONS:
+            raise ValueError(f"`func` must be one of {AGGREGATIONS}.")
+
+        by = (by,) if isinstance(by, str) else tuple(by)
+        codes, size = self._group_codes(by)
+        values = self._measures[measure]
+        mask = self._mask(where)
+
+        if mask is not None:
+            codes = codes[mask]
+            values = values[mask]
+
+        counts = np.bincount(codes, minlength=size)
+        totals = np.zeros(size, dtype=np.int64)
+        np.add.at(totals, codes, values)
+
+        if func == "count":
+            result = counts
+        elif func == "sum":
+            result = totals / 100 if measure == "revenue" else totals
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = totals / counts
+
+            if measure == "revenue":
+                result = result / 100
+
+        bins = np.flatnonzero(counts)
+        return pd.Series(result[bins], index=self._index(by, bins), name=measure)
+
+    def top(
+        self,
+        by: Union[str, Sequence[str]],
+        n: int = 10,
+        measure: str = "revenue",
+        func: str = "sum",
+        where: Optional[Dict[str, object]] = None
+    ) -> pd.Series:
+        """
+        Return the `n` largest groups for an aggregation.
+
+        Parameters
+        ----------
+        by : str or Sequence[str]
+            Dimension name or names to group by.
+
+        n : int
+            Number of groups to return.
+
+        measure : str
+            Measure to aggregate.
+
+        func : str
+            Aggregation function.
+
+        where : dict, optional
+            Dimension filters, as accepted by `aggregate`.
+
+        Returns
+        -------
+        pd.Series
+            The top `n` groups in descending order.
+        """
+        result = self.aggregate(by, measure=measure, func=func, where=where)
+        values = result.to_numpy()
+
+        if n < len(values):
+            keep = np.argpartition(-values, n - 1)[:n]
+            result = result.iloc[keep]
+
+        return result.sort_values(ascending=False)
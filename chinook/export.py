@@ -0,0 +1,368 @@
+"""
+export.py
+
+Defines export of a Chinook database to columnar snapshot files and their re-import.
+
+`export_snapshot` walks `Base.metadata.sorted_tables` and streams every data table in
+chunks into Parquet or Arrow IPC (Feather v2) files with an Arrow schema derived from
+the column types, so integers, floats, strings and timestamps keep their types
+instead of being re-parsed from text. Files can be compressed and selected tables can
+be split into one file per year or month of a date column.
+
+A `manifest.json` next to the files records, per table, its files, row count,
+primary key and foreign keys. Foreign keys are also stored in the Arrow field
+metadata. `import_snapshot` reads the manifest and bulk-loads the files in dependency
+order through `insert_frame`.
+
+Requires the optional `pyarrow` dependency (`pip install chinook[export]`).
+
+Functions
+---------
+arrow_schema(table: Table) -> pa.Schema
+    Builds the Arrow schema of a table, including key metadata.
+
+export_snapshot(engine: Engine, directory: Path, ...) -> dict
+    Writes every table to columnar files and returns the manifest.
+
+import_snapshot(engine: Engine, directory: Path, batch_size: int) -> Dict[str, int]
+    Bulk-loads a snapshot into a database with an empty Chinook schema.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+from kink import di
+from sqlalchemy import Engine, Table, select
+from sqlalchemy.orm import DeclarativeBase
+
+from .commit_samples import insert_frame
+from .partitioning import GRANULARITIES, period_start
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pc = pq = None
+
+
+FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+
+COMPRESSIONS = {
+    "parquet": (None, "snappy", "gzip", "zstd", "lz4", "brotli"),
+    "feather": (None, "lz4", "zstd")
+}
+
+MANIFEST = "manifest.json"
+
+# Tables describing the database itself rather than its data, which the target
+# database maintains on its own.
+EXCLUDED_TABLES = ("schema_version",)
+
+_PERIOD_LABELS = {"year": "%Y", "month": "%Y-%m"}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "Columnar export requires pyarrow. Install it with `pip install chinook[export]`.")
+
+
+def _arrow_type(column) -> "pa.DataType":
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pa.string()
+
+    if python_type is bool:
+        return pa.bool_()
+
+    if python_type is int:
+        return pa.int64()
+
+    if python_type is float:
+        return pa.float64()
+
+    if python_type is Decimal:
+        return pa.decimal128(38, getattr(column.type, "scale", None) or 10)
+
+    if python_type is datetime:
+        return pa.timestamp("us")
+
+    if python_type is date:
+        return pa.date32()
+
+    if python_type is bytes:
+        return pa.binary()
+
+    return pa.string()
+
+
+def arrow_schema(table: Table) -> "pa.Schema":
+    """
+    Build the Arrow schema of a table.
+
+    Each field carries `primary_key` and, where applicable, `foreign_key`
+    (`table.column`) metadata. The schema carries the table name.
+
+    Parameters
+    ----------
+    table : Table
+        Table to describe.
+
+    Returns
+    -------
+    pa.Schema
+        Arrow schema with one field per column, in column order.
+    """
+    _require_pyarrow()
+    fields = []
+
+    for column in table.columns:
+        metadata = {"primary_key": str(column.primary_key).lower()}
+
+        for foreign_key in column.foreign_keys:
+            metadata["foreign_key"] = foreign_key.target_fullname
+
+        fields.append(pa.field(column.name, _arrow_type(column), column.nullable, metadata))
+
+    return pa.schema(fields, metadata={"table": table.name})
+
+
+def _partition(value: Optional[datetime], granularity: str) -> str:
+    if value is None:
+        return f"{granularity}=null"
+
+    label = period_start(value, granularity).strftime(_PERIOD_LABELS[granularity])
+    return f"{granularity}={label}"
+
+
+def _describe(table: Table) -> dict:
+    return {
+        "name": table.name,
+        "primary_key": [column.name for column in table.primary_key.columns],
+        "foreign_keys": [
+            {"column": foreign_key.parent.name, "references": foreign_key.target_fullname}
+            for foreign_key in table.foreign_keys
+        ]
+    }
+
+
+class _Writers:
+    def __init__(self, directory: Path, table: Table, schema: "pa.Schema", file_format: str,
+                 compression: Optional[str]):
+        self.directory = directory
+        self.table = table
+        self.schema = schema
+        self.file_format = file_format
+        self.compression = compression
+        self.open = {}
+
+    def get(self, partition: Optional[str]):
+        if partition not in self.open:
+            name = f"{self.table.name}{FORMATS[self.file_format]}"
+
+            if partition is not None:
+                name = f"{self.table.name}/{partition}/part-0{FORMATS[self.file_format]}"
+
+            path = self.directory / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            if self.file_format == "parquet":
+                writer = pq.ParquetWriter(path, self.schema, compression=self.compression or "none")
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                writer = pa.ipc.new_file(path, self.schema, options=options)
+
+            self.open[partition] = (name, writer, [0])
+
+        return self.open[partition]
+
+    def close(self) -> Dict[str, int]:
+        files = {}
+
+        for name, writer, rows in self.open.values():
+            writer.close()
+            files[name] = rows[0]
+
+        return files
+
+
+def _batches(connection, table: Table, schema: "pa.Schema",
+             chunk_size: int) -> Iterator["pa.RecordBatch"]:
+    result = connection.execution_options(stream_results=True, yield_per=chunk_size) \
+        .execute(select(table))
+
+    for rows in result.partitions(chunk_size):
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema
+        )
+
+
+def export_snapshot(engine: Engine, directory: Union[str, Path], file_format: str = "parquet",
+                    compression: Optional[str] = "zstd", chunk_size: int = 50_000,
+                    partition_by: Optional[Dict[str, str]] = None,
+                    granularity: str = "year") -> dict:
+    """
+    Export every table of a database to columnar files.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the database to export.
+
+    directory : str or Path
+        Directory to write the snapshot to. It is created if missing.
+
+    file_format : str
+        `parquet` or `feather` (Arrow IPC file format).
+
+    compression : str, optional
+        Compression codec, such as `zstd`, `lz4` or `snappy`, or `None`.
+
+    chunk_size : int
+        Rows fetched from the database and written per batch.
+
+    partition_by : Dict[str, str], optional
+        Maps table names to a date column to split the table by, for example
+        `{"invoices": "invoice_date"}`. Partitions are written to
+        `<table>/<granularity>=<period>/`, and rows without a date to
+        `<table>/<granularity>=null/`.
+
+    granularity : str
+        Partition period, `year` or `month`.
+
+    Returns
+    -------
+    dict
+        The manifest written to `manifest.json`.
+
+    Raises
+    ------
+    ValueError
+        If the format, compression or granularity is not supported.
+    """
+    _require_pyarrow()
+
+    if file_format not in FORMATS:
+        raise ValueError(f"`file_format` must be one of {tuple(FORMATS)}.")
+
+    if compression not in COMPRESSIONS[file_format]:
+        raise ValueError(f"`compression` must be one of {COMPRESSIONS[file_format]}.")
+
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"`granularity` must be one of {GRANULARITIES}.")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    partition_by = partition_by or {}
+    tables = []
+
+    with engine.connect() as connection:
+        for table in di[DeclarativeBase].metadata.sorted_tables:
+            if table.name in EXCLUDED_TABLES:
+                continue
+
+            schema = arrow_schema(table)
+            writers = _Writers(directory, table, schema, file_format, compression)
+            column = partition_by.get(table.name)
+
+            for batch in _batches(connection, table, schema, chunk_size):
+                if column is None:
+                    _, writer, rows = writers.get(None)
+                    writer.write_batch(batch)
+                    rows[0] += batch.num_rows
+                    continue
+
+                labels = pa.array([
+                    _partition(value, granularity) for value in batch.column(column).to_pylist()
+                ])
+
+                for label in pc.unique(labels).to_pylist():
+                    part = batch.filter(pc.equal(labels, label))
+                    _, writer, rows = writers.get(label)
+                    writer.write_batch(part)
+                    rows[0] += part.num_rows
+
+            if column is None:
+                writers.get(None)
+
+            files = writers.close()
+            tables.append({
+                **_describe(table),
+                "files": sorted(files),
+                "rows": sum(files.values()),
+                "partition_by": column
+            })
+
+    manifest = {
+        "format": file_format,
+        "compression": compression,
+        "granularity": granularity,
+        "tables": tables
+    }
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+    return manifest
+
+
+def _read_batches(path: Path, file_format: str) -> Iterator["pa.RecordBatch"]:
+    if file_format == "parquet":
+        yield from pq.ParquetFile(path).iter_batches()
+        return
+
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+
+
+def import_snapshot(engine: Engine, directory: Union[str, Path],
+                    batch_size: int = 10_000) -> Dict[str, int]:
+    """
+    Bulk-load a snapshot written by `export_snapshot`.
+
+    Tables are loaded in the order of the manifest, which follows foreign key
+    dependencies, in a single transaction.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of a database whose Chinook schema exists and is empty.
+
+    directory : str or Path
+        Directory holding the snapshot and its `manifest.json`.
+
+    batch_size : int
+        Rows per `executemany` batch.
+
+    Returns
+    -------
+    Dict[str, int]
+        Rows loaded per table.
+    """
+    _require_pyarrow()
+
+    directory = Path(directory)
+    manifest = json.loads((directory / MANIFEST).read_text())
+    metadata = di[DeclarativeBase].metadata
+    counts = {}
+
+    with engine.begin() as connection:
+        for entry in manifest["tables"]:
+            table = metadata.tables[entry["name"]]
+            counts[table.name] = 0
+
+            for name in entry["files"]:
+                for batch in _read_batches(directory / name, manifest["format"]):
+                    frame = batch.to_pandas(timestamp_as_object=True)
+                    insert_frame(connection, table, frame, batch_size)
+                    counts[table.name] += batch.num_rows
+
+    return counts
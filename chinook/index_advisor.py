@@ -0,0 +1,441 @@
+"""
+index_advisor.py
+
+Captures query plans for a workload and proposes secondary indexes.
+
+Each statement of the workload is explained with `EXPLAIN QUERY PLAN` on SQLite or
+`EXPLAIN ANALYZE` on PostgreSQL. Plans are scanned for full table scans and temporary
+sorts, and for every flagged statement built with SQLAlchemy the advisor derives a
+composite index from its equality predicates, range predicates and sort keys,
+extending it to a covering index when the selected columns are few.
+
+Classes
+-------
+QueryPlan
+    Captured plan of a single statement and the problems found in it.
+
+IndexProposal
+    A proposed index and the statement that motivated it.
+
+AdvisorReport
+    Plans and deduplicated proposals for a whole workload.
+
+IndexAdvisor
+    Runs a workload against an engine and builds an `AdvisorReport`.
+
+Functions
+---------
+representative_workload() -> List[Select]
+    Returns statements modelled on common Chinook reporting and lookup queries.
+
+explain(connection: Connection, statement) -> QueryPlan
+    Captures the plan of a single statement.
+
+propose(statement: Select, plan: QueryPlan) -> List[IndexProposal]
+    Derives index proposals for a flagged statement.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Column, Connection, Engine, Select, inspect, select
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, ClauseElement
+from sqlalchemy.sql.visitors import iterate
+
+from .models import Customers, Invoices, Tracks
+from .models.index_sets import IndexSpec, create_indexes
+
+
+EQUALITY_OPERATORS = (operators.eq, operators.in_op)
+RANGE_OPERATORS = (
+    operators.gt,
+    operators.ge,
+    operators.lt,
+    operators.le,
+    operators.between_op,
+    operators.like_op
+)
+
+MAX_COVERING_COLUMNS = 5
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+WorkloadItem = Union[Select, str, Tuple[str, Union[dict, tuple]]]
+
+
+@dataclass
+class QueryPlan:
+    """
+    Captured plan of a single statement.
+
+    Attributes
+    ----------
+    sql : str
+        The explained SQL.
+
+    lines : List[str]
+        Plan output, one entry per plan node.
+
+    full_scans : List[str]
+        Tables read with a full scan.
+
+    temp_sorts : int
+        Number of temporary sorts (`USE TEMP B-TREE` or `Sort` nodes).
+    """
+
+    sql: str
+    lines: List[str]
+    full_scans: List[str] = field(default_factory=list)
+    temp_sorts: int = 0
+
+    @property
+    def flagged(self) -> bool:
+        """Returns whether the plan contains a full scan or a temporary sort."""
+        return bool(self.full_scans or self.temp_sorts)
+
+
+@dataclass
+class IndexProposal:
+    """
+    A proposed secondary index.
+
+    Attributes
+    ----------
+    table : str
+        Table to index.
+
+    columns : Tuple[str, ...]
+        Key columns: equality predicates, then one range predicate or the sort keys.
+
+    covering : bool
+        Whether the selected columns were appended so the index covers the query.
+        Primary key columns are never appended since secondary indexes carry them.
+
+    reason : str
+        The plan problem that motivated the proposal.
+    """
+
+    table: str
+    columns: Tuple[str, ...]
+    covering: bool = False
+    reason: str = ""
+
+    def to_spec(self) -> IndexSpec:
+        """Returns the proposal as an `IndexSpec`."""
+        return IndexSpec(self.table, self.columns)
+
+
+@dataclass
+class AdvisorReport:
+    """
+    Result of running a workload through the `IndexAdvisor`.
+
+    Attributes
+    ----------
+    plans : List[QueryPlan]
+        Captured plan for each statement in the workload.
+
+    proposals : List[IndexProposal]
+        Deduplicated index proposals.
+    """
+
+    plans: List[QueryPlan]
+    proposals: List[IndexProposal]
+
+    @property
+    def flagged(self) -> List[QueryPlan]:
+        """Returns the plans that contain a full scan or a temporary sort."""
+        return [plan for plan in self.plans if plan.flagged]
+
+    def format(self) -> str:
+        """Returns a plain-text summary of flagged plans and proposals."""
+        lines = [f"{len(self.flagged)} of {len(self.plans)} statements flagged"]
+
+        for plan in self.flagged:
+            problems = [f"full scan of {table}" for table in plan.full_scans]
+            problems += ["temporary sort"] * plan.temp_sorts
+            lines.append(f"  - {', '.join(problems)}: {' '.join(plan.sql.split())[:100]}")
+
+        lines.append(f"{len(self.proposals)} index proposals")
+
+        for proposal in self.proposals:
+            kind = "covering " if proposal.covering else ""
+            lines.append(
+                f"  - {kind}{proposal.table}({', '.join(proposal.columns)}) "
+                f"for {proposal.reason}")
+
+        return "\n".join(lines)
+
+    def apply(self, engine: Engine) -> List[str]:
+        """
+        Create every proposed index.
+
+        Parameters
+        ----------
+        engine : Engine
+            Engine connected to the target database.
+
+        Returns
+        -------
+        List[str]
+            Names of the indexes that were created.
+        """
+        return create_indexes(engine, tuple(p.to_spec() for p in self.proposals))
+
+
+def representative_workload() -> List[Select]:
+    """
+    Build a workload modelled on common Chinook reporting and lookup queries.
+
+    Returns
+    -------
+    List[Select]
+        Statements filtering or sorting on columns the models do not index.
+    """
+    return [
+        select(Invoices.invoice_id, Invoices.total)
+        .where(Invoices.billing_country == "USA",
+               Invoices.invoice_date >= datetime(2010, 1, 1))
+        .order_by(Invoices.invoice_date),
+        select(Customers.customer_id, Customers.last_name)
+        .where(Customers.country == "Brazil")
+        .order_by(Customers.last_name),
+        select(Customers).where(Customers.email == "luisg@embraer.com.br"),
+        select(Tracks).where(Tracks.name == "Balls to the Wall"),
+        select(Tracks.track_id, Tracks.name)
+        .where(Tracks.unit_price >= 1.5)
+        .order_by(Tracks.unit_price),
+        select(Invoices.invoice_id)
+        .where(Invoices.invoice_date >= datetime(2011, 1, 1),
+               Invoices.invoice_date < datetime(2011, 2, 1))
+    ]
+
+
+def explain(connection: Connection, statement: WorkloadItem) -> QueryPlan:
+    """
+    Capture the plan of a statement.
+
+    Parameters
+    ----------
+    connection : Connection
+        Connection to explain the statement on.
+
+    statement : Select, str or Tuple[str, params]
+        A SQLAlchemy statement, raw SQL, or raw SQL with its driver parameters as
+        recorded by the instrumentation layer.
+
+    Returns
+    -------
+    QueryPlan
+        The captured plan with its full scans and temporary sorts.
+
+    Raises
+    ------
+    NotImplementedError
+        If the dialect is neither SQLite nor PostgreSQL.
+    """
+    dialect = connection.dialect.name
+    params: Union[dict, tuple] = ()
+
+    if isinstance(statement, ClauseElement):
+        sql = str(statement.compile(dialect=connection.dialect,
+                                    compile_kwargs={"literal_binds": True}))
+    elif isinstance(statement, tuple):
+        sql, params = statement
+    else:
+        sql = statement
+
+    if dialect == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all()
+        lines = [row[-1] for row in rows]
+        plan = QueryPlan(sql, lines)
+
+        for line in lines:
+            match = _SQLITE_SCAN.match(line)
+
+            if match:
+                plan.full_scans.append(match.group(1))
+            elif line.startswith("USE TEMP B-TREE"):
+                plan.temp_sorts += 1
+
+        return plan
+
+    if dialect == "postgresql":
+        rows = connection.exec_driver_sql(f"EXPLAIN ANALYZE {sql}", params).all()
+        lines = [row[0] for row in rows]
+        plan = QueryPlan(sql, lines)
+
+        for line in lines:
+            match = _POSTGRES_SCAN.search(line)
+
+            if match:
+                plan.full_scans.append(match.group(1))
+            elif line.strip().lstrip("-> ").startswith("Sort "):
+                plan.temp_sorts += 1
+
+        return plan
+
+    raise NotImplementedError(f"Plan capture is not supported for `{dialect}`.")
+
+
+def _predicate_columns(statement: Select) -> Tuple[List[Column], List[Column]]:
+    equality: List[Column] = []
+    ranges: List[Column] = []
+
+    if statement.whereclause is None:
+        return equality, ranges
+
+    for element in iterate(statement.whereclause):
+        if not isinstance(element, BinaryExpression):
+            continue
+
+        left, right = element.left, element.right
+
+        if isinstance(left, Column) == isinstance(right, Column):
+            continue
+
+        column = left if isinstance(left, Column) else right
+
+        if element.operator in EQUALITY_OPERATORS and column not in equality:
+            equality.append(column)
+        elif element.operator in RANGE_OPERATORS and column not in ranges:
+            ranges.append(column)
+
+    return equality, ranges
+
+
+def _order_columns(statement: Select) -> List[Column]:
+    columns = []
+
+    for clause in statement._order_by_clauses:
+        for element in iterate(clause):
+            if isinstance(element, Column) and element not in columns:
+                columns.append(element)
+
+    return columns
+
+
+def propose(statement: Select, plan: QueryPlan) -> List[IndexProposal]:
+    """
+    Derive index proposals for a flagged statement.
+
+    Parameters
+    ----------
+    statement : Select
+        The SQLAlchemy statement that was explained.
+
+    plan : QueryPlan
+        Its captured plan.
+
+    Returns
+    -------
+    List[IndexProposal]
+        One proposal per table that the plan scans or sorts.
+    """
+    equality, ranges = _predicate_columns(statement)
+    order = _order_columns(statement)
+    tables = set(plan.full_scans)
+
+    if plan.temp_sorts:
+        tables.update(column.table.name for column in order)
+
+    proposals = []
+
+    for table in sorted(tables):
+        eq = [c.name for c in equality if c.table.name == table]
+        rng = [c.name for c in ranges if c.table.name == table]
+        srt = [c.name for c in order if c.table.name == table]
+
+        key = list(eq)
+        key += rng[:1] if rng and (not srt or srt[0] != rng[0]) else srt
+
+        if not key:
+            continue
+
+        selected = [
+            c.name for c in statement.selected_columns
+            if isinstance(c, Column) and c.table.name == table and not c.primary_key
+        ]
+        extra = [name for name in selected if name not in key]
+        covering = 0 < len(key) + len(extra) <= MAX_COVERING_COLUMNS
+
+        if covering:
+            key += extra
+
+        reason = "full scan" if table in plan.full_scans else "temporary sort"
+        proposals.append(IndexProposal(table, tuple(key), covering, reason))
+
+    return proposals
+
+
+class IndexAdvisor:
+    """
+    Runs a workload, captures its plans and proposes indexes.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine connected to a seeded Chinook database.
+
+    Examples
+    --------
+    >>> report = IndexAdvisor(get_engine()).run()
+    >>> print(report.format())
+    >>> report.apply(get_engine())
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def _covered(self, proposal: IndexProposal, existing: Dict[str, List[Sequence[str]]]) -> bool:
+        for columns in existing.get(proposal.table, []):
+            if tuple(columns[:len(proposal.columns)]) == proposal.columns:
+                return True
+
+        return False
+
+    def run(self, workload: Optional[Iterable[WorkloadItem]] = None) -> AdvisorReport:
+        """
+        Explain every statement of a workload and collect index proposals.
+
+        Parameters
+        ----------
+        workload : Iterable, optional
+            Statements to explain. Defaults to `representative_workload()`. Raw SQL
+            statements are explained and flagged but yield no proposals.
+
+        Returns
+        -------
+        AdvisorReport
+            Captured plans and deduplicated proposals.
+        """
+        workload = representative_workload() if workload is None else workload
+        plans: List[QueryPlan] = []
+        proposals: List[IndexProposal] = []
+
+        with self.engine.connect() as connection:
+            inspector = inspect(connection)
+            existing = {
+                table: [index["column_names"] for index in inspector.get_indexes(table)]
+                for table in inspector.get_table_names()
+            }
+
+            for statement in workload:
+                plan = explain(connection, statement)
+                plans.append(plan)
+
+                if not plan.flagged or not isinstance(statement, Select):
+                    continue
+
+                for proposal in propose(statement, plan):
+                    if self._covered(proposal, existing):
+                        continue
+
+                    existing.setdefault(proposal.table, []).append(proposal.columns)
+                    proposals.append(proposal)
+
+        return AdvisorReport(plans, proposals)
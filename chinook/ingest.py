@@ -0,0 +1,428 @@
+"""
+ingest.py
+
+Defines the write path for high-volume invoice ingestion.
+
+`InvoiceIngestor` writes batches of invoice headers and their lines in one transaction
+with batched Core `executemany` calls:
+
+- Primary keys are pre-assigned from blocks reserved in the `id_blocks` table, so no
+  per-row autoincrement round trip or `RETURNING` is needed to link lines to headers.
+- Line prices are validated against a cached `track_id -> unit_price` map, and lines
+  without a price are priced from it.
+- Invoice totals are computed with a single vectorized pass over integer cents.
+
+Identifiers reserved by a batch that fails to commit are not reused, so sequences may
+have gaps. Every writer of `invoices` and `invoice_items` must allocate keys through
+`IdAllocator` once it is in use, or its rows may collide with reserved blocks.
+
+Classes
+-------
+IdAllocator
+    Hands out primary keys from blocks reserved in the `id_blocks` table.
+
+PriceCache
+    Cached map of track prices in cents.
+
+InvalidInvoiceLines
+    Raised when lines reference unknown tracks or carry wrong prices or quantities.
+
+IngestReport
+    Counts and throughput of an ingestion call.
+
+InvoiceIngestor
+    Validates, prices and inserts batches of invoices.
+
+Functions
+---------
+ingest_invoices(engine: Engine, invoices: Iterable[Mapping]) -> IngestReport
+    Ingests invoices with an ingestor cached per engine.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, Engine, func, insert, select, update
+
+from .commit_samples import insert_frame
+from .models import IdBlocks, InvoiceItems, Invoices, Tracks
+from .models.types import cents
+
+
+class IdAllocator:
+    """
+    Hands out primary keys in blocks.
+
+    A block of `block_size` identifiers is reserved in one short transaction that
+    advances the sequence's row in `id_blocks`. Identifiers are then handed out from
+    memory until the block runs out. A sequence without a row starts after the
+    column's current maximum.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the database holding the sequence.
+
+    column : Column
+        Primary key column the identifiers are for.
+
+    block_size : int
+        Minimum number of identifiers reserved at once.
+    """
+
+    def __init__(self, engine: Engine, column: Column, block_size: int = 1000):
+        if block_size < 1:
+            raise ValueError("`block_size` must be at least 1.")
+
+        self.engine = engine
+        self.column = column
+        self.block_size = block_size
+        self.name = f"{column.table.name}.{column.name}"
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+        # `init_db` and `ensure_schema` create the table; databases created before it
+        # get it here once, rather than with a catalog query per reserved block.
+        IdBlocks.__table__.create(engine, checkfirst=True)
+
+    def _reserve(self, size: int) -> int:
+        with self.engine.begin() as connection:
+            start = connection.execute(
+                select(IdBlocks.next_value)
+                .where(IdBlocks.name == self.name)
+                .with_for_update()
+            ).scalar()
+
+            if start is None:
+                start = (connection.execute(select(func.max(self.column))).scalar() or 0) + 1
+                connection.execute(insert(IdBlocks).values(name=self.name, next_value=start + size))
+            else:
+                connection.execute(
+                    update(IdBlocks)
+                    .where(IdBlocks.name == self.name)
+                    .values(next_value=start + size)
+                )
+
+        return start
+
+    def allocate(self, count: int) -> np.ndarray:
+        """
+        Allocate identifiers.
+
+        Parameters
+        ----------
+        count : int
+            Number of identifiers needed.
+
+        Returns
+        -------
+        np.ndarray
+            `count` unique, increasing identifiers.
+        """
+        with self._lock:
+            taken = min(count, self._end - self._next)
+            blocks = [np.arange(self._next, self._next + taken, dtype=np.int64)]
+            self._next += taken
+            remaining = count - taken
+
+            if remaining:
+                size = max(self.block_size, remaining)
+                self._next = self._reserve(size)
+                self._end = self._next + size
+                blocks.append(np.arange(self._next, self._next + remaining, dtype=np.int64))
+                self._next += remaining
+
+            return np.concatenate(blocks)
+
+
+class PriceCache:
+    """
+    Cached map of track prices in integer cents.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the database holding `tracks`.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.cents = pd.Series(dtype=np.int64)
+
+    def refresh(self):
+        """Reload every track price from the database."""
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(Tracks.track_id, cents(Tracks.unit_price))).all()
+
+        track_ids, prices = zip(*rows) if rows else ((), ())
+        self.cents = pd.Series(
+            np.asarray(prices, dtype=np.int64),
+            index=np.asarray(track_ids, dtype=np.int64)
+        )
+
+    def lookup(self, track_ids: np.ndarray) -> np.ndarray:
+        """
+        Return the price of each track in cents.
+
+        The cache is reloaded once if any track is unknown, so tracks added since the
+        last refresh are found.
+
+        Parameters
+        ----------
+        track_ids : np.ndarray
+            Track identifiers.
+
+        Returns
+        -------
+        np.ndarray
+            Price of each track in cents, `NaN` for tracks that do not exist.
+        """
+        prices = self.cents.reindex(track_ids).to_numpy(dtype=np.float64)
+
+        if np.isnan(prices).any():
+            self.refresh()
+            prices = self.cents.reindex(track_ids).to_numpy(dtype=np.float64)
+
+        return prices
+
+
+class InvalidInvoiceLines(ValueError):
+    """
+    Raised when invoice lines fail validation. Nothing of the batch is written.
+
+    Attributes
+    ----------
+    lines : pd.DataFrame
+        The offending lines.
+    """
+
+    def __init__(self, message: str, lines: pd.DataFrame):
+        super().__init__(f"{message}: {len(lines)} line(s), first {lines.head(3).to_dict('records')}")
+        self.lines = lines
+
+
+@dataclass
+class IngestReport:
+    """
+    Result of an ingestion call.
+
+    Attributes
+    ----------
+    invoices : int
+        Number of invoices written.
+
+    lines : int
+        Number of invoice lines written.
+
+    seconds : float
+        Wall time spent validating and writing.
+
+    invoice_ids : List[int]
+        Identifiers assigned to the invoices, in input order.
+    """
+
+    invoices: int = 0
+    lines: int = 0
+    seconds: float = 0.0
+    invoice_ids: List[int] = field(default_factory=list)
+
+    @property
+    def invoices_per_second(self) -> float:
+        """Returns the ingestion throughput in invoices per second."""
+        return self.invoices / self.seconds if self.seconds else 0.0
+
+
+class InvoiceIngestor:
+    """
+    Validates, prices and writes batches of invoices.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the target database.
+
+    block_size : int
+        Minimum number of identifiers reserved at once per table.
+
+    batch_size : int
+        Rows per `executemany` call.
+
+    Examples
+    --------
+    >>> ingestor = InvoiceIngestor(engine)
+    >>> report = ingestor.ingest([{
+    ...     "customer_id": 1,
+    ...     "invoice_date": datetime(2025, 1, 1),
+    ...     "billing_country": "Germany",
+    ...     "lines": [{"track_id": 1, "quantity": 2}, {"track_id": 2}]
+    ... }])
+    >>> report.invoices_per_second
+    """
+
+    def __init__(self, engine: Engine, block_size: int = 1000, batch_size: int = 10_000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.prices = PriceCache(engine)
+        self.invoice_ids = IdAllocator(engine, Invoices.__table__.c.invoice_id, block_size)
+        self.line_ids = IdAllocator(engine, InvoiceItems.__table__.c.invoice_line_id, block_size)
+
+    def ingest(self, invoices: Iterable[Mapping[str, Any]]) -> IngestReport:
+        """
+        Ingest invoices given as header mappings with nested lines.
+
+        Parameters
+        ----------
+        invoices : Iterable[Mapping[str, Any]]
+            Invoice headers with `Invoices` columns (at least `customer_id` and
+            `invoice_date`) and a `lines` list of mappings with `track_id` and,
+            optionally, `quantity` (default 1) and `unit_price`.
+
+        Returns
+        -------
+        IngestReport
+            Counts, throughput and the assigned invoice identifiers.
+        """
+        headers, lines = [], []
+
+        for position, invoice in enumerate(invoices):
+            headers.append({key: value for key, value in invoice.items() if key != "lines"})
+            lines.extend({**line, "invoice": position} for line in invoice.get("lines", ()))
+
+        return self.ingest_frames(pd.DataFrame(headers), pd.DataFrame(lines))
+
+    def ingest_frames(self, headers: pd.DataFrame, lines: pd.DataFrame) -> IngestReport:
+        """
+        Ingest invoices given as a header DataFrame and a line DataFrame.
+
+        Parameters
+        ----------
+        headers : pd.DataFrame
+            One row per invoice with `Invoices` columns, at least `customer_id` and
+            `invoice_date`. Any `invoice_id` or `total` column is overwritten.
+
+        lines : pd.DataFrame
+            One row per line with `track_id`, an `invoice` column holding the
+            position of its header in `headers` and, optionally, `quantity` and
+            `unit_price`.
+
+        Returns
+        -------
+        IngestReport
+            Counts, throughput and the assigned invoice identifiers. Empty for an
+            empty batch, which writes nothing.
+
+        Raises
+        ------
+        InvalidInvoiceLines
+            If a line references an unknown track, carries a price different from the
+            catalog price, or has a quantity below 1.
+        """
+        started = perf_counter()
+
+        if headers.empty and lines.empty:
+            return IngestReport(seconds=perf_counter() - started)
+
+        missing = {"customer_id", "invoice_date"} - set(headers.columns)
+
+        if missing:
+            raise ValueError(f"Invoice headers are missing columns: {sorted(missing)}.")
+
+        headers = headers.reset_index(drop=True)
+        lines = lines.reset_index(drop=True)
+
+        if lines.empty:
+            lines = pd.DataFrame({"invoice": [], "track_id": []}, dtype=np.int64)
+
+        positions = lines["invoice"].to_numpy(dtype=np.int64)
+
+        if ((positions < 0) | (positions >= len(headers))).any():
+            raise ValueError("Invoice line positions must refer to rows of `headers`.")
+
+        unit_cents = self.prices.lookup(lines["track_id"].to_numpy(dtype=np.int64))
+        unknown = np.isnan(unit_cents)
+
+        if unknown.any():
+            raise InvalidInvoiceLines("Unknown tracks", lines[unknown])
+
+        unit_cents = unit_cents.astype(np.int64)
+
+        if "unit_price" in lines:
+            given = lines["unit_price"].to_numpy(dtype=np.float64)
+            wrong = ~np.isnan(given) & (np.rint(given * 100) != unit_cents)
+
+            if wrong.any():
+                raise InvalidInvoiceLines("Prices differ from the catalog", lines[wrong])
+
+        quantity = lines["quantity"].fillna(1).to_numpy(dtype=np.int64) \
+            if "quantity" in lines else np.ones(len(lines), dtype=np.int64)
+
+        if (quantity < 1).any():
+            raise InvalidInvoiceLines("Quantities must be at least 1", lines[quantity < 1])
+
+        totals = np.zeros(len(headers), dtype=np.int64)
+        np.add.at(totals, positions, unit_cents * quantity)
+
+        invoice_ids = self.invoice_ids.allocate(len(headers))
+
+        headers = headers.assign(invoice_id=invoice_ids, total=totals / 100)
+        lines = lines.assign(
+            invoice_line_id=self.line_ids.allocate(len(lines)),
+            invoice_id=invoice_ids[positions],
+            unit_price=unit_cents / 100,
+            quantity=quantity
+        )
+
+        with self.engine.begin() as connection:
+            insert_frame(connection, Invoices.__table__, headers, self.batch_size)
+            insert_frame(connection, InvoiceItems.__table__, lines, self.batch_size)
+
+        return IngestReport(
+            invoices=len(headers),
+            lines=len(lines),
+            seconds=perf_counter() - started,
+            invoice_ids=invoice_ids.tolist()
+        )
+
+
+# Engine attribute holding the engine's cached ingestor. The ingestor references the
+# engine in turn, and the cycle is collected with the engine.
+_INGESTOR_ATTRIBUTE = "_chinook_ingestor"
+
+
+def ingest_invoices(engine: Engine, invoices: Iterable[Mapping[str, Any]],
+                    ingestor: Optional[InvoiceIngestor] = None) -> IngestReport:
+    """
+    Ingest a batch of invoices.
+
+    Reuses one `InvoiceIngestor` per engine, so reserved id blocks and the price map
+    carry over between calls.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the target database.
+
+    invoices : Iterable[Mapping[str, Any]]
+        Invoice headers with nested `lines`, as accepted by `InvoiceIngestor.ingest`.
+
+    ingestor : InvoiceIngestor, optional
+        Ingestor to use instead of the cached one.
+
+    Returns
+    -------
+    IngestReport
+        Counts, throughput and the assigned invoice identifiers.
+    """
+    if ingestor is None:
+        ingestor = getattr(engine, _INGESTOR_ATTRIBUTE, None)
+
+        if ingestor is None:
+            ingestor = InvoiceIngestor(engine)
+            setattr(engine, _INGESTOR_ATTRIBUTE, ingestor)
+
+    return ingestor.ingest(invoices)
@@ -0,0 +1,468 @@
+"""
+instrumentation.py
+
+Defines query instrumentation for SQLAlchemy engines.
+
+`QueryInstrumentation` listens to the `before_cursor_execute` and
+`after_cursor_execute` engine events and records, per normalized statement, a latency
+histogram and the number of rows reported by the driver, which `sqlite3` only reports
+for DML, not for `SELECT`. It also times how long opening each new DBAPI connection
+takes, from the dialect's `do_connect` event to the pool's `connect` event, and
+detects statements repeated within a request scope (the N+1 pattern). Pooled
+connections are reused without an event marking the start of a wait for a free one,
+so waits on an exhausted pool are not measured.
+Everything collected can be exported with `snapshot()` as plain dictionaries.
+
+If an instance is registered in the `kink` container, `create_db_engine` attaches it
+to every engine it creates.
+
+Classes
+-------
+LatencyHistogram
+    Fixed-bucket latency histogram in milliseconds.
+
+StatementStats
+    Latency and row statistics for one normalized statement.
+
+RequestScope
+    Statement counts collected within a single request.
+
+QueryBudgetExceeded
+    Raised when a query budget is exceeded.
+
+QueryInstrumentation
+    Attaches to engines and collects the statistics above.
+
+Functions
+---------
+normalize_statement(statement: str) -> str
+    Replaces literals and parameter lists so equivalent statements share a key.
+"""
+
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import Engine, event
+
+
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+_NAMED_PARAMETER = re.compile(r"(?:%\(\w+\)s|:\w+|\$\d+|%s)")
+_WHITESPACE = re.compile(r"\s+")
+
+_current_scope: ContextVar[Optional["RequestScope"]] = ContextVar(
+    "chinook_request_scope", default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Normalize a SQL statement for aggregation.
+
+    Literals and driver parameters become `?`, parameter lists and multi-row `VALUES`
+    collapse to a single entry, and whitespace is squeezed.
+
+    Parameters
+    ----------
+    statement : str
+        SQL as sent to the driver.
+
+    Returns
+    -------
+    str
+        Normalized statement.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NAMED_PARAMETER.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PARAMETER_LIST.sub("(?, ...)", statement)
+    statement = _VALUES_ROWS.sub(r"\1, ...", statement)
+
+    return statement
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of latencies in milliseconds.
+
+    Attributes
+    ----------
+    counts : List[int]
+        Observation count per bucket of `BUCKETS_MS`.
+
+    count : int
+        Total number of observations.
+
+    total : float
+        Sum of all observations.
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, milliseconds: float):
+        """Record a single observation."""
+        for position, bound in enumerate(BUCKETS_MS):
+            if milliseconds <= bound:
+                self.counts[position] += 1
+                break
+
+        self.count += 1
+        self.total += milliseconds
+        self.min = min(self.min, milliseconds)
+        self.max = max(self.max, milliseconds)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket containing it.
+
+        Parameters
+        ----------
+        q : float
+            Quantile between 0 and 1.
+
+        Returns
+        -------
+        float
+            Estimated latency in milliseconds, capped at the observed maximum.
+        """
+        if not self.count:
+            return 0.0
+
+        target = q * self.count
+        seen = 0
+
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+
+            if seen >= target:
+                return min(bound, self.max)
+
+        return self.max
+
+    def as_dict(self) -> dict:
+        """Returns the histogram as a JSON-serializable dictionary."""
+        return {
+            "count": self.count,
+            "total_ms": self.total,
+            "min_ms": self.min if self.count else 0.0,
+            "max_ms": self.max,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(BUCKETS_MS, self.counts)
+            }
+        }
+
+
+class StatementStats:
+    """
+    Statistics collected for one normalized statement.
+
+    Attributes
+    ----------
+    statement : str
+        The normalized statement.
+
+    latency : LatencyHistogram
+        Execution latencies.
+
+    rows : int
+        Total rows reported by the driver. Drivers that do not report a row count
+        for `SELECT` (such as `sqlite3`) only contribute DML row counts.
+
+    max_rows : int
+        Largest row count reported for a single execution.
+    """
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.latency = LatencyHistogram()
+        self.rows = 0
+        self.max_rows = 0
+
+    def as_dict(self) -> dict:
+        """Returns the statistics as a JSON-serializable dictionary."""
+        return {
+            "latency": self.latency.as_dict(),
+            "rows": self.rows,
+            "max_rows": self.max_rows
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block of code executes more statements than its budget allows."""
+
+
+class RequestScope:
+    """
+    Statement counts collected within a single request.
+
+    Attributes
+    ----------
+    name : str
+        Name of the request.
+
+    queries : int
+        Number of statements executed within the scope.
+
+    counts : Dict[str, int]
+        Executions per normalized statement.
+    """
+
+    def __init__(self, name: str, repeat_threshold: int):
+        self.name = name
+        self.repeat_threshold = repeat_threshold
+        self.queries = 0
+        self.counts: Dict[str, int] = {}
+
+    def record(self, statement: str):
+        """Count one execution of a normalized statement."""
+        self.queries += 1
+        self.counts[statement] = self.counts.get(statement, 0) + 1
+
+    @property
+    def repeated(self) -> Dict[str, int]:
+        """Returns statements executed at least `repeat_threshold` times."""
+        return {
+            statement: count for statement, count in self.counts.items()
+            if count >= self.repeat_threshold
+        }
+
+
+class QueryInstrumentation:
+    """
+    Collects per-statement timings, row counts and connect times from engines.
+
+    Parameters
+    ----------
+    repeat_threshold : int
+        Number of executions of the same statement within one request scope after
+        which the statement is reported as repeated.
+
+    Examples
+    --------
+    >>> instrumentation = QueryInstrumentation()
+    >>> instrumentation.attach(get_engine())
+    >>> with instrumentation.request("invoice-page") as scope:
+    ...     render_invoice_page()
+    >>> scope.repeated
+    >>> instrumentation.snapshot()
+    """
+
+    def __init__(self, repeat_threshold: int = 5):
+        self.repeat_threshold = repeat_threshold
+        self.statements: Dict[str, StatementStats] = {}
+        self.connect = LatencyHistogram()
+        self.repeated: Dict[str, int] = {}
+        self._engines: List[Engine] = []
+        self._lock = threading.Lock()
+
+    def attach(self, engine: Engine):
+        """
+        Start collecting statistics from an engine.
+
+        Parameters
+        ----------
+        engine : Engine
+            Engine to instrument. Attaching the same engine twice has no effect.
+        """
+        if engine in self._engines:
+            return
+
+        for name, listener in self._listeners():
+            event.listen(engine, name, listener)
+
+        self._engines.append(engine)
+
+    def detach(self, engine: Optional[Engine] = None):
+        """
+        Stop collecting statistics.
+
+        Parameters
+        ----------
+        engine : Engine, optional
+            Engine to detach. Detaches every attached engine when omitted.
+        """
+        engines = list(self._engines) if engine is None else [engine]
+
+        for target in engines:
+            if target not in self._engines:
+                continue
+
+            for name, listener in self._listeners():
+                event.remove(target, name, listener)
+
+            self._engines.remove(target)
+
+    def reset(self):
+        """Discard every collected statistic."""
+        with self._lock:
+            self.statements.clear()
+            self.connect = LatencyHistogram()
+            self.repeated.clear()
+
+    def _listeners(self):
+        return (
+            ("do_connect", self._do_connect),
+            ("connect", self._connect),
+            ("before_cursor_execute", self._before_cursor_execute),
+            ("after_cursor_execute", self._after_cursor_execute),
+            ("handle_error", self._handle_error)
+        )
+
+    def _do_connect(self, dialect, connection_record, cargs, cparams):
+        connection_record.info["chinook_connect_start"] = perf_counter()
+
+    def _connect(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("chinook_connect_start", None)
+
+        if started is None:
+            return
+
+        elapsed = (perf_counter() - started) * 1000
+
+        with self._lock:
+            self.connect.observe(elapsed)
+
+    def _handle_error(self, context):
+        # A failed statement skips `after_cursor_execute`; drop its start time so
+        # the stack stays balanced for the connection's next statement.
+        if context.connection is None or context.execution_context is None:
+            return
+
+        started = context.connection.info.get("chinook_query_start")
+
+        if started:
+            started.pop()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("chinook_query_start", []).append(perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = (perf_counter() - conn.info["chinook_query_start"].pop()) * 1000
+        normalized = normalize_statement(statement)
+        rows = cursor.rowcount if cursor.rowcount is not None else -1
+
+        with self._lock:
+            stats = self.statements.get(normalized)
+
+            if stats is None:
+                stats = self.statements[normalized] = StatementStats(normalized)
+
+            stats.latency.observe(elapsed)
+
+            if rows >= 0:
+                stats.rows += rows
+                stats.max_rows = max(stats.max_rows, rows)
+
+        scope = _current_scope.get()
+
+        if scope is not None:
+            scope.record(normalized)
+
+    @contextmanager
+    def request(self, name: str = "request") -> Iterator[RequestScope]:
+        """
+        Collect statement counts for a single request.
+
+        Scopes follow the current thread or asyncio task. When the scope ends, every
+        statement executed at least `repeat_threshold` times is added to `repeated`.
+
+        Parameters
+        ----------
+        name : str
+            Name of the request, for reporting.
+
+        Yields
+        ------
+        RequestScope
+            The scope collecting counts for the request.
+        """
+        scope = RequestScope(name, self.repeat_threshold)
+        token = _current_scope.set(scope)
+
+        try:
+            yield scope
+        finally:
+            _current_scope.reset(token)
+
+            with self._lock:
+                for statement, count in scope.repeated.items():
+                    self.repeated[statement] = max(self.repeated.get(statement, 0), count)
+
+    @contextmanager
+    def budget(
+        self,
+        max_queries: Optional[int] = None,
+        max_repeats: Optional[int] = None
+    ) -> Iterator[RequestScope]:
+        """
+        Assert that a block stays within a query budget.
+
+        Parameters
+        ----------
+        max_queries : int, optional
+            Maximum number of statements the block may execute.
+
+        max_repeats : int, optional
+            Maximum number of executions of any single normalized statement.
+
+        Yields
+        ------
+        RequestScope
+            The scope collecting counts for the block.
+
+        Raises
+        ------
+        QueryBudgetExceeded
+            If the block exceeds either limit.
+        """
+        with self.request("budget") as scope:
+            yield scope
+
+        if max_queries is not None and scope.queries > max_queries:
+            raise QueryBudgetExceeded(
+                f"Executed {scope.queries} statements, budget was {max_queries}.")
+
+        if max_repeats is not None:
+            worst = max(scope.counts.items(), key=lambda item: item[1], default=None)
+
+            if worst is not None and worst[1] > max_repeats:
+                raise QueryBudgetExceeded(
+                    f"Executed `{worst[0]}` {worst[1]} times, budget was {max_repeats}.")
+
+    def snapshot(self) -> dict:
+        """
+        Export the collected statistics.
+
+        Returns
+        -------
+        dict
+            JSON-serializable dictionary with `statements`, `connect` and `repeated`
+            entries.
+        """
+        with self._lock:
+            return {
+                "statements": {
+                    statement: stats.as_dict()
+                    for statement, stats in self.statements.items()
+                },
+                "connect": self.connect.as_dict(),
+                "repeated": dict(self.repeated)
+            }
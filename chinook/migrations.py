@@ -0,0 +1,382 @@
+"""
+migrations.py
+
+Defines schema versioning and migrations for the Chinook database.
+
+`ensure_schema` replaces an unconditional `Base.metadata.create_all` at startup. It
+reads the single row of `schema_version` with one query and returns immediately when
+the stored version is the latest migration and the stored fingerprint matches the
+models, so a current database costs one round trip instead of one reflection query
+per table. Otherwise it:
+
+1. creates the schema on an empty database,
+2. runs every registered migration newer than the stored version, in order, where a
+   database with tables but no stored version (one created before versioning) is
+   at version 0,
+3. synchronizes additive model changes (new tables, columns and indexes) and the
+   storage of `Money` columns, derived by comparing the models with the reflected
+   schema, and
+4. stores the latest version and the model fingerprint.
+
+Additive changes need no hand-written migration: changing a model changes the
+fingerprint, which triggers step 3 on the next start. Changes that cannot be derived,
+such as data conversions or column type changes, are registered with `@migration`.
+
+Classes
+-------
+Migration
+    An ordered, hand-written schema migration.
+
+Functions
+---------
+migration(version: int, description: str) -> Callable
+    Registers a migration.
+
+schema_fingerprint(metadata: MetaData, dialect: Dialect) -> str
+    Hashes table, column, index and foreign key definitions and the money storage.
+
+plan_schema_changes(connection: Connection) -> List[ExecutableDDLElement]
+    Derives the DDL adding tables, columns and indexes missing from the database and
+    converting money columns to the configured storage.
+
+ensure_schema(engine: Engine) -> str
+    Brings a database to the latest schema version.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from kink import di
+from sqlalchemy import (
+    Column,
+    Connection,
+    Dialect,
+    Engine,
+    Integer,
+    MetaData,
+    inspect,
+    insert,
+    select,
+    update
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.schema import CreateIndex, CreateTable, DDL, DropIndex, ExecutableDDLElement
+
+from .models import SchemaVersion, TrackDetails
+from .models.types import Money, money_storage
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    A hand-written schema migration.
+
+    Attributes
+    ----------
+    version : int
+        Position of the migration. Migrations run in ascending version order.
+
+    description : str
+        What the migration changes.
+
+    upgrade : Callable[[Connection], None]
+        Applies the migration inside the migration transaction.
+    """
+
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str) -> Callable:
+    """
+    Register a function as a migration.
+
+    Parameters
+    ----------
+    version : int
+        Version of the migration. Must be greater than every registered version.
+
+    description : str
+        What the migration changes.
+
+    Returns
+    -------
+    Callable
+        Decorator registering the function and returning it unchanged.
+    """
+    def register(upgrade: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"Migration {version} must follow {MIGRATIONS[-1].version}.")
+
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        return upgrade
+
+    return register
+
+
+def head_version() -> int:
+    """Returns the version of the latest registered migration."""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def schema_fingerprint(metadata: Optional[MetaData] = None,
+                       dialect: Optional[Dialect] = None) -> str:
+    """
+    Hash the definitions of every table of the models.
+
+    Parameters
+    ----------
+    metadata : MetaData, optional
+        Metadata to hash. Defaults to the metadata of the registered declarative base.
+
+    dialect : Dialect, optional
+        Dialect of the database, whose money storage is part of the schema.
+
+    Returns
+    -------
+    str
+        Hex SHA-256 digest of table, column, index and foreign key definitions and of
+        the money storage.
+    """
+    metadata = metadata or di[DeclarativeBase].metadata
+    parts = [f"money_storage {money_storage(dialect)}"]
+
+    for table in sorted(metadata.tables.values(), key=lambda table: table.name):
+        parts.append(f"table {table.name}")
+        parts.extend(
+            f"column {column.name} {column.type!r} {column.nullable} {column.primary_key}"
+            for column in table.columns
+        )
+        parts.extend(sorted(
+            f"index {index.name} {[column.name for column in index.columns]} {index.unique}"
+            for index in table.indexes
+        ))
+        parts.extend(sorted(
+            f"foreign_key {foreign_key.parent.name} {foreign_key.target_fullname}"
+            for foreign_key in table.foreign_keys
+        ))
+
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def _add_column(connection: Connection, column: Column) -> DDL:
+    definition = column.type.compile(dialect=connection.dialect)
+    default = column.server_default
+
+    if default is not None:
+        definition += f" DEFAULT {default.arg}"
+
+        if not column.nullable:
+            definition += " NOT NULL"
+
+    return DDL(f'ALTER TABLE "{column.table.name}" ADD COLUMN "{column.name}" {definition}')
+
+
+def _convert_money(connection: Connection, column: Column,
+                   indexes: List[str]) -> List[ExecutableDDLElement]:
+    table, name = column.table.name, column.name
+    to_cents = column.type.in_cents(connection.dialect)
+    value = f'round("{name}" * 100)' if to_cents else f'"{name}" / 100.0'
+    definition = column.type.compile(dialect=connection.dialect)
+
+    if connection.dialect.name == "postgresql":
+        return [DDL(
+            f'ALTER TABLE "{table}" ALTER COLUMN "{name}" TYPE {definition} USING {value}')]
+
+    # Other dialects, SQLite in particular, cannot change a column's type in place:
+    # the values are copied into a new column that replaces the old one. Indexes on
+    # the column are dropped first and recreated afterwards.
+    temporary = f"{name}__money"
+
+    if not column.nullable:
+        definition += " DEFAULT 0 NOT NULL"
+
+    affected = [index for index in column.table.indexes if column.name in index.columns]
+
+    return [
+        *(DropIndex(index) for index in affected if index.name in indexes),
+        DDL(f'ALTER TABLE "{table}" ADD COLUMN "{temporary}" {definition}'),
+        DDL(f'UPDATE "{table}" SET "{temporary}" = {value}'),
+        DDL(f'ALTER TABLE "{table}" DROP COLUMN "{name}"'),
+        DDL(f'ALTER TABLE "{table}" RENAME COLUMN "{temporary}" TO "{name}"'),
+        *(CreateIndex(index) for index in affected)
+    ]
+
+
+def plan_schema_changes(connection: Connection,
+                        metadata: Optional[MetaData] = None) -> List[ExecutableDDLElement]:
+    """
+    Derive the DDL adding what the models define but the database lacks.
+
+    Only additive changes are derived: missing tables, columns and indexes. Added
+    columns are nullable unless they have a server default, since existing rows have
+    no value for them. The one exception is `Money` columns, whose values are
+    converted when their stored type, float or integer, differs from the configured
+    money storage. Other dropped or altered definitions need a hand-written
+    migration.
+
+    On SQLite, converting a money column rebuilds it as the last column of its
+    table; change data capture triggers on the table must be dropped first.
+
+    Parameters
+    ----------
+    connection : Connection
+        Connection used to reflect the database.
+
+    metadata : MetaData, optional
+        Metadata to compare with. Defaults to the registered declarative base's.
+
+    Returns
+    -------
+    List[ExecutableDDLElement]
+        DDL statements in dependency order.
+    """
+    metadata = metadata or di[DeclarativeBase].metadata
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+    changes = []
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            changes.append(CreateTable(table))
+            changes.extend(CreateIndex(index) for index in table.indexes)
+            continue
+
+        columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+        indexes = [index["name"] for index in inspector.get_indexes(table.name)]
+
+        changes.extend(
+            _add_column(connection, column)
+            for column in table.columns if column.name not in columns
+        )
+        changes.extend(
+            CreateIndex(index)
+            for index in table.indexes if index.name not in indexes
+        )
+
+        for column in table.columns:
+            if not isinstance(column.type, Money) or column.name not in columns:
+                continue
+
+            if isinstance(columns[column.name]["type"], Integer) != column.type.in_cents(connection.dialect):
+                changes.extend(_convert_money(connection, column, indexes))
+
+    return changes
+
+
+def stored_version(connection: Connection) -> Optional[Tuple[int, str]]:
+    """
+    Read the stored schema version.
+
+    Parameters
+    ----------
+    connection : Connection
+        Connection to read with.
+
+    Returns
+    -------
+    Tuple[int, str], optional
+        Stored version and fingerprint, or `None` if the database is not versioned.
+    """
+    try:
+        row = connection.execute(
+            select(SchemaVersion.version, SchemaVersion.fingerprint)
+            .where(SchemaVersion.id == 1)
+        ).first()
+    except DBAPIError:
+        connection.rollback()
+        return None
+
+    return tuple(row) if row is not None else None
+
+
+def _stamp(connection: Connection, exists: bool):
+    values = {
+        "version": head_version(),
+        "fingerprint": schema_fingerprint(dialect=connection.dialect),
+        "updated_at": datetime.now()
+    }
+
+    if exists:
+        connection.execute(update(SchemaVersion).where(SchemaVersion.id == 1).values(values))
+    else:
+        connection.execute(insert(SchemaVersion).values(id=1, **values))
+
+
+def ensure_schema(engine: Engine) -> str:
+    """
+    Bring a database to the latest schema version.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the database.
+
+    Returns
+    -------
+    str
+        `current` if nothing had to be done, `created` if the schema was created on an
+        empty database, or `upgraded` if migrations or derived changes were applied.
+
+    Raises
+    ------
+    RuntimeError
+        If the database was migrated by a newer version of the package.
+    """
+    metadata = di[DeclarativeBase].metadata
+
+    with engine.connect() as connection:
+        stored = stored_version(connection)
+
+        # Tables without a stored version were created before the schema was
+        # versioned. `create_all` would skip them, so they are migrated from 0.
+        if stored is None and not set(metadata.tables).isdisjoint(
+                inspect(connection).get_table_names()):
+            stored = (0, None)
+            stamped = False
+        else:
+            stamped = stored is not None
+
+    if stored == (head_version(), schema_fingerprint(dialect=engine.dialect)):
+        return "current"
+
+    if stored is not None and stored[0] > head_version():
+        raise RuntimeError(
+            f"Database schema version {stored[0]} is newer than this package's "
+            f"{head_version()}.")
+
+    with engine.begin() as connection:
+        if stored is None:
+            metadata.create_all(connection)
+        else:
+            for step in MIGRATIONS:
+                if step.version > stored[0]:
+                    step.upgrade(connection)
+
+            for change in plan_schema_changes(connection):
+                connection.execute(change)
+
+        _stamp(connection, exists=stamped)
+
+    return "created" if stored is None else "upgraded"
+
+
+@migration(1, "Baseline Chinook schema")
+def _baseline(connection: Connection):
+    for change in plan_schema_changes(connection):
+        connection.execute(change)
+
+
+@migration(2, "Add and fill the track_details read model")
+def _track_details(connection: Connection):
+    from .read_models import refresh_track_details
+
+    TrackDetails.__table__.create(connection, checkfirst=True)
+    refresh_track_details(connection)
@@ -1,27 +1,50 @@
 """ Module used to initialize all available models and create the database """
 
-from kink import di
-from sqlalchemy.orm import DeclarativeBase
+from typing import Optional
+
 from sqlalchemy import inspect
 
 from .engine import create_db_engine, Engine
 from .albums import Albums
 from .artists import Artists
+from .change_cursors import ChangeCursors
+from .change_log import ChangeLog
 from .customers import Customers
+from .customer_scores import CustomerScores
 from .employees import Employees
 from .genres import Genres
+from .id_blocks import IdBlocks
 from .invoice_items import InvoiceItems
 from .invoices import Invoices
 from .media_types import MediaTypes
 from .tracks import Tracks
+from .track_details import TrackDetails
 from .playlists import Playlists
 from .playlist_track import PlaylistTrack
+from .schema_version import SchemaVersion
+
+
+def init_db(engine: Optional[Engine] = None) -> Engine:
+    """
+    Initialize the SQLAlchemy engine and create the database
+
+    The schema is created or migrated by `ensure_schema`, which skips all
+    reflection when the stored schema version is current.
+
+    Parameters
+    ----------
+    engine : Engine, optional
+        Engine to create the schema on. Defaults to a new engine built by
+        `create_db_engine` from the registered configuration.
 
+    Returns
+    -------
+    Engine
+        The engine the schema was created on.
+    """
+    from ..migrations import ensure_schema
 
-def init_db() -> Engine:
-    """ Initialize the SQLAlchemy engine and create the database """
-    base = di[DeclarativeBase]
-    engine = create_db_engine()
+    engine = create_db_engine() if engine is None else engine
 
-    base.metadata.create_all(engine)
+    ensure_schema(engine)
     return engine
@@ -0,0 +1,43 @@
+"""
+change_cursors.py
+
+Defines the ChangeCursors SQLAlchemy ORM model for the `change_cursors` table.
+
+Each consumer of the change data capture log stores here the position of the last
+change it has processed, so that it can resume after a restart without rescanning
+the log or the source tables.
+
+Classes
+-------
+ChangeCursors
+    ORM model for the `change_cursors` table, representing a consumer's position.
+"""
+
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
+from sqlalchemy import String
+
+from kink import di
+
+BASE = di[DeclarativeBase]
+
+
+class ChangeCursors(BASE):
+    """
+    Represents the position of a change log consumer.
+
+    Attributes
+    ----------
+    consumer : Mapped[str]
+        Name of the consumer. Primary key. Max length: 120 characters.
+
+    position : Mapped[int]
+        `change_id` of the last change the consumer has processed.
+    """
+
+    __tablename__ = "change_cursors"
+
+    consumer: Mapped[str] = mapped_column(String(120), primary_key=True)
+    position: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self) -> str:
+        return f"<ChangeCursors(consumer='{self.consumer}', position={self.position})>"
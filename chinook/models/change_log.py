@@ -0,0 +1,65 @@
+"""
+change_log.py
+
+Defines the ChangeLog SQLAlchemy ORM model for the `change_log` table.
+
+This table is the outbox of the change data capture subsystem. Every captured insert,
+update or delete of a tracked table appends one row, written in the same transaction
+as the change itself, either by ORM flush events or by database triggers.
+
+Classes
+-------
+ChangeLog
+    ORM model for the `change_log` table, representing one captured row change.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
+from sqlalchemy import String, Text
+
+from kink import di
+
+BASE = di[DeclarativeBase]
+
+
+class ChangeLog(BASE):
+    """
+    Represents a captured change to a row of a tracked table.
+
+    Attributes
+    ----------
+    change_id : Mapped[int]
+        Position of the change in the log. Primary key with auto-increment.
+
+    table_name : Mapped[str]
+        Name of the changed table. Max length: 120 characters.
+
+    operation : Mapped[str]
+        One of `insert`, `update` or `delete`. Max length: 6 characters.
+
+    row_key : Mapped[str]
+        Primary key of the changed row as a JSON object.
+
+    data : Mapped[str]
+        Column values of the row as a JSON object: the new values for inserts and
+        updates, the last known values for deletes.
+
+    changed_at : Mapped[datetime]
+        Time the change was captured.
+    """
+
+    __tablename__ = "change_log"
+
+    change_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    table_name: Mapped[str] = mapped_column(String(120), index=True)
+    operation: Mapped[str] = mapped_column(String(6))
+    row_key: Mapped[str] = mapped_column(Text)
+    data: Mapped[str] = mapped_column(Text, nullable=True)
+    changed_at: Mapped[datetime] = mapped_column()
+
+    def __repr__(self) -> str:
+        return (
+            f"<ChangeLog(change_id={self.change_id}, table_name='{self.table_name}', "
+            f"operation='{self.operation}', row_key={self.row_key})>"
+        )
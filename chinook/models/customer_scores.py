@@ -0,0 +1,95 @@
+"""
+customer_scores.py
+
+Defines the CustomerScores SQLAlchemy ORM model for the `customer_scores` table.
+
+Each row holds the recency/frequency/monetary (RFM) scores, segment and customer
+lifetime value (CLV) of a customer with at least one invoice, together with the
+purchase aggregates they are derived from, so scores can be updated from new
+invoices alone. Rows are maintained by `chinook.scoring`.
+
+Classes
+-------
+CustomerScores
+    ORM model for the `customer_scores` table, representing a customer's scores.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
+from sqlalchemy import String, ForeignKey
+
+from kink import di
+
+BASE = di[DeclarativeBase]
+
+
+class CustomerScores(BASE):
+    """
+    Represents the RFM scores and lifetime value of a customer.
+
+    Attributes
+    ----------
+    customer_id : Mapped[int]
+        Foreign key referencing `customers.customer_id`. Primary key.
+
+    first_invoice_date : Mapped[datetime]
+        Date of the customer's first invoice.
+
+    last_invoice_date : Mapped[datetime]
+        Date of the customer's latest invoice.
+
+    last_invoice_id : Mapped[int]
+        Highest `invoice_id` included in the aggregates.
+
+    frequency : Mapped[int]
+        Number of invoices.
+
+    monetary : Mapped[float]
+        Sum of invoice totals in USD.
+
+    recency_days : Mapped[float]
+        Days between the latest invoice and the scoring date.
+
+    r_score : Mapped[int]
+        Recency quintile, 5 for the most recent customers.
+
+    f_score : Mapped[int]
+        Frequency quintile, 5 for the most frequent customers.
+
+    m_score : Mapped[int]
+        Monetary quintile, 5 for the highest spending customers.
+
+    segment : Mapped[str]
+        RFM segment, such as `champions` or `at_risk`. Max length: 30 characters.
+
+    clv : Mapped[float]
+        Estimated customer lifetime value in USD.
+
+    scored_at : Mapped[datetime]
+        Scoring date the recency and CLV refer to.
+    """
+
+    __tablename__ = "customer_scores"
+
+    customer_id: Mapped[int] = mapped_column(
+        ForeignKey("customers.customer_id"), primary_key=True, autoincrement=False)
+    first_invoice_date: Mapped[datetime] = mapped_column()
+    last_invoice_date: Mapped[datetime] = mapped_column()
+    last_invoice_id: Mapped[int] = mapped_column()
+    frequency: Mapped[int] = mapped_column()
+    monetary: Mapped[float] = mapped_column()
+    recency_days: Mapped[float] = mapped_column()
+    r_score: Mapped[int] = mapped_column()
+    f_score: Mapped[int] = mapped_column()
+    m_score: Mapped[int] = mapped_column()
+    segment: Mapped[str] = mapped_column(String(30), index=True)
+    clv: Mapped[float] = mapped_column()
+    scored_at: Mapped[datetime] = mapped_column()
+
+    def __repr__(self) -> str:
+        return (
+            f"<CustomerScores(customer_id={self.customer_id}, "
+            f"rfm={self.r_score}{self.f_score}{self.m_score}, segment='{self.segment}', "
+            f"clv={self.clv})>"
+        )
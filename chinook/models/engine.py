@@ -4,24 +4,115 @@ engine.py
 Defines a factory function for creating a SQLAlchemy Engine using a provided configuration.
 
 The function is dependency-injected via `kink`, using an implementation of
-`ISQLAlchemyConfig` that supplies the database connection string.
+`ISQLAlchemyConfig` that supplies the database connection string and, optionally,
+engine options and SQLite pragmas. When a `QueryInstrumentation` instance is
+registered in the container, it is attached to every engine created here. The
+configuration's `money_storage` is recorded on the engine's dialect, so the `Money`
+columns of each database follow its own storage.
+
+A configuration with `read_only` set opens its SQLite file through an immutable,
+read-only URI with a shared page cache and `query_only` enforced. SQLite then takes
+no locks and keeps no journal, and with a large `mmap_size` pragma every process
+reading the file maps the same pages of the OS page cache instead of copying them
+into private buffers.
 
 Functions
 ---------
-create_db_engine(sql_config: ISQLAlchemyConfig) -> Engine
+read_only_url(url: str, immutable: bool, shared_cache: bool) -> str
+    Rewrites a SQLite file URL to open the database read-only.
+
+create_db_engine(sql_config: ISQLAlchemyConfig, engine_options: dict) -> Engine
     Creates and returns a SQLAlchemy Engine using the provided connection string.
 """
 
-from typing import Optional
+import os
+from typing import Any, Dict, Optional
+from urllib.request import pathname2url
 
-from kink import inject
-from sqlalchemy import create_engine, Engine
+from kink import di, inject
+from sqlalchemy import URL, create_engine, event, make_url, Engine
 
+from ..instrumentation import QueryInstrumentation
 from ..protocols.sql_alchemy_config import ISQLAlchemyConfig
+from .types import set_money_storage
+
+
+def read_only_url(url: str, immutable: bool = False, shared_cache: bool = False) -> str:
+    """
+    Rewrite a SQLite file URL to open the database read-only.
+
+    Parameters
+    ----------
+    url : str
+        Connection string. Non-SQLite URLs are returned unchanged.
+
+    immutable : bool
+        Whether to declare the file immutable, so SQLite skips locking and change
+        detection. Only safe while nothing writes to the file.
+
+    shared_cache : bool
+        Whether connections of the process share one page cache.
+
+    Returns
+    -------
+    str
+        `sqlite:///file:<absolute path>?mode=ro&uri=true` for SQLite files, with
+        `immutable=1` and `cache=shared` as requested. The path is percent-encoded,
+        so characters such as spaces, `?` and `#` cannot end the filename early. URLs
+        that already use a URI filename are returned unchanged.
+
+    Raises
+    ------
+    ValueError
+        If the URL is an in-memory SQLite database, which cannot be opened read-only
+        by another connection.
+    """
+    parsed = make_url(url)
+
+    if parsed.get_backend_name() != "sqlite":
+        return url
+
+    database = parsed.database or ""
+
+    if database in ("", ":memory:") or "mode=memory" in str(parsed):
+        raise ValueError("In-memory SQLite databases cannot be opened read-only.")
+
+    if parsed.query.get("uri") == "true":
+        return url
+
+    query = {"mode": "ro", "uri": "true"}
+
+    if immutable:
+        query["immutable"] = "1"
+
+    if shared_cache:
+        query["cache"] = "shared"
+
+    # Rendered through `URL`, which quotes the encoded path once more, since
+    # SQLAlchemy unquotes the database of a parsed connection string.
+    filename = f"file:{pathname2url(os.path.abspath(database))}"
+    return URL.create("sqlite", database=filename, query=query) \
+        .render_as_string(hide_password=False)
+
+
+def _pragma_listener(pragmas: Dict[str, Any]):
+    def set_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return set_pragmas
 
 
 @inject()
-def create_db_engine(sql_config: Optional[ISQLAlchemyConfig] = None) -> Engine:
+def create_db_engine(
+    sql_config: Optional[ISQLAlchemyConfig] = None,
+    engine_options: Optional[Dict[str, Any]] = None
+) -> Engine:
     """
     Creates a SQLAlchemy Engine using the provided configuration.
 
@@ -31,6 +122,11 @@ def create_db_engine(sql_config: Optional[ISQLAlchemyConfig] = None) -> Engine:
         An object implementing the `ISQLAlchemyConfig` protocol, providing
         a database connection string.
 
+    engine_options : dict, optional
+        Extra keyword arguments passed to `sqlalchemy.create_engine`, such as
+        `pool_size` or `echo`. They take precedence over the `engine_options` of
+        `sql_config`.
+
     Returns
     -------
     Engine
@@ -48,4 +144,21 @@ def create_db_engine(sql_config: Optional[ISQLAlchemyConfig] = None) -> Engine:
     if sql_config is None:
         raise ValueError("`sql_config` must be provided.")
 
-    return create_engine(sql_config.connection_string)
+    options = {**(getattr(sql_config, "engine_options", None) or {}), **(engine_options or {})}
+    url = sql_config.connection_string
+
+    if getattr(sql_config, "read_only", False):
+        url = read_only_url(url, immutable=True, shared_cache=True)
+
+    engine = create_engine(url, **options)
+    set_money_storage(engine.dialect, getattr(sql_config, "money_storage", None) or "float")
+
+    pragmas = getattr(sql_config, "sqlite_pragmas", None)
+
+    if pragmas and engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _pragma_listener(pragmas))
+
+    if QueryInstrumentation in di:
+        di[QueryInstrumentation].attach(engine)
+
+    return engine
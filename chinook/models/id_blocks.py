@@ -0,0 +1,45 @@
+"""
+id_blocks.py
+
+Defines the IdBlocks SQLAlchemy ORM model for the `id_blocks` table.
+
+This table backs block-based primary key allocation for high-volume writes. Each row
+holds, for one allocation sequence, the next identifier that has not been handed out
+yet. Writers reserve a whole block of identifiers in one short transaction and then
+assign keys locally, instead of waiting for an autoincrement value per row.
+
+Classes
+-------
+IdBlocks
+    ORM model for the `id_blocks` table, representing an identifier sequence.
+"""
+
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
+from sqlalchemy import String
+
+from kink import di
+
+BASE = di[DeclarativeBase]
+
+
+class IdBlocks(BASE):
+    """
+    Represents an identifier allocation sequence.
+
+    Attributes
+    ----------
+    name : Mapped[str]
+        Name of the sequence, such as `invoices.invoice_id`. Primary key.
+        Max length: 120 characters.
+
+    next_value : Mapped[int]
+        First identifier of the next block to hand out.
+    """
+
+    __tablename__ = "id_blocks"
+
+    name: Mapped[str] = mapped_column(String(120), primary_key=True)
+    next_value: Mapped[int] = mapped_column()
+
+    def __repr__(self) -> str:
+        return f"<IdBlocks(name='{self.name}', next_value={self.next_value})>"
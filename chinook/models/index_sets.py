@@ -0,0 +1,191 @@
+"""
+index_sets.py
+
+Declares opt-in secondary index sets for the Chinook models.
+
+The models themselves only index foreign keys. The sets below cover the predicates
+and sort keys of common reporting and lookup workloads. They are not part of
+`Base.metadata`, so `create_all` never creates them; they are applied explicitly with
+`apply_index_set`.
+
+Classes
+-------
+IndexSpec
+    Declarative description of a single secondary index.
+
+Functions
+---------
+apply_index_set(engine: Engine, name: str) -> List[str]
+    Creates every index of a named set that does not exist yet.
+
+drop_index_set(engine: Engine, name: str) -> List[str]
+    Drops every index of a named set.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from kink import di
+from sqlalchemy import Engine, Index, MetaData, inspect
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """
+    Describes a secondary index on a Chinook table.
+
+    Attributes
+    ----------
+    table : str
+        Name of the indexed table.
+
+    columns : Tuple[str, ...]
+        Indexed columns, in key order.
+
+    name : str, optional
+        Index name. Defaults to `ix_<table>_<columns>`.
+    """
+
+    table: str
+    columns: Tuple[str, ...]
+    name: Optional[str] = None
+
+    @property
+    def index_name(self) -> str:
+        """Returns the name of the index."""
+        return self.name or f"ix_{self.table}_{'_'.join(self.columns)}"
+
+    def to_index(self) -> Index:
+        """
+        Build the index against a detached copy of the table.
+
+        The copy keeps the index out of `Base.metadata`, so declaring or applying a
+        set never changes what `create_all` emits.
+
+        Returns
+        -------
+        Index
+            SQLAlchemy index bound to a copy of the table.
+        """
+        source = di[DeclarativeBase].metadata.tables[self.table]
+        table = source.to_metadata(MetaData())
+
+        return Index(self.index_name, *[table.c[column] for column in self.columns])
+
+
+INDEX_SETS: Dict[str, Tuple[IndexSpec, ...]] = {
+    "reporting": (
+        IndexSpec("invoices", ("billing_country", "invoice_date")),
+        IndexSpec("customers", ("country", "last_name")),
+    ),
+    "lookup": (
+        IndexSpec("customers", ("email",)),
+        IndexSpec("tracks", ("name",)),
+    ),
+    "pricing": (
+        IndexSpec("tracks", ("unit_price", "track_id")),
+    ),
+}
+
+
+def _index_set(name: str) -> Tuple[IndexSpec, ...]:
+    if name not in INDEX_SETS:
+        raise ValueError(f"Unknown index set `{name}`. Expected one of {tuple(INDEX_SETS)}.")
+
+    return INDEX_SETS[name]
+
+
+def create_indexes(engine: Engine, specs: Tuple[IndexSpec, ...]) -> List[str]:
+    """
+    Create the given indexes, skipping any that already exist.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine connected to the target database.
+
+    specs : Tuple[IndexSpec, ...]
+        Indexes to create.
+
+    Returns
+    -------
+    List[str]
+        Names of the indexes that were created.
+    """
+    created = []
+
+    with engine.begin() as connection:
+        for spec in specs:
+            existing = {index["name"] for index in inspect(connection).get_indexes(spec.table)}
+
+            if spec.index_name in existing:
+                continue
+
+            connection.execute(CreateIndex(spec.to_index()))
+            created.append(spec.index_name)
+
+    return created
+
+
+def apply_index_set(engine: Engine, name: str) -> List[str]:
+    """
+    Create every index of a named index set.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine connected to the target database.
+
+    name : str
+        Key of `INDEX_SETS`, such as `reporting`, `lookup` or `pricing`.
+
+    Returns
+    -------
+    List[str]
+        Names of the indexes that were created.
+
+    Raises
+    ------
+    ValueError
+        If the index set does not exist.
+    """
+    return create_indexes(engine, _index_set(name))
+
+
+def drop_index_set(engine: Engine, name: str) -> List[str]:
+    """
+    Drop every index of a named index set.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine connected to the target database.
+
+    name : str
+        Key of `INDEX_SETS`.
+
+    Returns
+    -------
+    List[str]
+        Names of the indexes that were dropped.
+
+    Raises
+    ------
+    ValueError
+        If the index set does not exist.
+    """
+    dropped = []
+
+    with engine.begin() as connection:
+        for spec in _index_set(name):
+            existing = {index["name"] for index in inspect(connection).get_indexes(spec.table)}
+
+            if spec.index_name not in existing:
+                continue
+
+            connection.execute(DropIndex(spec.to_index()))
+            dropped.append(spec.index_name)
+
+    return dropped
@@ -17,6 +17,8 @@ from sqlalchemy import ForeignKey
 
 from kink import di
 
+from .types import Money
+
 BASE = di[DeclarativeBase]
 
 
@@ -38,7 +40,7 @@ class InvoiceItems(BASE):
         Foreign key referencing `tracks.track_id`.
 
     unit_price : Mapped[float]
-        Price per unit (track) in USD.
+        Price per unit (track) in USD. Stored as `Money`.
 
     quantity : Mapped[int]
         Number of units (tracks) purchased.
@@ -49,7 +51,7 @@ class InvoiceItems(BASE):
     invoice_line_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     invoice_id: Mapped[int] = mapped_column(ForeignKey("invoices.invoice_id"), index=True)
     track_id: Mapped[int] = mapped_column(ForeignKey("tracks.track_id"), index=True)
-    unit_price: Mapped[float] = mapped_column()
+    unit_price: Mapped[float] = mapped_column(Money())
     quantity: Mapped[int] = mapped_column()
 
 
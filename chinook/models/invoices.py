@@ -14,10 +14,12 @@ Invoices
 from datetime import datetime
 
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index
 
 from kink import di
 
+from .types import Money
+
 BASE = di[DeclarativeBase]
 
 
@@ -55,10 +57,18 @@ class Invoices(BASE):
         Postal code of the billing address. Max length: 10 characters.
 
     total : Mapped[float]
-        Total amount of the invoice in USD.
+        Total amount of the invoice in USD. Stored as `Money`.
+
+    Notes
+    -----
+    A composite index on `(invoice_date, customer_id)` serves time-windowed reports
+    and per-customer lookups within a window.
     """
 
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_invoice_date_customer_id", "invoice_date", "customer_id"),
+    )
 
     invoice_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey("customers.customer_id"), index=True)
@@ -68,7 +78,7 @@ class Invoices(BASE):
     billing_state: Mapped[str] = mapped_column(String(40), nullable=True)
     billing_country: Mapped[str] = mapped_column(String(40), nullable=True)
     billing_postal_code: Mapped[str] = mapped_column(String(10), nullable=True)
-    total: Mapped[float] = mapped_column()
+    total: Mapped[float] = mapped_column(Money())
 
     def __repr__(self) -> str:
         return (
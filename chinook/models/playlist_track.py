@@ -7,8 +7,10 @@ This is an association table representing the many-to-many relationship
 between playlists and tracks.
 """
 
+from typing import Optional
+
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from kink import di
 
 BASE = di[DeclarativeBase]
@@ -27,9 +29,18 @@ class PlaylistTrack(BASE):
 
     track_id : Mapped[int]
         Foreign key referencing the `tracks` table.
+
+    position : Mapped[Optional[int]]
+        Sort key of the track within the playlist. Positions are spaced by a gap
+        (see `chinook.playlists`), so a track can be moved between two others by
+        updating its own row only. `NULL` for tracks that have not been ordered,
+        which sort first, by `track_id`.
     """
 
     __tablename__ = "playlist_track"
+    __table_args__ = (
+        Index("ix_playlist_track_playlist_id_position", "playlist_id", "position"),
+    )
 
     playlist_id: Mapped[int] = mapped_column(
         ForeignKey("playlists.playlist_id"), primary_key=True)
@@ -37,5 +48,7 @@ class PlaylistTrack(BASE):
     track_id: Mapped[int] = mapped_column(
         ForeignKey("tracks.track_id"), primary_key=True, index=True)
 
+    position: Mapped[Optional[int]] = mapped_column(nullable=True)
+
     def __repr__(self) -> str:
         return f"<PlaylistTrack(playlist_id={self.playlist_id}, track_id={self.track_id})>"
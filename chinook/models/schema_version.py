@@ -0,0 +1,57 @@
+"""
+schema_version.py
+
+Defines the SchemaVersion SQLAlchemy ORM model for the `schema_version` table.
+
+This single-row table records which migration the database schema has been brought
+to and the fingerprint of the models it was last synchronized with. Startup reads
+it with one query to decide whether any schema work is needed.
+
+Classes
+-------
+SchemaVersion
+    ORM model for the `schema_version` table, representing the schema's state.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
+from sqlalchemy import String
+
+from kink import di
+
+BASE = di[DeclarativeBase]
+
+
+class SchemaVersion(BASE):
+    """
+    Represents the version of the database schema.
+
+    Attributes
+    ----------
+    id : Mapped[int]
+        Always 1. Primary key.
+
+    version : Mapped[int]
+        Version of the last applied migration.
+
+    fingerprint : Mapped[str]
+        Hash of the model metadata the schema was last synchronized with.
+        Max length: 64 characters.
+
+    updated_at : Mapped[datetime]
+        Time of the last migration or synchronization.
+    """
+
+    __tablename__ = "schema_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column()
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    updated_at: Mapped[datetime] = mapped_column()
+
+    def __repr__(self) -> str:
+        return (
+            f"<SchemaVersion(version={self.version}, "
+            f"fingerprint='{self.fingerprint[:12]}')>"
+        )
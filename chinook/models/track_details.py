@@ -0,0 +1,113 @@
+"""
+track_details.py
+
+Defines the TrackDetails SQLAlchemy ORM model for the `track_details` table.
+
+This table is a denormalized read model of the catalog: one row per track carrying
+the names of its album, artist, genre and media type, so catalog pages are read from
+a single table instead of joining `tracks`, `albums`, `artists`, `genres` and
+`media_types`. It is derived data, maintained by `chinook.read_models`.
+
+Classes
+-------
+TrackDetails
+    ORM model for the `track_details` table, representing a track and the names of
+    the catalog rows it references.
+"""
+
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
+from sqlalchemy import String, Index
+
+from kink import di
+
+from .types import Money
+
+BASE = di[DeclarativeBase]
+
+
+class TrackDetails(BASE):
+    """
+    Represents a track together with its album, artist, genre and media type names.
+
+    Identifiers are copied from the source rows but are not foreign keys, so the
+    read model can be rebuilt or refreshed independently of the catalog tables.
+
+    Attributes
+    ----------
+    track_id : Mapped[int]
+        Identifier of the track. Primary key.
+
+    name : Mapped[str]
+        Name of the track. Max length: 200 characters.
+
+    album_id : Mapped[int]
+        Identifier of the album.
+
+    album_title : Mapped[str]
+        Title of the album. Max length: 160 characters.
+
+    artist_id : Mapped[int]
+        Identifier of the album's artist.
+
+    artist_name : Mapped[str]
+        Name of the artist. Max length: 120 characters.
+
+    genre_id : Mapped[int]
+        Identifier of the genre.
+
+    genre_name : Mapped[str]
+        Name of the genre. Max length: 120 characters.
+
+    media_type_id : Mapped[int]
+        Identifier of the media type.
+
+    media_type_name : Mapped[str]
+        Name of the media type. Max length: 120 characters.
+
+    composer : Mapped[str]
+        Composer of the track. Max length: 220 characters.
+
+    milliseconds : Mapped[int]
+        Length of the track in milliseconds.
+
+    total_bytes : Mapped[int]
+        File size of the track in bytes.
+
+    unit_price : Mapped[float]
+        Price of the track in USD. Stored as `Money`.
+
+    Notes
+    -----
+    The indexes on `(name, track_id)`, `(unit_price, track_id)` and
+    `(milliseconds, track_id)` serve the catalog sorts. The trailing `track_id` makes
+    each sort order total, so pages can be fetched by keyset range scans.
+    """
+
+    __tablename__ = "track_details"
+    __table_args__ = (
+        Index("ix_track_details_name_track_id", "name", "track_id"),
+        Index("ix_track_details_unit_price_track_id", "unit_price", "track_id"),
+        Index("ix_track_details_milliseconds_track_id", "milliseconds", "track_id"),
+    )
+
+    track_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String(200))
+    album_id: Mapped[int] = mapped_column(nullable=True)
+    album_title: Mapped[str] = mapped_column(String(160), nullable=True)
+    artist_id: Mapped[int] = mapped_column(nullable=True)
+    artist_name: Mapped[str] = mapped_column(String(120), nullable=True)
+    genre_id: Mapped[int] = mapped_column(nullable=True)
+    genre_name: Mapped[str] = mapped_column(String(120), nullable=True)
+    media_type_id: Mapped[int] = mapped_column(nullable=True)
+    media_type_name: Mapped[str] = mapped_column(String(120), nullable=True)
+    composer: Mapped[str] = mapped_column(String(220), nullable=True)
+    milliseconds: Mapped[int] = mapped_column()
+    total_bytes: Mapped[int] = mapped_column()
+    unit_price: Mapped[float] = mapped_column(Money())
+
+    def __repr__(self) -> str:
+        return (
+            f"<TrackDetails(track_id={self.track_id}, name='{self.name}', "
+            f"album_title='{self.album_title}', artist_name='{self.artist_name}', "
+            f"genre_name='{self.genre_name}', unit_price={self.unit_price})>"
+        )
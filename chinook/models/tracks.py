@@ -18,6 +18,8 @@ from sqlalchemy import String, ForeignKey
 
 from kink import di
 
+from .types import Money
+
 BASE = di[DeclarativeBase]
 
 
@@ -57,7 +59,7 @@ class Tracks(BASE):
         File size of the track in bytes.
 
     unit_price : Mapped[float]
-        Price of the track in USD.
+        Price of the track in USD. Stored as `Money`.
     """
     __tablename__ = "tracks"
 
@@ -75,7 +77,7 @@ class Tracks(BASE):
 
     milliseconds: Mapped[int] = mapped_column()
     total_bytes: Mapped[int] = mapped_column()
-    unit_price: Mapped[float] = mapped_column()
+    unit_price: Mapped[float] = mapped_column(Money())
 
     def __repr__(self) -> str:
         return (
@@ -0,0 +1,243 @@
+"""
+types.py
+
+Defines custom SQLAlchemy column types of the Chinook models.
+
+`Money` maps prices and totals. By default it stores floating point numbers, as the
+original Chinook schema does. With the `cents` storage (`money_storage` of the
+database's `ISQLAlchemyConfig`, or `CHINOOK_MONEY_STORAGE=cents`), amounts are stored
+as exact integer cents. Python values are floats in both storages, rounded to the
+cent, so code reading or writing amounts does not depend on the storage.
+
+The storage belongs to the database being queried: `create_db_engine` records the
+`money_storage` of its configuration on the engine's dialect, and `Money` and
+`cents()` resolve it from the dialect a statement is compiled and executed for.
+Engines created without `create_db_engine` fall back to the registered
+`ISQLAlchemyConfig`, so databases of different storages can be used side by side.
+
+In SQL expressions `Money` keeps its meaning under arithmetic: `price * quantity`,
+`sum(price * quantity)` and `price + price` are amounts, while numbers multiplied
+with or compared to amounts are converted as needed. `cents()` returns the integer
+cents of an amount column for vectorized int64 aggregation, without a float round
+trip when amounts are stored as cents.
+
+Raw SQL, such as the change data capture triggers, sees the stored values: cents
+when the `cents` storage is used.
+
+Classes
+-------
+Money
+    Amount in USD, stored as a float or as integer cents.
+
+Functions
+---------
+money_storage(dialect: Dialect) -> str
+    Returns the money storage of a database.
+
+set_money_storage(dialect: Dialect, storage: str)
+    Records the money storage of an engine's database on its dialect.
+
+cents(column: ColumnElement) -> ColumnElement
+    Returns an expression of the integer cents of an amount.
+"""
+
+from typing import Optional
+
+from kink import di
+from sqlalchemy import BigInteger, Dialect, Float, Integer, cast, func, type_coerce
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import TypeDecorator
+
+from ..protocols.sql_alchemy_config import ISQLAlchemyConfig
+
+
+MONEY_STORAGES = ("float", "cents")
+
+# Dialect attribute holding the money storage of an engine's database.
+_DIALECT_ATTRIBUTE = "chinook_money_storage"
+
+# Operators whose other operand is a plain number rather than an amount.
+_SCALING_OPERATORS = (operators.mul, operators.truediv, operators.floordiv)
+
+
+def _check(storage: str) -> str:
+    if storage not in MONEY_STORAGES:
+        raise ValueError(f"`money_storage` must be one of {MONEY_STORAGES}.")
+
+    return storage
+
+
+def set_money_storage(dialect: Dialect, storage: str):
+    """
+    Record the money storage of an engine's database on its dialect.
+
+    Must be called before the engine runs its first statement: SQLAlchemy caches the
+    processors of a type per dialect.
+
+    Parameters
+    ----------
+    dialect : Dialect
+        Dialect of the engine, `engine.dialect`.
+
+    storage : str
+        `float` or `cents`.
+    """
+    setattr(dialect, _DIALECT_ATTRIBUTE, _check(storage))
+
+
+def money_storage(dialect: Optional[Dialect] = None) -> str:
+    """
+    Return the money storage of a database.
+
+    Parameters
+    ----------
+    dialect : Dialect, optional
+        Dialect of the database's engine.
+
+    Returns
+    -------
+    str
+        The storage recorded on the dialect by `create_db_engine`. Otherwise the
+        `money_storage` of the registered `ISQLAlchemyConfig`, or `float` if there is
+        none or it does not define one.
+
+    Raises
+    ------
+    ValueError
+        If the configured storage is not `float` or `cents`.
+    """
+    storage = getattr(dialect, _DIALECT_ATTRIBUTE, None)
+
+    if storage is not None:
+        return storage
+
+    config = di[ISQLAlchemyConfig] if ISQLAlchemyConfig in di else None
+    return _check(getattr(config, "money_storage", None) or "float")
+
+
+def _to_cents(value) -> Optional[int]:
+    return None if value is None else int(round(value * 100))
+
+
+def _from_cents(value) -> Optional[float]:
+    return None if value is None else value / 100
+
+
+class Money(TypeDecorator):
+    """
+    Amount in USD, stored as a float or as integer cents.
+
+    The storage is resolved per dialect, when an engine first uses the type, so it
+    stays fixed for the engine's lifetime.
+
+    Parameters
+    ----------
+    storage : str, optional
+        `float` or `cents`. Defaults to the storage of the database,
+        `money_storage(dialect)`.
+    """
+
+    impl = Float
+    cache_ok = True
+
+    class Comparator(TypeDecorator.Comparator):
+        """Keeps amounts typed as `Money` under arithmetic."""
+
+        def _adapt_expression(self, op, other_comparator):
+            other = other_comparator.type
+
+            if op in (operators.add, operators.sub) and isinstance(other, Money):
+                return op, self.type
+
+            if op in _SCALING_OPERATORS and isinstance(other, (Integer, Float)) \
+                    and not isinstance(other, Money):
+                return op, self.type
+
+            return super()._adapt_expression(op, other_comparator)
+
+    comparator_factory = Comparator
+
+    def __init__(self, storage: Optional[str] = None):
+        super().__init__()
+
+        if storage is not None and storage not in MONEY_STORAGES:
+            raise ValueError(f"`storage` must be one of {MONEY_STORAGES}.")
+
+        self.storage = storage
+
+    @property
+    def python_type(self) -> type:
+        return float
+
+    def in_cents(self, dialect: Optional[Dialect] = None) -> bool:
+        """Returns whether amounts are stored as integer cents in a database."""
+        return (self.storage or money_storage(dialect)) == "cents"
+
+    def load_dialect_impl(self, dialect):
+        return dialect.type_descriptor(BigInteger() if self.in_cents(dialect) else Float())
+
+    def coerce_compared_value(self, op, value):
+        if op in _SCALING_OPERATORS:
+            return Integer() if isinstance(value, int) else Float()
+
+        return self
+
+    def bind_processor(self, dialect):
+        if self.in_cents(dialect):
+            return _to_cents
+
+        return self.load_dialect_impl(dialect).bind_processor(dialect)
+
+    def literal_processor(self, dialect):
+        if self.in_cents(dialect):
+            return lambda value: str(_to_cents(value))
+
+        return self.load_dialect_impl(dialect).literal_processor(dialect)
+
+    def result_processor(self, dialect, coltype):
+        if self.in_cents(dialect):
+            return _from_cents
+
+        return self.load_dialect_impl(dialect).result_processor(dialect, coltype)
+
+    def __repr__(self) -> str:
+        return f"Money(storage={self.storage!r})"
+
+
+class _Cents(FunctionElement):
+    type = BigInteger()
+    name = "cents"
+    inherit_cache = True
+
+
+@compiles(_Cents)
+def _compile_cents(element: _Cents, compiler, **kwargs) -> str:
+    column, = element.clauses
+
+    if isinstance(column.type, Money) and column.type.in_cents(compiler.dialect):
+        return compiler.process(type_coerce(column, BigInteger), **kwargs)
+
+    return compiler.process(
+        cast(func.round(type_coerce(column, Float) * 100), BigInteger), **kwargs)
+
+
+def cents(column: ColumnElement) -> ColumnElement:
+    """
+    Build an expression of the integer cents of an amount.
+
+    Parameters
+    ----------
+    column : ColumnElement
+        Column or expression of type `Money`.
+
+    Returns
+    -------
+    ColumnElement
+        Typed as `BigInteger`, so results are plain ints. It compiles to the stored
+        value itself for databases with the `cents` storage, and to the float amount
+        times 100, rounded, otherwise.
+    """
+    return _Cents(column)
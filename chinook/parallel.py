@@ -0,0 +1,453 @@
+"""
+parallel.py
+
+Defines process-pool execution of analytics over partitioned invoice ranges.
+
+`ParallelExecutor` splits `invoices` into contiguous `invoice_id` or `invoice_date`
+ranges and runs a report on each range in a separate worker process. Engines and
+their connection pools cannot be shared across processes, so each worker builds its
+own engine with `create_db_engine` from a `WorkerConfig`, a picklable snapshot of the
+registered `ISQLAlchemyConfig` including its engine options, pragmas and money
+storage, and caches it for the lifetime of the process. A local SQLite file is opened
+read-only (`mode=ro`), or immutable and memory-mapped when the configuration is in
+read-only mode, so workers read concurrently without taking write locks.
+
+A report describes how to read one range and how to combine results. Each worker
+streams its range in chunks, reduces every chunk to a small partial aggregate with
+NumPy, and returns the combined partial; the parent merges the partials of all
+ranges. Only aggregates cross process boundaries, never rows.
+
+Classes
+-------
+WorkerConfig
+    Picklable `ISQLAlchemyConfig` used to build engines in worker processes.
+
+LineAggregate
+    Report summing revenue, quantity and lines of invoice lines per group.
+
+ParallelExecutor
+    Runs reports over invoice ranges in a process pool.
+
+Functions
+---------
+invoice_ranges(connection: Connection, by: str, partitions: int) -> List[Tuple]
+    Splits the invoices into contiguous half-open ranges.
+
+create_parallel_executor(sql_config: ISQLAlchemyConfig, ...) -> ParallelExecutor
+    Creates an executor from the registered configuration.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from kink import inject
+from sqlalchemy import Connection, Engine, Select, func, select
+
+from .models import InvoiceItems, Invoices
+from .models.engine import create_db_engine, read_only_url
+from .models.types import cents
+from .protocols.sql_alchemy_config import ISQLAlchemyConfig
+
+
+RANGE_COLUMNS = {"invoice_id": Invoices.invoice_id, "invoice_date": Invoices.invoice_date}
+
+GROUP_KEYS = ("billing_country", "customer_id", "track_id", "year", "month")
+
+# Engines of the current worker process, keyed by process id and connection string.
+_ENGINES: Dict[Tuple[int, str], Engine] = {}
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    """
+    Picklable configuration of the engines of worker processes.
+
+    Implements `ISQLAlchemyConfig`.
+
+    Attributes
+    ----------
+    connection_string : str
+        Connection string of the database.
+
+    replica_connection_strings : Tuple[str, ...]
+        Connection strings of read replicas. Not used by workers.
+
+    in_memory : bool
+        Always `False`; in-memory databases cannot be shared between processes.
+
+    money_storage : str
+        Storage of `Money` columns, `float` or `cents`.
+
+    engine_options : Dict[str, Any]
+        Keyword arguments for `create_engine`, such as pool settings.
+
+    sqlite_pragmas : Dict[str, Any]
+        Pragmas run on every new SQLite connection.
+
+    read_only : bool
+        Whether the SQLite file is opened read-only, immutable and with a shared
+        page cache, as in the read-only mode of `ChinookConfig`.
+    """
+
+    connection_string: str
+    replica_connection_strings: Tuple[str, ...] = ()
+    in_memory: bool = False
+    money_storage: str = "float"
+    engine_options: Dict[str, Any] = field(default_factory=dict)
+    sqlite_pragmas: Dict[str, Any] = field(default_factory=dict)
+    read_only: bool = False
+
+    @classmethod
+    def from_config(cls, sql_config: ISQLAlchemyConfig, read_only: bool = True) -> "WorkerConfig":
+        """
+        Snapshot a configuration.
+
+        Parameters
+        ----------
+        sql_config : ISQLAlchemyConfig
+            Configuration to copy, with its engine options, SQLite pragmas, money
+            storage and read-only mode.
+
+        read_only : bool
+            Whether to open SQLite files read-only. Configurations in read-only mode
+            are always opened read-only and immutable.
+
+        Returns
+        -------
+        WorkerConfig
+            The snapshot.
+        """
+        url = sql_config.connection_string
+        immutable = bool(getattr(sql_config, "read_only", False))
+        pragmas = dict(getattr(sql_config, "sqlite_pragmas", None) or {})
+
+        if read_only and not immutable:
+            url = read_only_url(url)
+            # Switching the journal mode writes to the file.
+            pragmas.pop("journal_mode", None)
+
+        return cls(
+            connection_string=url,
+            replica_connection_strings=tuple(
+                getattr(sql_config, "replica_connection_strings", ()) or ()),
+            money_storage=getattr(sql_config, "money_storage", None) or "float",
+            engine_options=dict(getattr(sql_config, "engine_options", None) or {}),
+            sqlite_pragmas=pragmas,
+            read_only=immutable
+        )
+
+
+def _engine(config: WorkerConfig) -> Engine:
+    key = (os.getpid(), config.connection_string)
+
+    if key not in _ENGINES:
+        _ENGINES[key] = create_db_engine(sql_config=config)
+
+    return _ENGINES[key]
+
+
+@dataclass(frozen=True)
+class LineAggregate:
+    """
+    Revenue, quantity and line count of invoice lines, grouped by one key.
+
+    Attributes
+    ----------
+    by : str
+        Group key: `billing_country`, `customer_id`, `track_id`, `year` or `month`
+        (the latter two of `invoice_date`).
+    """
+
+    by: str = "billing_country"
+
+    def __post_init__(self):
+        if self.by not in GROUP_KEYS:
+            raise ValueError(f"`by` must be one of {GROUP_KEYS}.")
+
+    def statement(self) -> Select:
+        """Returns the query of the report's columns, before range filtering."""
+        key = {
+            "billing_country": Invoices.billing_country,
+            "customer_id": Invoices.customer_id,
+            "track_id": InvoiceItems.track_id
+        }.get(self.by, Invoices.invoice_date)
+
+        return (
+            select(key.label("key"), cents(InvoiceItems.unit_price), InvoiceItems.quantity)
+            .join(Invoices, Invoices.invoice_id == InvoiceItems.invoice_id)
+        )
+
+    def reduce(self, rows: Sequence[tuple]) -> pd.DataFrame:
+        """
+        Aggregate one chunk of rows.
+
+        Parameters
+        ----------
+        rows : Sequence[tuple]
+            Rows of `statement()`.
+
+        Returns
+        -------
+        pd.DataFrame
+            `revenue` (cents), `quantity` and `lines`, indexed by group key. Rows
+            without a key are grouped under `<unknown>` for `billing_country` and
+            under -1 for the integer keys.
+        """
+        keys, prices, quantities = zip(*rows)
+
+        if self.by in ("year", "month"):
+            dates = np.asarray(keys, dtype="datetime64[M]")
+            keys = dates.astype("datetime64[Y]").astype(int) + 1970 if self.by == "year" \
+                else dates.astype(str)
+        else:
+            # Missing keys get a sentinel of the key's own type, so integer keys of
+            # every chunk stay integers and merge in `combine`.
+            missing = "<unknown>" if self.by == "billing_country" else -1
+            keys = np.asarray([missing if key is None else key for key in keys])
+
+        groups, inverse = np.unique(keys, return_inverse=True)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        revenue = np.asarray(prices, dtype=np.int64) * quantities
+
+        return pd.DataFrame({
+            "revenue": np.bincount(inverse, revenue, len(groups)).astype(np.int64),
+            "quantity": np.bincount(inverse, quantities, len(groups)).astype(np.int64),
+            "lines": np.bincount(inverse, minlength=len(groups))
+        }, index=pd.Index(groups, name=self.by))
+
+    def combine(self, partials: Sequence[pd.DataFrame]) -> pd.DataFrame:
+        """Sums partial aggregates of the same key."""
+        partials = [partial for partial in partials if partial is not None and len(partial)]
+
+        if not partials:
+            return pd.DataFrame(columns=["revenue", "quantity", "lines"])
+
+        return pd.concat(partials).groupby(level=0).sum()
+
+    def finish(self, merged: pd.DataFrame) -> pd.DataFrame:
+        """Converts merged revenue from cents to USD."""
+        return merged.assign(revenue=merged["revenue"] / 100)
+
+
+def invoice_ranges(connection: Connection, by: str = "invoice_id",
+                   partitions: int = 4) -> List[Tuple[Any, Any]]:
+    """
+    Split the invoices into contiguous half-open ranges of equal width.
+
+    Parameters
+    ----------
+    connection : Connection
+        Connection used to read the bounds.
+
+    by : str
+        Column to split on, `invoice_id` or `invoice_date`.
+
+    partitions : int
+        Number of ranges.
+
+    Returns
+    -------
+    List[Tuple[Any, Any]]
+        `(low, high)` pairs covering every invoice, with `low <= value < high`. Empty
+        if there are no invoices.
+    """
+    if by not in RANGE_COLUMNS:
+        raise ValueError(f"`by` must be one of {tuple(RANGE_COLUMNS)}.")
+
+    column = RANGE_COLUMNS[by]
+    low, high = connection.execute(select(func.min(column), func.max(column))).one()
+
+    if low is None:
+        return []
+
+    if by == "invoice_id":
+        bounds = np.linspace(low, high + 1, partitions + 1).round().astype(np.int64)
+        bounds = [int(bound) for bound in np.unique(bounds)]
+    else:
+        width = (high - low + timedelta(microseconds=1)) / partitions
+        bounds = [low + width * index for index in range(partitions)]
+        bounds.append(high + timedelta(microseconds=1))
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _run_range(config: WorkerConfig, report: Any, by: str, low: Any, high: Any,
+               chunk_size: int):
+    engine = _engine(config)
+    column = RANGE_COLUMNS[by]
+    statement = report.statement().where(column >= low, column < high)
+
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size) \
+            .execute(statement)
+
+        return report.combine([report.reduce(rows) for rows in result.partitions(chunk_size)])
+
+
+class ParallelExecutor:
+    """
+    Runs reports over invoice ranges in a process pool.
+
+    A report is a picklable object with:
+
+    - `statement() -> Select`: the rows to read, including `invoices`, before range
+      filtering,
+    - `reduce(rows) -> partial`: the aggregate of one chunk of rows,
+    - `combine(partials) -> partial`: the aggregate of several partials, and
+    - `finish(partial) -> result`: the final result, optionally.
+
+    `LineAggregate` is the built-in report.
+
+    Parameters
+    ----------
+    config : WorkerConfig
+        Configuration the worker engines are built from.
+
+    processes : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+
+    chunk_size : int
+        Rows streamed and reduced per chunk.
+
+    mp_context : optional
+        `multiprocessing` context of the pool, for example
+        `multiprocessing.get_context("spawn")`. Defaults to the platform default.
+
+    Examples
+    --------
+    >>> with create_parallel_executor(processes=4) as executor:
+    ...     revenue = executor.run(LineAggregate("year"), by="invoice_date")
+    """
+
+    def __init__(self, config: WorkerConfig, processes: Optional[int] = None,
+                 chunk_size: int = 50_000, mp_context=None):
+        self.config = config
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = ProcessPoolExecutor(self.processes, mp_context=mp_context)
+
+    def ranges(self, by: str = "invoice_id",
+               partitions: Optional[int] = None) -> List[Tuple[Any, Any]]:
+        """
+        Split the invoices into ranges, one per process by default.
+
+        Parameters
+        ----------
+        by : str
+            Column to split on, `invoice_id` or `invoice_date`.
+
+        partitions : int, optional
+            Number of ranges. Defaults to the number of processes.
+
+        Returns
+        -------
+        List[Tuple[Any, Any]]
+            Half-open `(low, high)` ranges.
+        """
+        with _engine(self.config).connect() as connection:
+            return invoice_ranges(connection, by, partitions or self.processes)
+
+    def map(self, report: Any, by: str = "invoice_id",
+            ranges: Optional[Sequence[Tuple[Any, Any]]] = None) -> list:
+        """
+        Compute the partial of a report on every range.
+
+        Parameters
+        ----------
+        report : object
+            Report to run.
+
+        by : str
+            Column the ranges refer to, `invoice_id` or `invoice_date`.
+
+        ranges : Sequence[Tuple[Any, Any]], optional
+            Ranges to run on. Defaults to `ranges(by)`.
+
+        Returns
+        -------
+        list
+            One partial per range, in range order.
+        """
+        ranges = self.ranges(by) if ranges is None else ranges
+        futures = [
+            self._pool.submit(_run_range, self.config, report, by, low, high, self.chunk_size)
+            for low, high in ranges
+        ]
+
+        return [future.result() for future in futures]
+
+    def run(self, report: Any, by: str = "invoice_id", partitions: Optional[int] = None):
+        """
+        Run a report over every invoice and merge the partials.
+
+        Parameters
+        ----------
+        report : object
+            Report to run.
+
+        by : str
+            Column to split on, `invoice_id` or `invoice_date`.
+
+        partitions : int, optional
+            Number of ranges. Defaults to the number of processes.
+
+        Returns
+        -------
+        object
+            The report's merged and finished result.
+        """
+        merged = report.combine(self.map(report, by, self.ranges(by, partitions)))
+        finish = getattr(report, "finish", None)
+
+        return finish(merged) if finish is not None else merged
+
+    def close(self):
+        """Shut the worker processes down."""
+        self._pool.shutdown()
+
+    def __enter__(self) -> "ParallelExecutor":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@inject()
+def create_parallel_executor(
+    sql_config: Optional[ISQLAlchemyConfig] = None,
+    processes: Optional[int] = None,
+    read_only: bool = True,
+    chunk_size: int = 50_000
+) -> ParallelExecutor:
+    """
+    Create a parallel executor from the registered configuration.
+
+    Parameters
+    ----------
+    sql_config : ISQLAlchemyConfig, optional
+        Configuration of the database to read.
+
+    processes : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+
+    read_only : bool
+        Whether workers open SQLite files read-only.
+
+    chunk_size : int
+        Rows streamed and reduced per chunk.
+
+    Returns
+    -------
+    ParallelExecutor
+        The executor. Close it, or use it as a context manager, to stop the workers.
+    """
+    if sql_config is None:
+        raise ValueError("`sql_config` must be provided.")
+
+    return ParallelExecutor(
+        WorkerConfig.from_config(sql_config, read_only), processes, chunk_size)
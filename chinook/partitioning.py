@@ -0,0 +1,637 @@
+"""
+partitioning.py
+
+Defines date-based partitioning of the `invoices` and `invoice_items` tables.
+
+On PostgreSQL, invoices and their lines are copied into natively partitioned tables
+(`PARTITION BY RANGE (invoice_date)`), and the planner prunes partitions itself. On
+SQLite, which has no declarative partitioning, each period gets a pair of shadow
+tables (`invoices_p2009_01`, `invoice_items_p2009_01`) and queries are routed only
+to the shadow tables that overlap the requested window.
+
+In both cases the partitions are copies: the base `invoices` and `invoice_items`
+tables remain the source of truth and take every write, and the partitioned rows are
+stored a second time. The copies go stale between syncs. `InvoicePartitioner.sync`
+appends invoices added since the last sync. Given a `ChangeFeed` over the change
+log, it also refreshes the invoices updated or deleted since, so partitions catch up
+with every base write; without one they are append-only, and later updates and
+deletes of base rows never reach them.
+
+`invoices_between` and `items_between` refuse to build a query while the partitions
+are known to be behind: when the base tables hold invoices newer than the last sync,
+or when the feed last given to `sync` has unapplied changes. Without a feed, updates
+and deletes cannot be detected, so reads may return their old values.
+
+Classes
+-------
+InvoicePartitioner
+    Creates, synchronizes and prunes invoice partitions for a single engine.
+
+Functions
+---------
+period_start(value: datetime, granularity: str) -> datetime
+    Truncates a timestamp to the start of its partition period.
+"""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import (
+    Column,
+    Engine,
+    Index,
+    MetaData,
+    Select,
+    Table,
+    delete,
+    false,
+    func,
+    inspect,
+    insert,
+    or_,
+    select,
+    text,
+    union_all
+)
+from sqlalchemy.sql.expression import CompoundSelect
+
+from .models import ChangeLog, InvoiceItems, Invoices
+
+if TYPE_CHECKING:
+    from .cdc import ChangeFeed
+
+
+GRANULARITIES = ("month", "year")
+
+
+def period_start(value: datetime, granularity: str) -> datetime:
+    """
+    Truncate a timestamp to the start of its partition period.
+
+    Parameters
+    ----------
+    value : datetime
+        Timestamp to truncate.
+
+    granularity : str
+        Either `month` or `year`.
+
+    Returns
+    -------
+    datetime
+        Start of the period containing `value`.
+    """
+    if granularity == "year":
+        return datetime(value.year, 1, 1)
+
+    return datetime(value.year, value.month, 1)
+
+
+def next_period(start: datetime, granularity: str) -> datetime:
+    """
+    Return the start of the period following `start`.
+
+    Parameters
+    ----------
+    start : datetime
+        Start of a partition period.
+
+    granularity : str
+        Either `month` or `year`.
+
+    Returns
+    -------
+    datetime
+        Start of the next period.
+    """
+    if granularity == "year":
+        return datetime(start.year + 1, 1, 1)
+
+    if start.month == 12:
+        return datetime(start.year + 1, 1, 1)
+
+    return datetime(start.year, start.month + 1, 1)
+
+
+class InvoicePartitioner:
+    """
+    Manages date partitions of invoices and invoice lines.
+
+    Parameters
+    ----------
+    engine : Engine
+        SQLAlchemy engine connected to a Chinook database.
+
+    granularity : str
+        Partition period, either `month` or `year`.
+
+    Raises
+    ------
+    ValueError
+        If `granularity` is not supported.
+
+    Examples
+    --------
+    >>> partitioner = InvoicePartitioner(get_engine(), granularity="year")
+    >>> partitioner.sync()
+    >>> window = partitioner.invoices_between(datetime(2010, 1, 1), datetime(2010, 7, 1))
+    """
+
+    PARENT_INVOICES = "invoices_partitioned"
+    PARENT_ITEMS = "invoice_items_partitioned"
+
+    def __init__(self, engine: Engine, granularity: str = "month"):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"`granularity` must be one of {GRANULARITIES}.")
+
+        self.engine = engine
+        self.granularity = granularity
+        self.native = engine.dialect.name == "postgresql"
+        self.metadata = MetaData()
+        self._partitions: Dict[datetime, Tuple[Table, Table]] = {}
+        self._parents: Optional[Tuple[Table, Table]] = None
+        self._synced_id: Optional[int] = None
+        self._changes: Optional["ChangeFeed"] = None
+        self._discover()
+
+    def partition_name(self, table: str, start: datetime) -> str:
+        """
+        Return the physical name of a partition.
+
+        Parameters
+        ----------
+        table : str
+            Base table name, `invoices` or `invoice_items`.
+
+        start : datetime
+            Start of the partition period.
+
+        Returns
+        -------
+        str
+            Partition table name such as `invoices_p2009_01` or `invoices_p2009`.
+        """
+        suffix = f"{start:%Y}" if self.granularity == "year" else f"{start:%Y_%m}"
+        return f"{table}_p{suffix}"
+
+    @property
+    def partitions(self) -> List[datetime]:
+        """Returns the start of every existing partition period, in order."""
+        return sorted(self._partitions)
+
+    def _discover(self):
+        names = set(inspect(self.engine).get_table_names())
+        prefix = f"{Invoices.__tablename__}_p"
+
+        for name in names:
+            if not name.startswith(prefix):
+                continue
+
+            key = name[len(prefix):]
+            fmt = "%Y" if self.granularity == "year" else "%Y_%m"
+
+            try:
+                start = datetime.strptime(key, fmt)
+            except ValueError:
+                continue
+
+            if self.partition_name(InvoiceItems.__tablename__, start) in names:
+                self._partitions[start] = self._tables(start)
+
+    @staticmethod
+    def _columns(table: Table, primary_key: Tuple[str, ...]) -> List[Column]:
+        return [
+            Column(
+                column.name,
+                column.type,
+                primary_key=column.name in primary_key,
+                nullable=column.nullable,
+                autoincrement=False
+            )
+            for column in table.columns
+        ]
+
+    def _parent_tables(self) -> Tuple[Table, Table]:
+        if self._parents is None:
+            invoices = Table(
+                self.PARENT_INVOICES,
+                self.metadata,
+                *self._columns(Invoices.__table__, ("invoice_id", "invoice_date")),
+                postgresql_partition_by="RANGE (invoice_date)"
+            )
+            items = Table(
+                self.PARENT_ITEMS,
+                self.metadata,
+                *self._columns(InvoiceItems.__table__, ("invoice_line_id",)),
+                Column("invoice_date", Invoices.__table__.c.invoice_date.type,
+                       primary_key=True),
+                postgresql_partition_by="RANGE (invoice_date)"
+            )
+            Index(f"ix_{self.PARENT_INVOICES}_invoice_date_customer_id",
+                  invoices.c.invoice_date, invoices.c.customer_id)
+            Index(f"ix_{self.PARENT_ITEMS}_invoice_id", items.c.invoice_id)
+            self._parents = (invoices, items)
+
+        return self._parents
+
+    def _tables(self, start: datetime) -> Tuple[Table, Table]:
+        invoices_name = self.partition_name(Invoices.__tablename__, start)
+        items_name = self.partition_name(InvoiceItems.__tablename__, start)
+
+        if invoices_name in self.metadata.tables:
+            return self.metadata.tables[invoices_name], self.metadata.tables[items_name]
+
+        if self.native:
+            columns = self._parent_tables()
+            invoices = Table(invoices_name, self.metadata,
+                             *[Column(c.name, c.type) for c in columns[0].columns])
+            items = Table(items_name, self.metadata,
+                          *[Column(c.name, c.type) for c in columns[1].columns])
+            return invoices, items
+
+        invoices = Table(
+            invoices_name,
+            self.metadata,
+            *self._columns(Invoices.__table__, ("invoice_id",))
+        )
+        items = Table(
+            items_name,
+            self.metadata,
+            *self._columns(InvoiceItems.__table__, ("invoice_line_id",)),
+            Column("invoice_date", Invoices.__table__.c.invoice_date.type)
+        )
+        Index(f"ix_{invoices_name}_invoice_date_customer_id",
+              invoices.c.invoice_date, invoices.c.customer_id)
+        Index(f"ix_{items_name}_invoice_id", items.c.invoice_id)
+
+        return invoices, items
+
+    def create_partition(self, start: datetime) -> Tuple[Table, Table]:
+        """
+        Create the invoice and invoice line partitions for a period if missing.
+
+        Parameters
+        ----------
+        start : datetime
+            Any timestamp within the period; it is truncated to the period start.
+
+        Returns
+        -------
+        Tuple[Table, Table]
+            The invoices and invoice lines partition tables.
+        """
+        start = period_start(start, self.granularity)
+
+        if start in self._partitions:
+            return self._partitions[start]
+
+        tables = self._tables(start)
+
+        with self.engine.begin() as connection:
+            if self.native:
+                self.metadata.create_all(connection, tables=self._parent_tables())
+                end = next_period(start, self.granularity)
+
+                for parent, partition in zip(self._parent_tables(), tables):
+                    connection.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {partition.name} "
+                        f"PARTITION OF {parent.name} "
+                        f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+                    ))
+            else:
+                self.metadata.create_all(connection, tables=tables)
+
+        self._partitions[start] = tables
+        return tables
+
+    def route(self, invoice_date: datetime) -> Tuple[Table, Table]:
+        """
+        Return the tables that rows dated `invoice_date` should be written to.
+
+        On PostgreSQL these are the partitioned parent tables, which route rows
+        natively. On SQLite they are the shadow tables of the matching period,
+        created on demand.
+
+        Parameters
+        ----------
+        invoice_date : datetime
+            Date of the invoice being written.
+
+        Returns
+        -------
+        Tuple[Table, Table]
+            The invoices and invoice lines tables to insert into.
+        """
+        tables = self.create_partition(invoice_date)
+        return self._parent_tables() if self.native else tables
+
+    def _last_synced_id(self, connection) -> int:
+        if self.native:
+            tables = [self._parent_tables()[0]] if self._partitions else []
+        else:
+            tables = [invoices for invoices, _ in self._partitions.values()]
+
+        last = 0
+
+        for table in tables:
+            value = connection.execute(select(func.max(table.c.invoice_id))).scalar()
+            last = max(last, value or 0)
+
+        return last
+
+    def _periods(self, *conditions) -> List[datetime]:
+        base_invoices = Invoices.__table__
+
+        with self.engine.connect() as connection:
+            first, final = connection.execute(
+                select(func.min(base_invoices.c.invoice_date),
+                       func.max(base_invoices.c.invoice_date))
+                .where(*conditions)
+            ).one()
+
+        periods = []
+        start = period_start(first, self.granularity) if first is not None else None
+
+        # Partitions are created before copying, each in a transaction of its own:
+        # on SQLite, creating one inside the copying transaction would wait for it.
+        while start is not None and start <= final:
+            self.create_partition(start)
+            periods.append(start)
+            start = next_period(start, self.granularity)
+
+        return periods
+
+    def _copy(self, connection, start: datetime, *conditions) -> int:
+        base_invoices = Invoices.__table__
+        base_items = InvoiceItems.__table__
+        invoices, items = self.route(start)
+        window = (
+            *conditions,
+            base_invoices.c.invoice_date >= start,
+            base_invoices.c.invoice_date < next_period(start, self.granularity)
+        )
+
+        copied = connection.execute(
+            insert(invoices).from_select(
+                [c.name for c in base_invoices.columns],
+                select(base_invoices).where(*window)
+            )
+        ).rowcount
+        connection.execute(
+            insert(items).from_select(
+                [c.name for c in base_items.columns] + ["invoice_date"],
+                select(base_items, base_invoices.c.invoice_date)
+                .join(base_invoices, base_invoices.c.invoice_id == base_items.c.invoice_id)
+                .where(*window)
+            )
+        )
+
+        return copied
+
+    def sync(self, changes: Optional["ChangeFeed"] = None) -> int:
+        """
+        Copy invoices and lines not yet present in the partitions.
+
+        Only invoices with an id greater than the highest partitioned id are copied,
+        so repeated calls are incremental. Without `changes`, partitions are
+        append-only: updates and deletes of base rows never reach them. A feed given
+        once is remembered, so later reads are refused until it is applied again.
+
+        Parameters
+        ----------
+        changes : ChangeFeed, optional
+            Feed of the change log capturing `invoices` and `invoice_items` (see
+            `install_triggers`). Invoices updated or deleted, or given new lines,
+            since the feed's position are refreshed with `refresh`, and the feed is
+            acknowledged.
+
+        Returns
+        -------
+        int
+            Number of invoices copied, not counting refreshed ones.
+        """
+        with self.engine.connect() as connection:
+            last = self._last_synced_id(connection)
+            newest = connection.execute(select(func.max(Invoices.invoice_id))).scalar()
+
+        # Invoices added while copying are left to the next sync.
+        appended = (Invoices.__table__.c.invoice_id > last,
+                    Invoices.__table__.c.invoice_id <= newest)
+        copied = 0
+
+        for start in self._periods(*appended):
+            with self.engine.begin() as connection:
+                copied += self._copy(connection, start, *appended)
+
+        self._synced_id = max(last, newest or 0)
+
+        if changes is None:
+            return copied
+
+        self._changes = changes
+
+        for batch in changes:
+            invoice_ids, line_ids = set(), set()
+
+            for record in batch:
+                if record.table == Invoices.__tablename__:
+                    invoice_id = record.key["invoice_id"]
+                elif record.table == InvoiceItems.__tablename__:
+                    invoice_id = (record.data or {}).get("invoice_id")
+                    line_ids.add(record.key["invoice_line_id"])
+                else:
+                    continue
+
+                # Inserts of invoices newer than the last sync were just appended.
+                if invoice_id is not None \
+                        and not (record.operation == "insert" and invoice_id > last):
+                    invoice_ids.add(invoice_id)
+
+            self.refresh(invoice_ids, line_ids)
+
+        return copied
+
+    def refresh(self, invoice_ids: Iterable[int], line_ids: Iterable[int] = ()) -> int:
+        """
+        Replace the partitioned rows of invoices with their current base rows.
+
+        Invoices deleted from the base tables are removed from the partitions, and
+        invoices whose date changed move to the partition of their new period. The
+        rows are replaced in one transaction.
+
+        Parameters
+        ----------
+        invoice_ids : Iterable[int]
+            Invoices to refresh, with all their lines.
+
+        line_ids : Iterable[int]
+            Invoice lines to remove from the partitions in addition, such as lines
+            deleted or moved to another invoice.
+
+        Returns
+        -------
+        int
+            Number of invoices copied back into the partitions.
+        """
+        invoice_ids, line_ids = sorted(set(invoice_ids)), sorted(set(line_ids))
+
+        if not invoice_ids and not line_ids:
+            return 0
+
+        if self.native:
+            tables = [self._parent_tables()] if self._partitions else []
+        else:
+            tables = list(self._partitions.values())
+
+        refreshed = Invoices.__table__.c.invoice_id.in_(invoice_ids)
+        periods = self._periods(refreshed) if invoice_ids else []
+        copied = 0
+
+        with self.engine.begin() as connection:
+            for invoices, items in tables:
+                connection.execute(delete(invoices).where(invoices.c.invoice_id.in_(invoice_ids)))
+                connection.execute(delete(items).where(or_(
+                    items.c.invoice_id.in_(invoice_ids), items.c.invoice_line_id.in_(line_ids))))
+
+            for start in periods:
+                copied += self._copy(connection, start, refreshed)
+
+        return copied
+
+    def behind(self) -> bool:
+        """
+        Return whether the partitions are known to be behind the base tables.
+
+        Returns
+        -------
+        bool
+            Whether the base tables hold invoices newer than the last sync, or the
+            feed last given to `sync` has unapplied `invoices` or `invoice_items`
+            changes. Updates and deletes made without a feed are not detected.
+        """
+        with self.engine.connect() as connection:
+            if self._synced_id is None:
+                self._synced_id = self._last_synced_id(connection)
+
+            newest = connection.execute(select(func.max(Invoices.invoice_id))).scalar()
+
+            if (newest or 0) > self._synced_id:
+                return True
+
+            if self._changes is None:
+                return False
+
+            return connection.execute(
+                select(ChangeLog.change_id)
+                .where(ChangeLog.change_id > self._changes.position,
+                       ChangeLog.table_name.in_(
+                           (Invoices.__tablename__, InvoiceItems.__tablename__)))
+                .limit(1)
+            ).first() is not None
+
+    def prune(self, start: datetime, end: datetime) -> List[datetime]:
+        """
+        Return the existing partitions that overlap the half-open window `[start, end)`.
+
+        Parameters
+        ----------
+        start : datetime
+            Inclusive lower bound of the window.
+
+        end : datetime
+            Exclusive upper bound of the window.
+
+        Returns
+        -------
+        List[datetime]
+            Start of each overlapping partition period.
+        """
+        return [
+            period for period in self.partitions
+            if period < end and next_period(period, self.granularity) > start
+        ]
+
+    @staticmethod
+    def _empty(index: int) -> Select:
+        base_invoices = Invoices.__table__
+
+        if index == 0:
+            return select(base_invoices).where(false())
+
+        base_items = InvoiceItems.__table__
+        return (
+            select(base_items, base_invoices.c.invoice_date)
+            .join(base_invoices, base_invoices.c.invoice_id == base_items.c.invoice_id)
+            .where(false())
+        )
+
+    def _between(self, index: int, start: datetime, end: datetime):
+        if self.behind():
+            raise RuntimeError("Invoice partitions are behind the base tables; call "
+                               "`sync` before reading them.")
+
+        if self.native:
+            table = self._parent_tables()[index]
+            return select(table).where(table.c.invoice_date >= start,
+                                       table.c.invoice_date < end)
+
+        selects = [
+            select(table).where(table.c.invoice_date >= start, table.c.invoice_date < end)
+            for table in (self._partitions[p][index] for p in self.prune(start, end))
+        ]
+
+        if not selects:
+            return self._empty(index)
+
+        return selects[0] if len(selects) == 1 else union_all(*selects)
+
+    def invoices_between(self, start: datetime, end: datetime) -> Union[Select, CompoundSelect]:
+        """
+        Build a query over invoices dated within `[start, end)`.
+
+        Only partitions overlapping the window are referenced, so the cost of the query
+        depends on the size of the window rather than the history of the table.
+
+        Parameters
+        ----------
+        start : datetime
+            Inclusive lower bound of the window.
+
+        end : datetime
+            Exclusive upper bound of the window.
+
+        Returns
+        -------
+        Select or CompoundSelect
+            Query returning invoice rows. Use `.subquery()` to join or aggregate over it.
+
+        Raises
+        ------
+        RuntimeError
+            If the partitions are behind the base tables (see `behind`).
+        """
+        return self._between(0, start, end)
+
+    def items_between(self, start: datetime, end: datetime) -> Union[Select, CompoundSelect]:
+        """
+        Build a query over invoice lines whose invoice is dated within `[start, end)`.
+
+        Parameters
+        ----------
+        start : datetime
+            Inclusive lower bound of the window.
+
+        end : datetime
+            Exclusive upper bound of the window.
+
+        Returns
+        -------
+        Select or CompoundSelect
+            Query returning invoice line rows with their `invoice_date`.
+
+        Raises
+        ------
+        RuntimeError
+            If the partitions are behind the base tables (see `behind`).
+        """
+        return self._between(1, start, end)
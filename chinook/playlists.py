@@ -0,0 +1,448 @@
+"""
+playlists.py
+
+Defines set-based playlist operations.
+
+Every operation of `PlaylistService` is a constant number of SQL statements, whatever
+the number of tracks involved, instead of one ORM object per track:
+
+- adding tracks, including every track of a genre or the result of any query, is one
+  `INSERT ... SELECT` that skips tracks already in the playlist,
+- removing tracks is one `DELETE ... WHERE EXISTS`,
+- union, intersection and difference of two playlists are compound `SELECT`s
+  inserted into a target playlist.
+
+Tracks are ordered by the `position` column of `playlist_track`. Positions are
+spaced by a gap (`GAP` by default), so moving tracks between two neighbours only
+updates the moved rows. When the gap is exhausted, or the playlist still has unordered
+tracks, the playlist is renumbered once.
+
+Classes
+-------
+PlaylistService
+    Set-based operations on playlists.
+
+Functions
+---------
+playlist_tracks(playlist_id: int) -> Select
+    Tracks of a playlist in playlist order.
+"""
+
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import (
+    Connection,
+    Engine,
+    Select,
+    bindparam,
+    delete,
+    except_,
+    func,
+    insert,
+    intersect,
+    literal,
+    select,
+    union,
+    update
+)
+
+from .models import PlaylistTrack, Playlists, Tracks
+
+
+# Default distance between consecutive positions.
+GAP = 1024
+
+OPERATIONS = {"union": union, "intersect": intersect, "difference": except_}
+
+# Track ids per `IN` list, below every dialect's parameter limit.
+KEY_CHUNK = 5_000
+
+
+def playlist_tracks(playlist_id: int) -> Select:
+    """
+    Build a query listing the tracks of a playlist in playlist order.
+
+    Unordered tracks (`position` is `NULL`) come first, by `track_id`.
+
+    Parameters
+    ----------
+    playlist_id : int
+        Identifier of the playlist.
+
+    Returns
+    -------
+    Select
+        Query returning `track_id` and `position`.
+    """
+    return (
+        select(PlaylistTrack.track_id, PlaylistTrack.position)
+        .where(PlaylistTrack.playlist_id == playlist_id)
+        .order_by(PlaylistTrack.position.asc().nulls_first(), PlaylistTrack.track_id)
+    )
+
+
+def _chunks(track_ids: Iterable[int]) -> Iterable[List[int]]:
+    track_ids = list(dict.fromkeys(track_ids))
+
+    for start in range(0, len(track_ids), KEY_CHUNK):
+        yield track_ids[start:start + KEY_CHUNK]
+
+
+class PlaylistService:
+    """
+    Set-based operations on playlists.
+
+    Each method runs in its own transaction and returns the number of affected rows.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the Chinook database.
+
+    gap : int
+        Distance between the positions of consecutive tracks when tracks are
+        appended or a playlist is renumbered.
+
+    Examples
+    --------
+    >>> playlists = PlaylistService(engine)
+    >>> rock = playlists.create("Rock")
+    >>> playlists.add_genre(rock, genre_id=1)
+    >>> playlists.remove_query(rock, select(PlaylistTrack.track_id).where(PlaylistTrack.playlist_id == 17))
+    >>> playlists.move(rock, [3, 4], before=1)
+    """
+
+    def __init__(self, engine: Engine, gap: int = GAP):
+        if gap < 2:
+            raise ValueError("`gap` must be at least 2.")
+
+        self.engine = engine
+        self.gap = gap
+
+    def create(self, name: str) -> int:
+        """Creates an empty playlist and returns its identifier."""
+        with self.engine.begin() as connection:
+            return connection.execute(insert(Playlists).values(name=name)).inserted_primary_key[0]
+
+    def _add(self, connection: Connection, playlist_id: int, query: Select) -> int:
+        source = query.subquery()
+        track_id = list(source.columns)[0]
+        candidates = (
+            select(track_id.label("track_id"))
+            .where(~select(PlaylistTrack.track_id).where(
+                PlaylistTrack.playlist_id == playlist_id,
+                PlaylistTrack.track_id == track_id
+            ).exists())
+            .distinct()
+            .subquery()
+        )
+        last = select(func.coalesce(func.max(PlaylistTrack.position), 0)) \
+            .where(PlaylistTrack.playlist_id == playlist_id).scalar_subquery()
+        rows = select(
+            literal(playlist_id),
+            candidates.c.track_id,
+            last + func.row_number().over(order_by=candidates.c.track_id) * self.gap
+        )
+
+        return connection.execute(
+            insert(PlaylistTrack).from_select(["playlist_id", "track_id", "position"], rows)
+        ).rowcount
+
+    def add(self, playlist_id: int, track_ids: Iterable[int]) -> int:
+        """
+        Append tracks to a playlist, by ascending `track_id`.
+
+        Tracks already in the playlist and unknown track ids are skipped.
+
+        Parameters
+        ----------
+        playlist_id : int
+            Identifier of the playlist.
+
+        track_ids : Iterable[int]
+            Tracks to add.
+
+        Returns
+        -------
+        int
+            Number of tracks added.
+        """
+        with self.engine.begin() as connection:
+            return sum(
+                self._add(connection, playlist_id,
+                          select(Tracks.track_id).where(Tracks.track_id.in_(chunk)))
+                for chunk in _chunks(track_ids)
+            )
+
+    def add_query(self, playlist_id: int, query: Select) -> int:
+        """
+        Append the tracks returned by a query to a playlist, by ascending `track_id`.
+
+        Parameters
+        ----------
+        playlist_id : int
+            Identifier of the playlist.
+
+        query : Select
+            Query whose first column is a track id, for example
+            `select(Tracks.track_id).where(Tracks.composer == "AC/DC")`.
+
+        Returns
+        -------
+        int
+            Number of tracks added. Tracks already in the playlist are skipped.
+        """
+        with self.engine.begin() as connection:
+            return self._add(connection, playlist_id, query)
+
+    def add_genre(self, playlist_id: int, genre_id: int) -> int:
+        """Appends every track of a genre to a playlist and returns the number added."""
+        return self.add_query(playlist_id, select(Tracks.track_id).where(Tracks.genre_id == genre_id))
+
+    def remove(self, playlist_id: int, track_ids: Iterable[int]) -> int:
+        """
+        Remove tracks from a playlist.
+
+        Parameters
+        ----------
+        playlist_id : int
+            Identifier of the playlist.
+
+        track_ids : Iterable[int]
+            Tracks to remove. Tracks not in the playlist are ignored.
+
+        Returns
+        -------
+        int
+            Number of tracks removed.
+        """
+        with self.engine.begin() as connection:
+            return sum(
+                connection.execute(
+                    delete(PlaylistTrack).where(
+                        PlaylistTrack.playlist_id == playlist_id,
+                        PlaylistTrack.track_id.in_(chunk)
+                    )
+                ).rowcount
+                for chunk in _chunks(track_ids)
+            )
+
+    def remove_query(self, playlist_id: int, query: Select) -> int:
+        """
+        Remove the tracks returned by a query from a playlist.
+
+        Parameters
+        ----------
+        playlist_id : int
+            Identifier of the playlist.
+
+        query : Select
+            Query whose first column is a track id.
+
+        Returns
+        -------
+        int
+            Number of tracks removed.
+        """
+        source = query.subquery()
+        track_id = list(source.columns)[0]
+
+        with self.engine.begin() as connection:
+            return connection.execute(
+                delete(PlaylistTrack).where(
+                    PlaylistTrack.playlist_id == playlist_id,
+                    select(track_id).where(track_id == PlaylistTrack.track_id).exists()
+                )
+            ).rowcount
+
+    def combine(self, target_id: int, left_id: int, right_id: int,
+                operation: str = "union") -> int:
+        """
+        Add the union, intersection or difference of two playlists to a playlist.
+
+        Parameters
+        ----------
+        target_id : int
+            Playlist receiving the result, usually a new one. Tracks it already has
+            are kept.
+
+        left_id : int
+            First operand.
+
+        right_id : int
+            Second operand.
+
+        operation : str
+            `union`, `intersect` or `difference` (tracks of `left_id` that are not in
+            `right_id`).
+
+        Returns
+        -------
+        int
+            Number of tracks added to `target_id`.
+
+        Raises
+        ------
+        ValueError
+            If the operation is not supported.
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"`operation` must be one of {tuple(OPERATIONS)}.")
+
+        def members(playlist_id: int) -> Select:
+            return select(PlaylistTrack.track_id).where(PlaylistTrack.playlist_id == playlist_id)
+
+        return self.add_query(target_id, OPERATIONS[operation](members(left_id), members(right_id)))
+
+    def renumber(self, playlist_id: int) -> int:
+        """
+        Reset the positions of a playlist to multiples of the gap, keeping its order.
+
+        Parameters
+        ----------
+        playlist_id : int
+            Identifier of the playlist.
+
+        Returns
+        -------
+        int
+            Number of rows renumbered.
+        """
+        ranked = (
+            select(
+                PlaylistTrack.track_id,
+                (func.row_number().over(
+                    order_by=(PlaylistTrack.position.asc().nulls_first(), PlaylistTrack.track_id)
+                ) * self.gap).label("position")
+            )
+            .where(PlaylistTrack.playlist_id == playlist_id)
+            .subquery()
+        )
+
+        with self.engine.begin() as connection:
+            return connection.execute(
+                update(PlaylistTrack)
+                .where(
+                    PlaylistTrack.playlist_id == playlist_id,
+                    PlaylistTrack.track_id == ranked.c.track_id
+                )
+                .values(position=ranked.c.position)
+            ).rowcount
+
+    def _position(self, connection: Connection, playlist_id: int, track_id: int) -> Optional[int]:
+        return connection.execute(
+            select(PlaylistTrack.position).where(
+                PlaylistTrack.playlist_id == playlist_id, PlaylistTrack.track_id == track_id)
+        ).scalar_one()
+
+    def _slots(self, connection: Connection, playlist_id: int, track_ids: List[int],
+               before: Optional[int]) -> Optional[List[int]]:
+        unordered = connection.execute(
+            select(PlaylistTrack.track_id)
+            .where(PlaylistTrack.playlist_id == playlist_id, PlaylistTrack.position.is_(None))
+            .limit(1)
+        ).first()
+
+        if unordered is not None:
+            return None
+
+        others = select(func.max(PlaylistTrack.position)) \
+            .where(PlaylistTrack.playlist_id == playlist_id)
+
+        if before is None:
+            low = connection.execute(others).scalar() or 0
+            return [low + self.gap * (index + 1) for index in range(len(track_ids))]
+
+        high = self._position(connection, playlist_id, before)
+        low = connection.execute(others.where(PlaylistTrack.position < high)).scalar()
+        low = high - self.gap * (len(track_ids) + 1) if low is None else low
+        step = (high - low) // (len(track_ids) + 1)
+
+        if step < 1:
+            return None
+
+        return [low + step * (index + 1) for index in range(len(track_ids))]
+
+    def _rewrite(self, connection: Connection, playlist_id: int, track_ids: List[int],
+                 before: Optional[int]) -> dict:
+        moved = set(track_ids)
+        order = [
+            track_id for track_id, _ in connection.execute(playlist_tracks(playlist_id))
+            if track_id not in moved
+        ]
+        index = len(order) if before is None else order.index(before)
+        order[index:index] = track_ids
+
+        return {track_id: self.gap * (rank + 1) for rank, track_id in enumerate(order)}
+
+    def move(self, playlist_id: int, track_ids: Sequence[int],
+             before: Optional[int] = None) -> int:
+        """
+        Move tracks of a playlist, in the given order, before another track.
+
+        Only the moved rows are updated while the positions around `before` leave
+        room for them; otherwise the playlist is renumbered with the tracks in place.
+
+        Parameters
+        ----------
+        playlist_id : int
+            Identifier of the playlist.
+
+        track_ids : Sequence[int]
+            Tracks to move, in their new relative order.
+
+        before : int, optional
+            Track to move them in front of. Defaults to the end of the playlist.
+
+        Returns
+        -------
+        int
+            Number of rows updated.
+
+        Raises
+        ------
+        ValueError
+            If a track is not in the playlist, or `before` is one of the moved tracks.
+        """
+        track_ids = list(dict.fromkeys(track_ids))
+
+        if before is not None and before in track_ids:
+            raise ValueError("`before` cannot be one of the moved tracks.")
+
+        with self.engine.begin() as connection:
+            wanted = track_ids + ([before] if before is not None else [])
+            present = {
+                track_id for chunk in _chunks(wanted)
+                for track_id in connection.execute(
+                    select(PlaylistTrack.track_id).where(
+                        PlaylistTrack.playlist_id == playlist_id,
+                        PlaylistTrack.track_id.in_(chunk)
+                    )
+                ).scalars()
+            }
+            missing = [track_id for track_id in wanted if track_id not in present]
+
+            if missing:
+                raise ValueError(f"Tracks {missing} are not in playlist {playlist_id}.")
+
+            slots = self._slots(connection, playlist_id, track_ids, before)
+            positions = dict(zip(track_ids, slots)) if slots is not None \
+                else self._rewrite(connection, playlist_id, track_ids, before)
+
+            if not positions:
+                return 0
+
+            connection.execute(
+                update(PlaylistTrack)
+                .where(
+                    PlaylistTrack.playlist_id == playlist_id,
+                    PlaylistTrack.track_id == bindparam("moved_track_id")
+                )
+                .values(position=bindparam("new_position")),
+                [
+                    {"moved_track_id": track_id, "new_position": position}
+                    for track_id, position in positions.items()
+                ]
+            )
+
+            return len(positions)
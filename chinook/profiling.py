@@ -0,0 +1,264 @@
+"""
+profiling.py
+
+Defines timing and memory instrumentation for database seeding.
+
+`SeedingProfiler` records wall time per bootstrap phase (configuration, schema
+creation, CSV loading and ORM insertion) and, per table, the rows loaded and the time
+spent parsing, building ORM objects and flushing. When memory profiling is enabled,
+each phase also records its peak allocation delta as measured by `tracemalloc`.
+
+Classes
+-------
+PhaseTiming
+    Wall time and peak memory delta of a bootstrap phase.
+
+TableTiming
+    Rows and per-stage timings of a seeded table.
+
+SeedingReport
+    Structured report returned by `initialize()`.
+
+SeedingProfiler
+    Collects phase and table timings into a `SeedingReport`.
+"""
+
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional
+
+
+STAGES = ("parse", "insert", "flush")
+
+
+@dataclass
+class PhaseTiming:
+    """
+    Timing of a bootstrap phase.
+
+    Attributes
+    ----------
+    name : str
+        Name of the phase.
+
+    seconds : float
+        Wall time spent in the phase.
+
+    peak_memory_bytes : int, optional
+        Peak traced allocation above the phase's starting point. Only set when
+        memory profiling is enabled.
+    """
+
+    name: str
+    seconds: float = 0.0
+    peak_memory_bytes: Optional[int] = None
+
+
+@dataclass
+class TableTiming:
+    """
+    Timing of a seeded table.
+
+    Attributes
+    ----------
+    table : str
+        Name of the table.
+
+    rows : int
+        Number of rows seeded.
+
+    parse_seconds : float
+        Time spent reading and normalizing the sample CSV.
+
+    insert_seconds : float
+        Time spent building and adding rows.
+
+    flush_seconds : float
+        Time spent flushing the rows to the database.
+    """
+
+    table: str
+    rows: int = 0
+    parse_seconds: float = 0.0
+    insert_seconds: float = 0.0
+    flush_seconds: float = 0.0
+
+    @property
+    def seconds(self) -> float:
+        """Returns the total time spent on the table."""
+        return self.parse_seconds + self.insert_seconds + self.flush_seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        """Returns the seeding throughput of the table."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class SeedingReport:
+    """
+    Structured timing report of a bootstrap run.
+
+    Attributes
+    ----------
+    phases : List[PhaseTiming]
+        Timings of each phase, in execution order.
+
+    tables : Dict[str, TableTiming]
+        Timings of each seeded table, in seeding order.
+    """
+
+    phases: List[PhaseTiming] = field(default_factory=list)
+    tables: Dict[str, TableTiming] = field(default_factory=dict)
+
+    @property
+    def total_seconds(self) -> float:
+        """Returns the wall time of every phase combined."""
+        return sum(phase.seconds for phase in self.phases)
+
+    def as_dict(self) -> dict:
+        """Returns the report as a JSON-serializable dictionary."""
+        return {
+            "total_seconds": self.total_seconds,
+            "phases": [asdict(phase) for phase in self.phases],
+            "tables": {
+                name: {**asdict(timing), "rows_per_second": timing.rows_per_second}
+                for name, timing in self.tables.items()
+            }
+        }
+
+    def format(self) -> str:
+        """Returns the report as a plain-text table."""
+        lines = [f"{'phase':<16}{'seconds':>10}{'peak MiB':>12}"]
+
+        for phase in self.phases:
+            memory = "" if phase.peak_memory_bytes is None \
+                else f"{phase.peak_memory_bytes / 2 ** 20:.1f}"
+            lines.append(f"{phase.name:<16}{phase.seconds:>10.3f}{memory:>12}")
+
+        lines.append(f"{'total':<16}{self.total_seconds:>10.3f}")
+        lines.append("")
+        lines.append(
+            f"{'table':<16}{'rows':>8}{'parse s':>10}{'insert s':>10}"
+            f"{'flush s':>10}{'rows/s':>12}")
+
+        for timing in self.tables.values():
+            lines.append(
+                f"{timing.table:<16}{timing.rows:>8}{timing.parse_seconds:>10.3f}"
+                f"{timing.insert_seconds:>10.3f}{timing.flush_seconds:>10.3f}"
+                f"{timing.rows_per_second:>12.0f}")
+
+        return "\n".join(lines)
+
+
+class SeedingProfiler:
+    """
+    Collects phase and table timings during bootstrap.
+
+    Parameters
+    ----------
+    memory : bool
+        Whether to trace allocations with `tracemalloc`. Tracing slows seeding down
+        noticeably, so it is off unless explicitly requested.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.report = SeedingReport()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseTiming]:
+        """
+        Time a bootstrap phase.
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase.
+
+        Yields
+        ------
+        PhaseTiming
+            The timing being recorded.
+        """
+        timing = PhaseTiming(name)
+        started_tracing = False
+
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        started = perf_counter()
+
+        try:
+            yield timing
+        finally:
+            timing.seconds = perf_counter() - started
+
+            if self.memory:
+                timing.peak_memory_bytes = tracemalloc.get_traced_memory()[1] - baseline
+
+                if started_tracing:
+                    tracemalloc.stop()
+
+            self.report.phases.append(timing)
+
+    def table(self, name: str) -> TableTiming:
+        """
+        Return the timing of a table, creating it on first use.
+
+        Parameters
+        ----------
+        name : str
+            Name of the table.
+
+        Returns
+        -------
+        TableTiming
+            The table's timing.
+        """
+        if name not in self.report.tables:
+            self.report.tables[name] = TableTiming(name)
+
+        return self.report.tables[name]
+
+    @contextmanager
+    def stage(self, name: str, stage: str) -> Iterator[TableTiming]:
+        """
+        Time one stage of seeding a table.
+
+        Parameters
+        ----------
+        name : str
+            Name of the table.
+
+        stage : str
+            One of `parse`, `insert` or `flush`.
+
+        Yields
+        ------
+        TableTiming
+            The table's timing.
+
+        Raises
+        ------
+        ValueError
+            If `stage` is unknown.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"`stage` must be one of {STAGES}.")
+
+        timing = self.table(name)
+        started = perf_counter()
+
+        try:
+            yield timing
+        finally:
+            attribute = f"{stage}_seconds"
+            setattr(timing, attribute, getattr(timing, attribute) + perf_counter() - started)
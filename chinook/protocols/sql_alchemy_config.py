@@ -12,7 +12,7 @@ ISQLAlchemyConfig
     Protocol interface that defines the required connection string for SQLAlchemy.
 """
 
-from typing import Protocol
+from typing import Any, Mapping, Protocol, Sequence
 
 
 class ISQLAlchemyConfig(Protocol):
@@ -26,6 +26,21 @@ class ISQLAlchemyConfig(Protocol):
     ----------
     connection_string : str
         The database connection string used by SQLAlchemy to connect to the database.
+
+    replica_connection_strings : Sequence[str]
+        Connection strings of read replicas of the database, if any.
+
+    money_storage : str
+        How `Money` columns store amounts: `float` or exact integer `cents`.
+
+    engine_options : Mapping[str, Any]
+        Keyword arguments passed to `create_engine`, such as pool settings.
+
+    sqlite_pragmas : Mapping[str, Any]
+        Pragmas run on every new SQLite connection.
+
+    read_only : bool
+        Whether the SQLite file is opened read-only and immutable.
     """
 
     @property
@@ -40,3 +55,50 @@ class ISQLAlchemyConfig(Protocol):
         -----
         This only applies to when SQLite is used.
         """
+
+    @property
+    def replica_connection_strings(self) -> Sequence[str]:
+        """Returns the connection strings of the read replicas.
+
+        Notes
+        -----
+        Optional. Configurations without replicas may omit this property, in which
+        case every statement is sent to `connection_string`.
+        """
+
+    @property
+    def money_storage(self) -> str:
+        """Returns how amounts are stored, `float` or `cents`.
+
+        Notes
+        -----
+        Optional. Configurations without it store amounts as floats. Changing it
+        converts the money columns of an existing database on the next `init_db`.
+        """
+
+    @property
+    def engine_options(self) -> Mapping[str, Any]:
+        """Returns the keyword arguments passed to `create_engine`.
+
+        Notes
+        -----
+        Optional. Configurations without it use the dialect's defaults.
+        """
+
+    @property
+    def sqlite_pragmas(self) -> Mapping[str, Any]:
+        """Returns the pragmas run on every new SQLite connection.
+
+        Notes
+        -----
+        Optional. Ignored for other dialects.
+        """
+
+    @property
+    def read_only(self) -> bool:
+        """Returns whether the SQLite file is opened read-only and immutable.
+
+        Notes
+        -----
+        Optional. Configurations without it open the database read-write.
+        """
@@ -0,0 +1,227 @@
+"""
+pytest_plugin.py
+
+Defines a pytest plugin providing fast, isolated Chinook databases.
+
+A template database is seeded once per test session. Each test then receives a cheap
+isolated copy of it instead of reseeding from CSV:
+
+- `clone` (default): on SQLite, the template file is copied into a private in-memory
+  database with the SQLite backup API. On PostgreSQL (`--chinook-template-url`), a
+  database is created per test with `CREATE DATABASE ... TEMPLATE` and dropped after.
+- `savepoint`: every test shares the template engine and runs inside a transaction
+  that is rolled back afterwards. Tests must write through `chinook_connection` or
+  `chinook_session`.
+
+The `kink` registrations this package makes (`DI_KEYS`) are snapshotted before each
+test that uses these fixtures and restored afterwards.
+
+The plugin is registered through the `pytest11` entry point when the package is
+installed. Projects can also enable it explicitly with
+`pytest_plugins = ["chinook.pytest_plugin"]`.
+
+Fixtures
+--------
+chinook_di
+    Restores `kink.di` registrations after the test.
+
+chinook_template
+    Session-scoped connection string of the seeded template database.
+
+chinook_engine
+    Engine connected to the test's isolated database, registered as `di[Engine]`.
+
+chinook_connection
+    Connection inside a transaction that is rolled back after the test.
+
+chinook_session
+    ORM session whose commits become savepoints inside `chinook_connection`.
+
+query_instrumentation
+    `QueryInstrumentation` that is detached after the test.
+"""
+
+import sqlite3
+from itertools import count
+from typing import Iterator
+
+import pytest
+from kink import di
+from sqlalchemy import Connection, Engine, create_engine, inspect, make_url
+from sqlalchemy.orm import DeclarativeBase, Session, scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from .instrumentation import QueryInstrumentation
+from .protocols.sql_alchemy_config import ISQLAlchemyConfig
+from .read_models import TrackDetailsSync
+from .registry import EngineRegistry
+
+
+ISOLATION_MODES = ("clone", "savepoint")
+
+# Keys this package registers in the `kink` container.
+DI_KEYS = (
+    DeclarativeBase,
+    ISQLAlchemyConfig,
+    Engine,
+    EngineRegistry,
+    TrackDetailsSync,
+    sessionmaker,
+    scoped_session
+)
+
+_clone_ids = count()
+
+
+def pytest_addoption(parser):
+    """Register the plugin's command line options."""
+    group = parser.getgroup("chinook")
+    group.addoption(
+        "--chinook-template-url",
+        default=None,
+        help="connection string of a PostgreSQL template database to clone per test; "
+             "defaults to a seeded SQLite file in a temporary directory"
+    )
+    group.addoption(
+        "--chinook-isolation",
+        default="clone",
+        choices=ISOLATION_MODES,
+        help="isolate tests by cloning the template (default) or by rolling back "
+             "a transaction on the shared template"
+    )
+
+
+def _seed(engine: Engine):
+    from .commit_samples import commit_sample_data
+    from .models import init_db
+
+    if inspect(engine).has_table("tracks"):
+        return
+
+    init_db(engine)
+    commit_sample_data(engine)
+
+
+@pytest.fixture
+def chinook_di() -> Iterator:
+    """Snapshot the package's `kink.di` registrations and restore them after the test."""
+    state = {key: di[key] for key in DI_KEYS if key in di}
+
+    yield di
+
+    for key in DI_KEYS:
+        if key in state:
+            di[key] = state[key]
+        elif key in di:
+            del di[key]
+
+
+@pytest.fixture(scope="session")
+def chinook_template(request, tmp_path_factory) -> Iterator[str]:
+    """Seed the template database once per session and return its connection string."""
+    url = request.config.getoption("--chinook-template-url")
+
+    if url is None:
+        url = f"sqlite:///{tmp_path_factory.mktemp('chinook') / 'template.db'}"
+
+    engine = create_engine(url)
+
+    try:
+        _seed(engine)
+    finally:
+        engine.dispose()
+
+    yield url
+
+
+def _sqlite_clone(template: str) -> Engine:
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+    source = sqlite3.connect(make_url(template).database)
+    target = engine.raw_connection()
+
+    try:
+        source.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+
+    return engine
+
+
+@pytest.fixture(scope="session")
+def _chinook_shared_engine(chinook_template) -> Iterator[Engine]:
+    engine = create_engine(chinook_template)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def chinook_engine(request, chinook_template, chinook_di) -> Iterator[Engine]:
+    """Provide an engine connected to an isolated copy of the template database."""
+    isolation = request.config.getoption("--chinook-isolation")
+    url = make_url(chinook_template)
+    admin = None
+    clone = None
+
+    if isolation == "savepoint":
+        engine = request.getfixturevalue("_chinook_shared_engine")
+    elif url.get_backend_name() == "sqlite":
+        engine = _sqlite_clone(chinook_template)
+    else:
+        clone = f"{url.database}_test_{next(_clone_ids)}"
+        admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+
+        with admin.connect() as connection:
+            connection.exec_driver_sql(
+                f'CREATE DATABASE "{clone}" TEMPLATE "{url.database}"')
+
+        engine = create_engine(url.set(database=clone))
+
+    di[Engine] = engine
+
+    yield engine
+
+    if isolation == "savepoint":
+        return
+
+    engine.dispose()
+
+    if admin is not None:
+        with admin.connect() as connection:
+            connection.exec_driver_sql(f'DROP DATABASE IF EXISTS "{clone}"')
+
+        admin.dispose()
+
+
+@pytest.fixture
+def chinook_connection(chinook_engine) -> Iterator[Connection]:
+    """Provide a connection whose transaction is rolled back after the test."""
+    connection = chinook_engine.connect()
+    transaction = connection.begin()
+
+    yield connection
+
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def chinook_session(chinook_connection) -> Iterator[Session]:
+    """Provide a session whose commits are savepoints rolled back after the test."""
+    session = Session(bind=chinook_connection, join_transaction_mode="create_savepoint")
+
+    yield session
+
+    session.close()
+
+
+@pytest.fixture
+def query_instrumentation() -> Iterator[QueryInstrumentation]:
+    """Provide a `QueryInstrumentation` that is detached after the test."""
+    instrumentation = QueryInstrumentation()
+    yield instrumentation
+    instrumentation.detach()
@@ -0,0 +1,117 @@
+"""
+queries.py
+
+Defines canonical Chinook queries used by benchmarks and examples.
+
+Each function builds a SQLAlchemy `Select` without executing it, so the same statement
+can be run, explained by the index advisor, or timed by the benchmark suite.
+
+Functions
+---------
+top_artists_by_revenue(limit: int) -> Select
+    Artists ranked by invoiced revenue.
+
+playlist_contents(playlist_id: int) -> Select
+    Tracks of a playlist with their album, artist and genre names.
+
+customer_invoice_history(customer_id: int) -> Select
+    Invoices of a customer with their line counts, newest first.
+"""
+
+from sqlalchemy import Select, func, select
+
+from .models import (
+    Albums,
+    Artists,
+    Genres,
+    InvoiceItems,
+    Invoices,
+    PlaylistTrack,
+    Tracks
+)
+
+
+def top_artists_by_revenue(limit: int = 10) -> Select:
+    """
+    Build a query ranking artists by invoiced revenue.
+
+    Parameters
+    ----------
+    limit : int
+        Number of artists to return.
+
+    Returns
+    -------
+    Select
+        Query returning `artist_id`, `name` and `revenue`, highest revenue first.
+    """
+    revenue = func.sum(InvoiceItems.unit_price * InvoiceItems.quantity).label("revenue")
+
+    return (
+        select(Artists.artist_id, Artists.name, revenue)
+        .join(Albums, Albums.artist_id == Artists.artist_id)
+        .join(Tracks, Tracks.album_id == Albums.album_id)
+        .join(InvoiceItems, InvoiceItems.track_id == Tracks.track_id)
+        .group_by(Artists.artist_id, Artists.name)
+        .order_by(revenue.desc())
+        .limit(limit)
+    )
+
+
+def playlist_contents(playlist_id: int) -> Select:
+    """
+    Build a query listing the tracks of a playlist.
+
+    Parameters
+    ----------
+    playlist_id : int
+        Identifier of the playlist.
+
+    Returns
+    -------
+    Select
+        Query returning track, album, artist and genre names ordered by track name.
+    """
+    return (
+        select(
+            Tracks.track_id,
+            Tracks.name,
+            Albums.title.label("album"),
+            Artists.name.label("artist"),
+            Genres.name.label("genre")
+        )
+        .join(PlaylistTrack, PlaylistTrack.track_id == Tracks.track_id)
+        .join(Albums, Albums.album_id == Tracks.album_id)
+        .join(Artists, Artists.artist_id == Albums.artist_id)
+        .join(Genres, Genres.genre_id == Tracks.genre_id)
+        .where(PlaylistTrack.playlist_id == playlist_id)
+        .order_by(Tracks.name)
+    )
+
+
+def customer_invoice_history(customer_id: int) -> Select:
+    """
+    Build a query listing a customer's invoices.
+
+    Parameters
+    ----------
+    customer_id : int
+        Identifier of the customer.
+
+    Returns
+    -------
+    Select
+        Query returning `invoice_id`, `invoice_date`, `total` and `lines`, newest first.
+    """
+    return (
+        select(
+            Invoices.invoice_id,
+            Invoices.invoice_date,
+            Invoices.total,
+            func.count(InvoiceItems.invoice_line_id).label("lines")
+        )
+        .join(InvoiceItems, InvoiceItems.invoice_id == Invoices.invoice_id)
+        .where(Invoices.customer_id == customer_id)
+        .group_by(Invoices.invoice_id, Invoices.invoice_date, Invoices.total)
+        .order_by(Invoices.invoice_date.desc())
+    )
@@ -0,0 +1,320 @@
+"""
+read_models.py
+
+Defines maintenance and queries of the denormalized `track_details` read model.
+
+Catalog pages show each track with its album title, artist name, genre name and media
+type name. Reading them from `tracks` needs a five-way join and, for a sorted page, a
+sort of every joined row. `track_details` stores the joined rows instead, with
+indexes on the catalog sorts, so a page becomes a single-table index range scan.
+
+The read model is kept consistent with the catalog tables by:
+
+- a full rebuild with one `INSERT ... SELECT` after seeding and bulk loads,
+- `refresh_track_details` for the rows affected by a Core write, which
+  `upsert_frame` calls for catalog tables, and
+- `TrackDetailsSync`, which refreshes the affected rows in the same transaction as
+  every ORM flush touching a catalog table. `initialize` attaches it for sessions
+  bound to the engines it seeds; sessions of other databases are left alone.
+
+Classes
+-------
+TrackDetailsSync
+    Refreshes `track_details` after ORM flushes of catalog tables.
+
+Functions
+---------
+track_details_source() -> Select
+    The five-way join the read model is derived from.
+
+refresh_track_details(connection: Connection, table: str, keys: Iterable) -> int
+    Rebuilds the whole read model or the rows affected by changed catalog rows.
+
+track_page(sort: str, after: Any, limit: int, descending: bool) -> Select
+    Fetches a page of `TrackDetails` in a catalog sort order by keyset pagination.
+"""
+
+import weakref
+from itertools import chain
+from typing import Any, Iterable, List, Optional, Tuple, Type, Union
+
+from sqlalchemy import (
+    Connection,
+    Engine,
+    Select,
+    delete,
+    event,
+    insert,
+    inspect,
+    literal,
+    select,
+    tuple_
+)
+from sqlalchemy.orm import Session
+
+from .models import Albums, Artists, Genres, MediaTypes, TrackDetails, Tracks
+
+
+# Source tables of the read model, with the `track_details` column identifying the
+# rows a changed source row affects and the matching column of the source join.
+TRACK_DETAIL_SOURCES = {
+    "tracks": (TrackDetails.track_id, Tracks.track_id),
+    "albums": (TrackDetails.album_id, Tracks.album_id),
+    "artists": (TrackDetails.artist_id, Albums.artist_id),
+    "genres": (TrackDetails.genre_id, Tracks.genre_id),
+    "media_types": (TrackDetails.media_type_id, Tracks.media_type_id)
+}
+
+SORTS = {
+    "name": TrackDetails.name,
+    "unit_price": TrackDetails.unit_price,
+    "milliseconds": TrackDetails.milliseconds
+}
+
+# Keys per `IN` list when refreshing, below every dialect's parameter limit.
+KEY_CHUNK = 5_000
+
+
+def track_details_source() -> Select:
+    """
+    Build the join the read model is derived from.
+
+    Tracks are outer-joined to their album, artist, genre and media type, so a track
+    with a missing reference still appears, with `NULL` names.
+
+    Returns
+    -------
+    Select
+        Query returning one row per track, with the columns of `track_details` in
+        table order.
+    """
+    return (
+        select(
+            Tracks.track_id,
+            Tracks.name,
+            Tracks.album_id,
+            Albums.title,
+            Albums.artist_id,
+            Artists.name,
+            Tracks.genre_id,
+            Genres.name,
+            Tracks.media_type_id,
+            MediaTypes.name,
+            Tracks.composer,
+            Tracks.milliseconds,
+            Tracks.total_bytes,
+            Tracks.unit_price
+        )
+        .outerjoin(Albums, Albums.album_id == Tracks.album_id)
+        .outerjoin(Artists, Artists.artist_id == Albums.artist_id)
+        .outerjoin(Genres, Genres.genre_id == Tracks.genre_id)
+        .outerjoin(MediaTypes, MediaTypes.media_type_id == Tracks.media_type_id)
+    )
+
+
+def _columns() -> List[str]:
+    return [column.name for column in TrackDetails.__table__.columns]
+
+
+def refresh_track_details(connection: Connection, table: Optional[str] = None,
+                          keys: Optional[Iterable] = None) -> int:
+    """
+    Rebuild the read model, or the rows affected by changed catalog rows.
+
+    Affected rows are deleted and re-derived with `INSERT ... SELECT`, which covers
+    inserted, updated and deleted source rows alike.
+
+    Parameters
+    ----------
+    connection : Connection
+        Connection inside the transaction that changed the catalog.
+
+    table : str, optional
+        Name of the changed source table, one of `TRACK_DETAIL_SOURCES`. Without it,
+        the whole read model is rebuilt.
+
+    keys : Iterable, optional
+        Primary keys of the changed rows of `table`.
+
+    Returns
+    -------
+    int
+        Number of rows written to `track_details`.
+
+    Raises
+    ------
+    ValueError
+        If `table` is not a source of the read model.
+    """
+    target = TrackDetails.__table__
+
+    if table is None:
+        connection.execute(delete(target))
+        return connection.execute(
+            insert(target).from_select(_columns(), track_details_source())).rowcount
+
+    if table not in TRACK_DETAIL_SOURCES:
+        raise ValueError(f"`{table}` is not a source of `track_details`.")
+
+    detail_column, source_column = TRACK_DETAIL_SOURCES[table]
+    keys = list(dict.fromkeys(keys or ()))
+    written = 0
+
+    for start in range(0, len(keys), KEY_CHUNK):
+        chunk = keys[start:start + KEY_CHUNK]
+        connection.execute(delete(target).where(detail_column.in_(chunk)))
+        written += connection.execute(
+            insert(target).from_select(
+                _columns(), track_details_source().where(source_column.in_(chunk)))
+        ).rowcount
+
+    return written
+
+
+class TrackDetailsSync:
+    """
+    Refreshes `track_details` after ORM flushes of catalog tables.
+
+    The affected rows are refreshed inside the flush's transaction, so readers never
+    see the catalog change without the read model change.
+
+    Parameters
+    ----------
+    engines : Iterable[Engine], optional
+        Engines whose sessions are refreshed; more are added with `watch`. Defaults
+        to the engines of every session the instance is attached to.
+
+    Examples
+    --------
+    >>> sync = TrackDetailsSync().attach()
+    >>> with Session(engine) as session:
+    ...     session.get(Genres, 1).name = "Rock & Roll"
+    ...     session.commit()
+    >>> sync.detach()
+    """
+
+    def __init__(self, engines: Optional[Iterable[Engine]] = None):
+        self._targets = []
+        self.engines = None if engines is None else weakref.WeakSet(engines)
+
+    def watch(self, engine: Engine) -> "TrackDetailsSync":
+        """
+        Refresh the read model for sessions bound to an engine.
+
+        Has no effect on instances without an engine filter, which refresh it for
+        every engine.
+
+        Parameters
+        ----------
+        engine : Engine
+            Engine of a database with the read model.
+
+        Returns
+        -------
+        TrackDetailsSync
+            This instance, for chaining.
+        """
+        if self.engines is not None:
+            self.engines.add(engine)
+
+        return self
+
+    def attach(self, target: Union[Session, Type[Session]] = Session) -> "TrackDetailsSync":
+        """
+        Start refreshing after flushes of a session or of every session of a class.
+
+        Attaching to a target this instance already listens to has no effect.
+
+        Parameters
+        ----------
+        target : Session or type
+            Session instance, `Session` subclass or `sessionmaker` to listen to.
+            Defaults to every `Session`.
+
+        Returns
+        -------
+        TrackDetailsSync
+            This instance, for chaining.
+        """
+        if not event.contains(target, "after_flush", self._after_flush):
+            event.listen(target, "after_flush", self._after_flush)
+            self._targets.append(target)
+
+        return self
+
+    def detach(self):
+        """Stop refreshing on every target this instance is attached to."""
+        for target in self._targets:
+            if event.contains(target, "after_flush", self._after_flush):
+                event.remove(target, "after_flush", self._after_flush)
+
+        self._targets.clear()
+
+    def _after_flush(self, session: Session, flush_context):
+        changed = {}
+
+        for instance in chain(session.new, session.dirty, session.deleted):
+            mapper = inspect(instance).mapper
+            table = mapper.local_table.name
+
+            if table in TRACK_DETAIL_SOURCES and (
+                    self.engines is None or session.get_bind(mapper).engine in self.engines):
+                key, = mapper.primary_key_from_instance(instance)
+                changed.setdefault(table, []).append(key)
+
+        for table, keys in changed.items():
+            refresh_track_details(session.connection(), table, keys)
+
+
+def track_page(sort: str = "name", after: Any = None, limit: int = 50,
+               descending: bool = False) -> Select[Tuple[TrackDetails]]:
+    """
+    Build a query fetching one page of the catalog from the read model.
+
+    Pages are ordered by the sort column and then `track_id`, and continue after the
+    last row of the previous page (keyset pagination). Each page is a range scan of
+    the sort's index, however deep into the catalog it is.
+
+    Parameters
+    ----------
+    sort : str
+        Sort column: `name`, `unit_price` or `milliseconds`.
+
+    after : TrackDetails, optional
+        Last row of the previous page, or any object with the sort attribute and
+        `track_id`, such as a result row. Omit it for the first page.
+
+    limit : int
+        Rows per page.
+
+    descending : bool
+        Whether to sort from the highest value to the lowest.
+
+    Returns
+    -------
+    Select[Tuple[TrackDetails]]
+        Query returning `TrackDetails` entities.
+
+    Raises
+    ------
+    ValueError
+        If `sort` is not a supported sort column.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"`sort` must be one of {tuple(SORTS)}.")
+
+    column = SORTS[sort]
+    key = tuple_(column, TrackDetails.track_id)
+    statement = select(TrackDetails)
+
+    if after is not None:
+        # Typed literals, so the values get the columns' bind processing, such as
+        # the conversion of `Money` amounts to stored cents.
+        position = tuple_(literal(getattr(after, sort), column.type),
+                          literal(after.track_id, TrackDetails.track_id.type))
+        statement = statement.where(key < position if descending else key > position)
+
+    if descending:
+        return statement.order_by(column.desc(), TrackDetails.track_id.desc()).limit(limit)
+
+    return statement.order_by(column, TrackDetails.track_id).limit(limit)
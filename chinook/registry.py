@@ -0,0 +1,258 @@
+"""
+registry.py
+
+Defines a registry of named SQLAlchemy engines.
+
+`kink.di[Engine]` holds a single engine. Processes working with several Chinook
+databases at once (tenants, a primary and its replicas, parallel test workers)
+register each database under a name instead. Engines are created lazily on first use
+by `create_db_engine`, each with its own connection pool, and cached until disposed.
+
+The bootstrap registers one `EngineRegistry` in the `kink` container, and
+`initialize()` adds the engine it seeds under its `name` argument.
+
+Classes
+-------
+EngineRegistry
+    Thread-safe registry of lazily created, cached engines keyed by name.
+
+HashRouter
+    Routes keys such as tenant or customer ids to registered names by stable hash.
+"""
+
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence
+
+from kink import di
+from sqlalchemy import Engine
+
+from .models.engine import create_db_engine
+from .protocols.sql_alchemy_config import ISQLAlchemyConfig
+
+
+DEFAULT_ENGINE = "default"
+
+
+class HashRouter:
+    """
+    Routes keys to names by a stable hash.
+
+    The hash is CRC-32 of the key's string form, so a key always maps to the same
+    name across processes, unlike Python's salted `hash()`.
+
+    Parameters
+    ----------
+    names : Sequence[str]
+        Candidate names. Order matters: changing it remaps keys.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        if not names:
+            raise ValueError("`names` must not be empty.")
+
+        self.names = list(names)
+
+    def __call__(self, key: Hashable) -> str:
+        return self.names[zlib.crc32(str(key).encode()) % len(self.names)]
+
+
+class EngineRegistry:
+    """
+    Registry of named engines.
+
+    Examples
+    --------
+    >>> registry = di[EngineRegistry]
+    >>> registry.register("tenant_a", config_a, pool_size=5)
+    >>> registry.register("tenant_b", config_b)
+    >>> registry.get_engine("tenant_a") is registry.get_engine("tenant_a")
+    True
+    >>> registry.route(customer_id, HashRouter(["tenant_a", "tenant_b"]))
+    """
+
+    def __init__(self):
+        self._configs: Dict[str, ISQLAlchemyConfig] = {}
+        self._options: Dict[str, Dict[str, Any]] = {}
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._configs or name in self._engines
+
+    def names(self) -> List[str]:
+        """Returns every registered name."""
+        with self._lock:
+            return list(dict.fromkeys([*self._configs, *self._engines]))
+
+    def register(self, name: str, config: ISQLAlchemyConfig, **engine_options: Any):
+        """
+        Register a database configuration under a name.
+
+        The engine is not created until `get_engine` is first called. Re-registering
+        a name disposes the engine previously created for it.
+
+        Parameters
+        ----------
+        name : str
+            Name of the database.
+
+        config : ISQLAlchemyConfig
+            Configuration providing the connection string.
+
+        **engine_options
+            Keyword arguments passed to `create_engine`, such as pool settings.
+        """
+        with self._lock:
+            self.dispose(name)
+            self._configs[name] = config
+            self._options[name] = engine_options
+
+    def register_engine(self, name: str, engine: Engine,
+                        config: Optional[ISQLAlchemyConfig] = None):
+        """
+        Register an engine that has already been created.
+
+        Parameters
+        ----------
+        name : str
+            Name of the database.
+
+        engine : Engine
+            Engine to register. Any other engine previously registered under `name`
+            is disposed and replaced.
+
+        config : ISQLAlchemyConfig, optional
+            Configuration the engine was built from, kept so that the engine can be
+            recreated after `dispose`.
+        """
+        with self._lock:
+            previous = self._engines.get(name)
+
+            if previous is not None and previous is not engine:
+                previous.dispose()
+
+            self._engines[name] = engine
+
+            if config is not None:
+                self._configs[name] = config
+                self._options.setdefault(name, {})
+
+    def get_engine(self, name: str = DEFAULT_ENGINE) -> Engine:
+        """
+        Return the engine registered under a name, creating it on first use.
+
+        Parameters
+        ----------
+        name : str
+            Name of the database.
+
+        Returns
+        -------
+        Engine
+            The cached engine.
+
+        Raises
+        ------
+        KeyError
+            If nothing is registered under `name`.
+        """
+        engine = self._engines.get(name)
+
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            if name in self._engines:
+                return self._engines[name]
+
+            if name not in self._configs:
+                raise KeyError(f"No engine registered under `{name}`.")
+
+            engine = create_db_engine(
+                sql_config=self._configs[name], engine_options=self._options[name])
+            self._engines[name] = engine
+
+            return engine
+
+    def route(self, key: Hashable, router: Optional[Callable[[Hashable], str]] = None) -> Engine:
+        """
+        Return the engine a key routes to.
+
+        Parameters
+        ----------
+        key : Hashable
+            Routing key, such as a tenant or customer id.
+
+        router : Callable, optional
+            Maps a key to a registered name. Defaults to a `HashRouter` over every
+            registered name, in registration order.
+
+        Returns
+        -------
+        Engine
+            The engine for the routed name.
+        """
+        router = router or HashRouter(self.names())
+        return self.get_engine(router(key))
+
+    @contextmanager
+    def using(self, name: str) -> Iterator[Engine]:
+        """
+        Temporarily make a registered engine the default `di[Engine]`.
+
+        Parameters
+        ----------
+        name : str
+            Name of the database.
+
+        Yields
+        ------
+        Engine
+            The engine registered under `name`.
+        """
+        engine = self.get_engine(name)
+        previous = di[Engine] if Engine in di else None
+        di[Engine] = engine
+
+        try:
+            yield engine
+        finally:
+            if previous is None:
+                del di[Engine]
+            else:
+                di[Engine] = previous
+
+    def dispose(self, name: Optional[str] = None):
+        """
+        Dispose cached engines. Configurations stay registered, so a later
+        `get_engine` call creates a fresh engine.
+
+        Parameters
+        ----------
+        name : str, optional
+            Name of the engine to dispose. Disposes every engine when omitted.
+        """
+        with self._lock:
+            names = list(self._engines) if name is None else [name]
+
+            for target in names:
+                engine = self._engines.pop(target, None)
+
+                if engine is not None:
+                    engine.dispose()
+
+    def unregister(self, name: str):
+        """
+        Dispose the engine registered under a name and forget its configuration.
+
+        Parameters
+        ----------
+        name : str
+            Name of the database.
+        """
+        with self._lock:
+            self.dispose(name)
+            self._configs.pop(name, None)
+            self._options.pop(name, None)
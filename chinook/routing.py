@@ -0,0 +1,304 @@
+"""
+routing.py
+
+Defines a session that routes statements between a primary database and its read
+replicas.
+
+`RoutingSession` sends flushes, DML statements and `SELECT ... FOR UPDATE` to the
+primary and spreads other reads across the replicas. Once a transaction has written
+to the primary, its later reads also go to the primary until the transaction ends, so
+a session always reads its own writes regardless of replication lag.
+
+Replicas are configured through `ISQLAlchemyConfig.replica_connection_strings`, which
+the bootstrap reads from the comma-separated `CHINOOK_REPLICA_CONN_STRINGS`
+environment variable. Without replicas every statement goes to the primary.
+
+Classes
+-------
+RoundRobin
+    Replica selection policy cycling through the replicas.
+
+LeastLatency
+    Replica selection policy picking the replica with the lowest recent latency.
+
+ReplicaSet
+    A primary engine, its replica engines and a selection policy.
+
+RoutingSession
+    `Session` routing reads to replicas and writes to the primary.
+
+Functions
+---------
+create_replica_set(sql_config: ISQLAlchemyConfig, policy: str) -> ReplicaSet
+    Creates the engines of a replica set from the registered configuration.
+"""
+
+import threading
+from itertools import count
+from time import perf_counter
+from typing import Any, Dict, Optional, Sequence
+
+from kink import inject
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from .models.engine import create_db_engine
+from .protocols.sql_alchemy_config import ISQLAlchemyConfig
+
+
+class RoundRobin:
+    """
+    Picks replicas in turn.
+    """
+
+    def __init__(self):
+        self._counter = count()
+        self._lock = threading.Lock()
+
+    def __call__(self, replicas: Sequence[Engine]) -> Engine:
+        with self._lock:
+            return replicas[next(self._counter) % len(replicas)]
+
+
+class LeastLatency:
+    """
+    Picks the replica with the lowest recent statement latency.
+
+    Latency is tracked per replica as an exponentially weighted moving average of
+    cursor execution times. Replicas that have not served a statement yet are
+    preferred, so every replica gets measured.
+
+    Parameters
+    ----------
+    alpha : float
+        Weight of the newest observation in the moving average.
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.latency: Dict[Engine, float] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, engine: Engine):
+        """
+        Start measuring statement latency on a replica engine.
+
+        Parameters
+        ----------
+        engine : Engine
+            Replica engine to measure.
+        """
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def observe(self, engine: Engine, seconds: float):
+        """
+        Record a statement latency for a replica.
+
+        Parameters
+        ----------
+        engine : Engine
+            Replica that served the statement.
+
+        seconds : float
+            Time the statement took.
+        """
+        with self._lock:
+            previous = self.latency.get(engine)
+            self.latency[engine] = seconds if previous is None \
+                else self.alpha * seconds + (1 - self.alpha) * previous
+
+    def __call__(self, replicas: Sequence[Engine]) -> Engine:
+        with self._lock:
+            return min(replicas, key=lambda replica: self.latency.get(replica, 0.0))
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("chinook_replica_start", []).append(perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.observe(conn.engine, perf_counter() - conn.info["chinook_replica_start"].pop())
+
+    def _handle_error(self, context):
+        # A failed statement skips `after_cursor_execute`; drop its start time so
+        # the stack stays balanced for the connection's next statement.
+        if context.connection is None or context.execution_context is None:
+            return
+
+        started = context.connection.info.get("chinook_replica_start")
+
+        if started:
+            started.pop()
+
+
+POLICIES = {
+    "round_robin": RoundRobin,
+    "least_latency": LeastLatency
+}
+
+
+class ReplicaSet:
+    """
+    A primary engine and its read replicas.
+
+    Parameters
+    ----------
+    primary : Engine
+        Engine receiving every write.
+
+    replicas : Sequence[Engine]
+        Engines serving reads. When empty, reads go to the primary.
+
+    policy : str
+        Replica selection policy, `round_robin` or `least_latency`.
+
+    Examples
+    --------
+    >>> replica_set = create_replica_set(policy="least_latency")
+    >>> with replica_set.sessionmaker()() as session:
+    ...     session.scalars(select(Tracks).limit(10)).all()
+    """
+
+    def __init__(self, primary: Engine, replicas: Sequence[Engine] = (),
+                 policy: str = "round_robin"):
+        if policy not in POLICIES:
+            raise ValueError(f"`policy` must be one of {tuple(POLICIES)}.")
+
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.policy = POLICIES[policy]()
+
+        if isinstance(self.policy, LeastLatency):
+            for replica in self.replicas:
+                self.policy.attach(replica)
+
+    def reader(self) -> Engine:
+        """Returns the engine the next read should use."""
+        if not self.replicas:
+            return self.primary
+
+        return self.policy(self.replicas)
+
+    def sessionmaker(self, **kwargs: Any) -> sessionmaker:
+        """
+        Return a session factory producing `RoutingSession` objects for this set.
+
+        Parameters
+        ----------
+        **kwargs
+            Keyword arguments passed to `sessionmaker`.
+
+        Returns
+        -------
+        sessionmaker
+            The session factory.
+        """
+        return sessionmaker(class_=RoutingSession, replica_set=self, **kwargs)
+
+    def dispose(self):
+        """Dispose the primary and every replica engine."""
+        for engine in [self.primary, *self.replicas]:
+            engine.dispose()
+
+
+class _ReplicaConfig:
+    """The primary's configuration with the connection string of one replica."""
+
+    def __init__(self, config: ISQLAlchemyConfig, connection_string: str):
+        self._config = config
+        self.connection_string = connection_string
+        self.replica_connection_strings = ()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._config, name)
+
+
+@inject()
+def create_replica_set(
+    sql_config: Optional[ISQLAlchemyConfig] = None,
+    policy: str = "round_robin"
+) -> ReplicaSet:
+    """
+    Create a replica set from the registered configuration.
+
+    Parameters
+    ----------
+    sql_config : ISQLAlchemyConfig, optional
+        Configuration providing the primary connection string and, optionally,
+        `replica_connection_strings`.
+
+    policy : str
+        Replica selection policy, `round_robin` or `least_latency`.
+
+    Returns
+    -------
+    ReplicaSet
+        The primary engine and one engine per replica. Replica engines are built by
+        `create_db_engine` with the primary's engine options, pragmas, money storage
+        and read-only mode.
+    """
+    if sql_config is None:
+        raise ValueError("`sql_config` must be provided.")
+
+    primary = create_db_engine(sql_config=sql_config)
+    replicas = [
+        create_db_engine(sql_config=_ReplicaConfig(sql_config, connection_string))
+        for connection_string in getattr(sql_config, "replica_connection_strings", ())
+    ]
+
+    return ReplicaSet(primary, replicas, policy)
+
+
+class RoutingSession(Session):
+    """
+    Session routing reads to replicas and writes to the primary.
+
+    A statement is sent to the primary when the session is flushing, when it is an
+    `INSERT`, `UPDATE` or `DELETE`, or when it locks rows with `FOR UPDATE`. After
+    that, the rest of the transaction sticks to the primary. Textual SQL cannot be
+    classified; call `use_primary()` before executing writes through `text()`.
+
+    Parameters
+    ----------
+    replica_set : ReplicaSet
+        Engines to route between.
+
+    **kwargs
+        Keyword arguments passed to `Session`.
+    """
+
+    def __init__(self, replica_set: ReplicaSet, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.replica_set = replica_set
+        self.sticky = False
+
+    def use_primary(self):
+        """Send every statement to the primary until the transaction ends."""
+        self.sticky = True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        bind = kwargs.get("bind")
+
+        if bind is not None:
+            return bind
+
+        # pylint: disable=protected-access
+        writes = (
+            self._flushing
+            or getattr(clause, "is_dml", False)
+            or getattr(clause, "_for_update_arg", None) is not None
+        )
+
+        if writes:
+            self.sticky = True
+
+        if self.sticky:
+            return self.replica_set.primary
+
+        return self.replica_set.reader()
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_primary(session, transaction):
+    if transaction.parent is None and isinstance(session, RoutingSession):
+        session.sticky = False
@@ -0,0 +1,169 @@
+"""
+scaling.py
+
+Generates scaled copies of the Chinook sample data.
+
+A scale factor of `n` replicates the catalog (artists, albums, tracks), the customer
+base and the sales history (invoices and their lines) `n` times with offset primary
+keys, and re-points every foreign key to the matching copy. Lookup tables (genres,
+media types, playlists and employees) are kept as-is, so playlists grow `n` times.
+
+Functions
+---------
+scale_sample_data(factor: int) -> Dict[type, pd.DataFrame]
+    Returns scaled sample DataFrames keyed by model.
+
+seed_scaled_data(engine: Engine, factor: int, batch_size: int, jobs: int) -> Dict[str, int]
+    Bulk-inserts scaled sample data and returns row counts per table.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Engine
+
+from .commit_samples import SAMPLE_TABLES, insert_frame
+from .read_models import refresh_track_details
+from .models import (
+    Albums,
+    Artists,
+    Customers,
+    InvoiceItems,
+    Invoices,
+    PlaylistTrack,
+    Tracks
+)
+
+
+# Replicated tables, their primary key, and the replicated tables their foreign keys
+# point to.
+REPLICATED = {
+    Artists: ("artist_id", {}),
+    Albums: ("album_id", {"artist_id": Artists}),
+    Tracks: ("track_id", {"album_id": Albums}),
+    Customers: ("customer_id", {}),
+    Invoices: ("invoice_id", {"customer_id": Customers}),
+    InvoiceItems: ("invoice_line_id", {"invoice_id": Invoices, "track_id": Tracks}),
+    PlaylistTrack: (None, {"track_id": Tracks})
+}
+
+
+def scale_sample_data(factor: int) -> Dict[type, pd.DataFrame]:
+    """
+    Build scaled copies of the sample data.
+
+    Parameters
+    ----------
+    factor : int
+        Number of copies of the replicated tables. A factor of 1 returns the
+        sample data unchanged.
+
+    Returns
+    -------
+    Dict[type, pd.DataFrame]
+        Sample DataFrames keyed by model, in `SAMPLE_TABLES` order.
+
+    Raises
+    ------
+    ValueError
+        If `factor` is smaller than 1.
+    """
+    if factor < 1:
+        raise ValueError("`factor` must be at least 1.")
+
+    frames = {model: loader() for model, loader in SAMPLE_TABLES}
+
+    if factor == 1:
+        return frames
+
+    offsets = {
+        model: int(frames[model][key].max())
+        for model, (key, _) in REPLICATED.items() if key is not None
+    }
+    copies = np.arange(factor)
+
+    for model, (key, references) in REPLICATED.items():
+        frame = frames[model]
+        scaled = frame.loc[np.tile(frame.index.to_numpy(), factor)].reset_index(drop=True)
+        copy = np.repeat(copies, len(frame))
+
+        for column, target in ([(key, model)] if key else []) + list(references.items()):
+            values = scaled[column].to_numpy()
+            scaled[column] = values + copy * offsets[target]
+
+        frames[model] = scaled
+
+    return frames
+
+
+def _insert_part(engine: Engine, table, frame: pd.DataFrame, batch_size: int):
+    with engine.begin() as connection:
+        insert_frame(connection, table, frame, batch_size)
+
+
+def seed_scaled_data(engine: Engine, factor: int, batch_size: int = 10_000,
+                     jobs: int = 1) -> Dict[str, int]:
+    """
+    Bulk-insert scaled sample data into an empty Chinook schema.
+
+    With one job every row is inserted in a single transaction. With more, the rows
+    of each table are split into `jobs` parts inserted concurrently, each on its own
+    connection and in its own transaction, one table after another so foreign keys
+    are satisfied. A failure then leaves the tables seeded so far in place.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine connected to a database whose schema already exists.
+
+    factor : int
+        Scale factor, as accepted by `scale_sample_data`.
+
+    batch_size : int
+        Rows per `executemany` batch.
+
+    jobs : int
+        Number of concurrent writers.
+
+    Returns
+    -------
+    Dict[str, int]
+        Rows inserted per table, including the rebuilt `track_details` read model.
+
+    Raises
+    ------
+    ValueError
+        If `jobs` is below 1, or above 1 on SQLite, which serializes writers.
+    """
+    if jobs < 1:
+        raise ValueError("`jobs` must be positive.")
+
+    if jobs > 1 and engine.dialect.name == "sqlite":
+        raise ValueError("SQLite serializes writers; seed it with a single job.")
+
+    frames = scale_sample_data(factor)
+    counts = {model.__tablename__: len(frame) for model, frame in frames.items()}
+
+    if jobs == 1:
+        with engine.begin() as connection:
+            for model, frame in frames.items():
+                insert_frame(connection, model.__table__, frame, batch_size)
+
+            counts["track_details"] = refresh_track_details(connection)
+
+        return counts
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for model, frame in frames.items():
+            parts = [frame.iloc[rows] for rows in np.array_split(np.arange(len(frame)), jobs)]
+            list(executor.map(
+                lambda part, table=model.__table__: _insert_part(engine, table, part, batch_size),
+                [part for part in parts if len(part)]
+            ))
+
+    with engine.begin() as connection:
+        counts["track_details"] = refresh_track_details(connection)
+
+    return counts
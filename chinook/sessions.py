@@ -0,0 +1,234 @@
+"""
+sessions.py
+
+Defines the session factories registered in the `kink` container and unit-of-work
+helpers.
+
+`initialize()` registers a `sessionmaker` bound to the default engine as
+`di[sessionmaker]`, and a `scoped_session` over it as `di[scoped_session]`. The scoped
+session hands out one session per thread, or per asyncio task with the `task`
+scope, so sessions are never shared between concurrent workers. Call
+`di[scoped_session].remove()` when a request or task ends to close its session.
+
+`unit_of_work()` wraps a new session in a transaction that is committed on success
+and rolled back on error, with per-unit `expire_on_commit` and `autoflush`.
+`clear_periodically()` keeps the identity map of long-running streaming jobs bounded
+by flushing or committing and expunging every loaded object after each batch.
+
+Functions
+---------
+create_session_factory(engine: Engine, scope: str, ...) -> scoped_session
+    Creates a scoped session factory bound to an engine.
+
+register_sessions(engine: Engine, config: ISQLAlchemyConfig) -> scoped_session
+    Registers the session factories of an engine in the container.
+
+unit_of_work(expire_on_commit: bool, autoflush: bool, factory) -> Iterator[Session]
+    Runs a block in a session and transaction of its own.
+
+clear_periodically(session: Session, items: Iterable, every: int, commit: bool)
+    Yields items, clearing the session's identity map after every batch.
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Callable, Hashable, Iterable, Iterator, Optional, TypeVar
+
+from kink import di
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+
+from .config import SESSION_SCOPES
+from .protocols.sql_alchemy_config import ISQLAlchemyConfig
+
+
+T = TypeVar("T")
+
+
+def _task_scope() -> Hashable:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+
+    return task if task is not None else threading.get_ident()
+
+
+def create_session_factory(engine: Engine, scope: str = "thread",
+                           expire_on_commit: bool = True,
+                           autoflush: bool = True) -> scoped_session:
+    """
+    Create a scoped session factory bound to an engine.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine sessions are bound to.
+
+    scope : str
+        `thread` for one session per thread, or `task` for one session per asyncio
+        task, falling back to the thread outside of tasks.
+
+    expire_on_commit : bool
+        Whether objects are expired, and reloaded on next access, after commit.
+
+    autoflush : bool
+        Whether pending changes are flushed before queries.
+
+    Returns
+    -------
+    scoped_session
+        The scoped factory. Its `session_factory` is the underlying `sessionmaker`.
+    """
+    if scope not in SESSION_SCOPES:
+        raise ValueError(f"`scope` must be one of {SESSION_SCOPES}.")
+
+    factory = sessionmaker(engine, expire_on_commit=expire_on_commit, autoflush=autoflush)
+
+    return scoped_session(factory, scopefunc=_task_scope if scope == "task" else None)
+
+
+def register_sessions(engine: Engine, config: ISQLAlchemyConfig) -> scoped_session:
+    """
+    Register the session factories of an engine in the container.
+
+    Any scoped session registered before is removed first, closing its sessions.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine sessions are bound to.
+
+    config : ISQLAlchemyConfig
+        Configuration providing `session_scope`, `expire_on_commit` and `autoflush`.
+        Configurations without them get thread-local sessions with SQLAlchemy's
+        defaults.
+
+    Returns
+    -------
+    scoped_session
+        The factory registered as `di[scoped_session]`; its `sessionmaker` is
+        registered as `di[sessionmaker]`.
+    """
+    if scoped_session in di:
+        di[scoped_session].remove()
+
+    sessions = create_session_factory(
+        engine,
+        scope=getattr(config, "session_scope", "thread"),
+        expire_on_commit=getattr(config, "expire_on_commit", True),
+        autoflush=getattr(config, "autoflush", True)
+    )
+    di[sessionmaker] = sessions.session_factory
+    di[scoped_session] = sessions
+
+    return sessions
+
+
+@contextmanager
+def unit_of_work(expire_on_commit: Optional[bool] = None, autoflush: Optional[bool] = None,
+                 factory: Optional[Callable[..., Session]] = None) -> Iterator[Session]:
+    """
+    Run a block in a session and transaction of its own.
+
+    The transaction is committed when the block exits normally and rolled back when
+    it raises. The session is closed either way. The block may commit on its own, as
+    `clear_periodically(commit=True)` does; the session then begins a new transaction
+    that is committed or rolled back the same way.
+
+    Parameters
+    ----------
+    expire_on_commit : bool, optional
+        Overrides the factory's setting for this unit.
+
+    autoflush : bool, optional
+        Overrides the factory's setting for this unit.
+
+    factory : sessionmaker, optional
+        Factory of the session. Defaults to `di[sessionmaker]`.
+
+    Yields
+    ------
+    Session
+        The unit's session, inside a transaction.
+
+    Examples
+    --------
+    >>> with unit_of_work(expire_on_commit=False) as session:
+    ...     session.add(Genres(genre_id=26, name="Ambient"))
+    """
+    factory = di[sessionmaker] if factory is None else factory
+    overrides = {}
+
+    if expire_on_commit is not None:
+        overrides["expire_on_commit"] = expire_on_commit
+
+    if autoflush is not None:
+        overrides["autoflush"] = autoflush
+
+    with factory(**overrides) as session:
+        try:
+            yield session
+        except BaseException:
+            session.rollback()
+            raise
+
+        session.commit()
+
+
+def clear_periodically(session: Session, items: Iterable[T], every: int = 1_000,
+                       commit: bool = False) -> Iterator[T]:
+    """
+    Yield items, clearing the session's identity map after every batch.
+
+    After each `every` items, and after the last one, pending changes are flushed,
+    or committed with `commit`, and every object is expunged, so memory stays
+    bounded however many items are processed. Objects loaded in earlier batches
+    are detached and must not be used afterwards.
+
+    Parameters
+    ----------
+    session : Session
+        Session the items are processed in.
+
+    items : Iterable
+        Items to process, such as rows streamed with `yield_per`.
+
+    every : int
+        Items per batch.
+
+    commit : bool
+        Whether to commit each batch instead of only flushing it. Leave it off when
+        `items` are streamed from the same session, whose result would not survive
+        the commit.
+
+    Yields
+    ------
+    Any
+        Each item, in order.
+    """
+    if every < 1:
+        raise ValueError("`every` must be positive.")
+
+    def checkpoint():
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+
+        # Objects are expunged one by one rather than with `expunge_all()`, which
+        # replaces the identity map that a streamed result is still loading into.
+        for instance in list(session.identity_map.values()):
+            session.expunge(instance)
+
+    count = 0
+
+    for count, item in enumerate(items, 1):
+        yield item
+
+        if count % every == 0:
+            checkpoint()
+
+    if count % every:
+        checkpoint()
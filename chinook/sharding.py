@@ -0,0 +1,481 @@
+"""
+sharding.py
+
+Defines horizontal sharding of customers and their sales by `customer_id`.
+
+`Customers`, `Invoices` and `InvoiceItems` are split across shards: a customer, its
+invoices and their lines always live on the same shard, chosen from the customer id by
+a hash or range router. Every other table is catalog or reference data and is
+replicated in full to every shard, so joins between sales and the catalog stay local
+to a shard.
+
+`ShardSet.sessionmaker()` builds sessions on SQLAlchemy's horizontal sharding
+extension. Queries filtering on `customer_id` with `=` or `IN` are sent only to the
+shards owning those customers, queries reading only catalog tables (in any FROM
+clause, join or subquery) are sent to a single shard, and all other queries are sent
+to every shard and their results merged.
+
+Primary keys of sharded tables must be assigned by the application: each shard has its
+own autoincrement sequence, so database-generated ids would collide across shards.
+Catalog tables are read-only through sharded sessions; write them to every shard with
+`ShardSet.broadcast`.
+
+Classes
+-------
+RangeRouter
+    Routes integer keys to names by range boundaries.
+
+ShardSet
+    A set of shard engines with routing, seeding and scatter-gather helpers.
+
+Functions
+---------
+customer_filter(statement: Executable, parameters: Mapping) -> Optional[List[int]]
+    Extracts the customer ids a statement's WHERE clause restricts it to.
+"""
+
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence
+)
+
+import pandas as pd
+from sqlalchemy import Engine, Executable, select
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+from sqlalchemy.sql.expression import TableClause
+from sqlalchemy.sql.visitors import iterate
+
+from .models import Customers, InvoiceItems, Invoices, init_db
+from .registry import EngineRegistry, HashRouter
+
+
+SHARDED_MODELS = (Customers, Invoices, InvoiceItems)
+
+_SHARDED_TABLES = {model.__table__ for model in SHARDED_MODELS}
+
+_SHARDED_TABLE_NAMES = {table.name for table in _SHARDED_TABLES}
+
+
+class RangeRouter:
+    """
+    Routes integer keys to names by range.
+
+    Parameters
+    ----------
+    boundaries : Sequence[int]
+        Ascending exclusive upper bounds of every range but the last.
+
+    names : Sequence[str]
+        One name per range, so one more than there are boundaries.
+
+    Examples
+    --------
+    >>> router = RangeRouter([30], ["shard_a", "shard_b"])
+    >>> router(29), router(30)
+    ('shard_a', 'shard_b')
+    """
+
+    def __init__(self, boundaries: Sequence[int], names: Sequence[str]):
+        if len(names) != len(boundaries) + 1:
+            raise ValueError("`names` must have one more entry than `boundaries`.")
+
+        if list(boundaries) != sorted(boundaries):
+            raise ValueError("`boundaries` must be in ascending order.")
+
+        self.boundaries = list(boundaries)
+        self.names = list(names)
+
+    def __call__(self, key: int) -> str:
+        return self.names[bisect_right(self.boundaries, key)]
+
+
+def _comparison(expression, parameters: Mapping[str, Any]) -> Optional[List[int]]:
+    if not isinstance(expression, BinaryExpression):
+        return None
+
+    column, value = expression.left, expression.right
+
+    if isinstance(column, BindParameter):
+        column, value = value, column
+
+    if getattr(column, "key", None) != "customer_id" \
+            or getattr(column, "table", None) not in _SHARDED_TABLES \
+            or not isinstance(value, BindParameter):
+        return None
+
+    value = parameters.get(value.key, value.effective_value)
+
+    if value is None:
+        return None
+
+    if expression.operator is operators.eq:
+        return [value]
+
+    if expression.operator is operators.in_op:
+        return list(value)
+
+    return None
+
+
+def customer_filter(statement: Executable,
+                    parameters: Optional[Mapping[str, Any]] = None) -> Optional[List[int]]:
+    """
+    Extract the customer ids a statement is restricted to.
+
+    Only `customer_id = :value` and `customer_id IN (...)` comparisons on a sharded
+    table that are joined to the rest of the WHERE clause by `AND` are considered.
+    Anything else, including comparisons nested in an `OR`, could match customers on
+    any shard.
+
+    Parameters
+    ----------
+    statement : Executable
+        Statement to inspect.
+
+    parameters : Mapping[str, Any], optional
+        Parameters the statement is executed with, overriding bound values.
+
+    Returns
+    -------
+    List[int], optional
+        Customer ids the statement is restricted to, or `None` when it is not
+        restricted by customer.
+    """
+    where = getattr(statement, "whereclause", None)
+
+    if where is None:
+        return None
+
+    if isinstance(where, BooleanClauseList) and where.operator is operators.and_:
+        expressions = list(where.clauses)
+    else:
+        expressions = [where]
+
+    for expression in expressions:
+        customer_ids = _comparison(expression, parameters or {})
+
+        if customer_ids is not None:
+            return customer_ids
+
+    return None
+
+
+class ShardSet:
+    """
+    Shards of the Chinook database.
+
+    Parameters
+    ----------
+    engines : Dict[str, Engine]
+        Engine of every shard keyed by shard name.
+
+    router : Callable, optional
+        Maps a customer id to a shard name. Defaults to a `HashRouter` over the shard
+        names, in the order given.
+
+    Examples
+    --------
+    >>> shards = ShardSet({"a": engine_a, "b": engine_b})
+    >>> shards.create_all()
+    >>> commit_sample_data(shards)
+    >>> with shards.sessionmaker()() as session:
+    ...     session.scalars(select(Invoices).where(Invoices.customer_id == 7)).all()
+    """
+
+    def __init__(self, engines: Dict[str, Engine],
+                 router: Optional[Callable[[Hashable], str]] = None):
+        if not engines:
+            raise ValueError("`engines` must not be empty.")
+
+        self.engines = dict(engines)
+        self.names = list(self.engines)
+        self.router = router or HashRouter(self.names)
+        self._invoice_shards: Dict[int, str] = {}
+
+    @classmethod
+    def from_registry(cls, registry: EngineRegistry, names: Sequence[str],
+                      router: Optional[Callable[[Hashable], str]] = None) -> "ShardSet":
+        """
+        Build a shard set from engines registered in an `EngineRegistry`.
+
+        Parameters
+        ----------
+        registry : EngineRegistry
+            Registry holding the shard engines.
+
+        names : Sequence[str]
+            Registered names of the shards.
+
+        router : Callable, optional
+            Maps a customer id to a shard name.
+
+        Returns
+        -------
+        ShardSet
+            The shard set.
+        """
+        return cls({name: registry.get_engine(name) for name in names}, router)
+
+    def shard_for(self, customer_id: int) -> str:
+        """Returns the name of the shard owning a customer."""
+        return self.router(int(customer_id))
+
+    def create_all(self):
+        """Create the Chinook schema on every shard."""
+        for engine in self.engines.values():
+            init_db(engine)
+
+    def partition_frames(
+        self, frames: Dict[type, pd.DataFrame]
+    ) -> Dict[str, Dict[type, pd.DataFrame]]:
+        """
+        Split sample DataFrames between shards.
+
+        Catalog frames are copied to every shard. Customers and invoices are split by
+        customer id, and invoice lines follow their invoice.
+
+        Parameters
+        ----------
+        frames : Dict[type, pd.DataFrame]
+            Sample data keyed by model, in foreign key dependency order.
+
+        Returns
+        -------
+        Dict[str, Dict[type, pd.DataFrame]]
+            Sample data of every shard keyed by shard name, then by model.
+        """
+        customer_ids = pd.unique(frames[Customers]["customer_id"])
+        owners = pd.Series([self.shard_for(customer_id) for customer_id in customer_ids],
+                           index=customer_ids)
+        invoice_owners = pd.Series(
+            owners.loc[frames[Invoices]["customer_id"]].to_numpy(),
+            index=frames[Invoices]["invoice_id"].to_numpy()
+        )
+        shard_of = {
+            Customers: owners.loc[frames[Customers]["customer_id"]].to_numpy(),
+            Invoices: invoice_owners.to_numpy(),
+            InvoiceItems: invoice_owners.loc[frames[InvoiceItems]["invoice_id"]].to_numpy()
+        }
+        self._invoice_shards.update(invoice_owners.to_dict())
+
+        return {
+            name: {
+                model: frame[shard_of[model] == name] if model in shard_of else frame
+                for model, frame in frames.items()
+            }
+            for name in self.names
+        }
+
+    def broadcast(self, statement: Executable, parameters: Optional[list] = None):
+        """
+        Execute a statement against every shard, each in its own transaction.
+
+        Use this to write catalog tables, which every shard holds a copy of.
+
+        Parameters
+        ----------
+        statement : Executable
+            Statement to execute.
+
+        parameters : list, optional
+            Parameters for an `executemany` call.
+        """
+        for engine in self.engines.values():
+            with engine.begin() as connection:
+                connection.execute(statement, parameters)
+
+    def scatter(self, statement: Executable, shards: Optional[Iterable[str]] = None,
+                max_workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Run a query on several shards concurrently and concatenate the results.
+
+        Parameters
+        ----------
+        statement : Executable
+            Query to run on each shard.
+
+        shards : Iterable[str], optional
+            Names of the shards to query. Defaults to every shard.
+
+        max_workers : int, optional
+            Number of shards queried at once. Defaults to one thread per shard.
+
+        Returns
+        -------
+        pd.DataFrame
+            Rows of every shard with an extra `shard` column.
+        """
+        names = list(shards) if shards is not None else self.names
+
+        def run(name: str) -> pd.DataFrame:
+            with self.engines[name].connect() as connection:
+                result = connection.execute(statement)
+                frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+            return frame.assign(shard=name)
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(names)) as executor:
+            frames = list(executor.map(run, names))
+
+        return pd.concat(frames, ignore_index=True)
+
+    def gather(self, statement: Executable, by: Sequence[str],
+               aggregations: Dict[str, str]) -> pd.DataFrame:
+        """
+        Run a partial aggregate on every shard and combine the partial results.
+
+        Each shard computes the aggregate over its own rows, for example
+        `SUM(total) ... GROUP BY billing_country`. The partial rows are then
+        regrouped by `by` and combined.
+
+        Parameters
+        ----------
+        statement : Executable
+            Aggregate query run on each shard.
+
+        by : Sequence[str]
+            Grouping columns of the query.
+
+        aggregations : Dict[str, str]
+            How to combine each aggregate column across shards: `sum` (for sums and
+            counts), `min` or `max`. Averages cannot be combined; select a sum and a
+            count instead and divide afterwards.
+
+        Returns
+        -------
+        pd.DataFrame
+            Combined aggregates, one row per group.
+        """
+        unknown = set(aggregations.values()) - {"sum", "min", "max"}
+
+        if unknown:
+            raise ValueError(f"Unsupported aggregations: {sorted(unknown)}.")
+
+        partial = self.scatter(statement)
+
+        if not by:
+            return partial.agg(aggregations).to_frame().T
+
+        return partial.groupby(list(by), as_index=False).agg(aggregations)
+
+    def sessionmaker(self, **kwargs) -> sessionmaker:
+        """
+        Return a session factory producing sharded sessions over this set.
+
+        Parameters
+        ----------
+        **kwargs
+            Keyword arguments passed to `sessionmaker`.
+
+        Returns
+        -------
+        sessionmaker
+            The session factory.
+        """
+        return sessionmaker(
+            class_=ShardedSession,
+            shards=self.engines,
+            shard_chooser=self._shard_chooser,
+            identity_chooser=self._identity_chooser,
+            execute_chooser=self._execute_chooser,
+            **kwargs
+        )
+
+    def dispose(self):
+        """Dispose every shard engine."""
+        for engine in self.engines.values():
+            engine.dispose()
+
+    def _invoice_shard(self, invoice_id: int) -> Optional[str]:
+        if invoice_id not in self._invoice_shards:
+            query = select(Invoices.customer_id).where(Invoices.invoice_id == invoice_id)
+
+            for name, engine in self.engines.items():
+                with engine.connect() as connection:
+                    if connection.execute(query).scalar() is not None:
+                        self._invoice_shards[invoice_id] = name
+                        break
+
+        return self._invoice_shards.get(invoice_id)
+
+    def _shard_chooser(self, mapper, instance, clause=None) -> str:
+        model = mapper.class_ if mapper is not None else None
+
+        if instance is not None and model in (Customers, Invoices):
+            shard = self.shard_for(instance.customer_id)
+
+            if model is Invoices and instance.invoice_id is not None:
+                self._invoice_shards[instance.invoice_id] = shard
+
+            return shard
+
+        if instance is not None and model is InvoiceItems:
+            shard = self._invoice_shard(instance.invoice_id)
+
+            if shard is None:
+                raise ValueError(
+                    f"Invoice {instance.invoice_id} of the invoice line is on no shard.")
+
+            return shard
+
+        if instance is not None:
+            raise ValueError(
+                f"`{mapper.class_.__name__}` is replicated to every shard; "
+                "write it with `ShardSet.broadcast`.")
+
+        customer_ids = customer_filter(clause) if clause is not None else None
+
+        if customer_ids:
+            return self.shard_for(customer_ids[0])
+
+        return self.names[0]
+
+    def _identity_chooser(self, mapper, primary_key, *, lazy_loaded_from, **kwargs):
+        if lazy_loaded_from is not None:
+            return [lazy_loaded_from.identity_token]
+
+        model = mapper.class_
+
+        if model is Customers:
+            return [self.shard_for(primary_key[0])]
+
+        if model is Invoices and primary_key[0] in self._invoice_shards:
+            return [self._invoice_shards[primary_key[0]]]
+
+        if model in SHARDED_MODELS:
+            return self.names
+
+        return self.names[:1]
+
+    def _execute_chooser(self, context) -> List[str]:
+        if context.lazy_loaded_from is not None:
+            return [context.lazy_loaded_from.identity_token]
+
+        parameters = context.parameters if isinstance(context.parameters, Mapping) else None
+        customer_ids = customer_filter(context.statement, parameters)
+
+        if customer_ids is not None:
+            return list(dict.fromkeys(self.shard_for(value) for value in customer_ids))
+
+        # Every table the statement reads counts, not only its selected entities: a
+        # catalog query joining or filtering on sales must still see every shard.
+        tables = {element.name for element in iterate(context.statement)
+                  if isinstance(element, TableClause)}
+
+        if tables and tables.isdisjoint(_SHARDED_TABLE_NAMES):
+            return self.names[:1]
+
+        return self.names
+
@@ -0,0 +1,327 @@
+"""
+upsert.py
+
+Defines a bulk upsert API for refreshing tables from DataFrames.
+
+Instead of `session.merge()` per row, `upsert_frame` diffs the incoming rows against
+the current rows with the same primary keys in one vectorized pass and classifies each
+row as inserted, updated or unchanged. Only inserted and updated rows are written,
+with batched `executemany` calls of the dialect's native upsert:
+
+- SQLite and PostgreSQL: `INSERT ... ON CONFLICT (pk) DO UPDATE`
+- MySQL and MariaDB: `INSERT ... ON DUPLICATE KEY UPDATE`
+- Other dialects: plain `INSERT` for new rows and `UPDATE ... WHERE pk = ?` for
+  changed rows
+
+The native upsert also keeps the write correct if a row appears between the diff and
+the write. Writes to catalog tables refresh the affected rows of the `track_details`
+read model in the same transaction.
+
+Classes
+-------
+UpsertReport
+    Inserted, updated and unchanged row counts of one table.
+
+Functions
+---------
+diff_frame(connection: Connection, table: Table, frame: pd.DataFrame) -> pd.Series
+    Classifies incoming rows as `insert`, `update` or `unchanged`.
+
+upsert_frame(connection: Connection, model: type, frame: pd.DataFrame) -> UpsertReport
+    Upserts a DataFrame into a model's table.
+
+upsert_frames(engine: Engine, frames: Dict[type, pd.DataFrame]) -> Dict[str, UpsertReport]
+    Upserts several tables in one transaction, in the given order.
+"""
+
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import (
+    Connection,
+    Date,
+    DateTime,
+    Engine,
+    Executable,
+    Integer,
+    Numeric,
+    Table,
+    and_,
+    bindparam,
+    insert,
+    select,
+    tuple_,
+    update
+)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from .commit_samples import frame_records
+from .models.types import Money
+from .read_models import TRACK_DETAIL_SOURCES, refresh_track_details
+
+
+# Keys per `IN` list when reading current rows, below every dialect's parameter limit.
+KEY_CHUNK = 5_000
+
+_ON_CONFLICT = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+_ON_DUPLICATE_KEY = {"mysql", "mariadb"}
+
+
+@dataclass
+class UpsertReport:
+    """
+    Result of upserting one table.
+
+    Attributes
+    ----------
+    table : str
+        Name of the table.
+
+    inserted : int
+        Rows whose primary key did not exist yet.
+
+    updated : int
+        Existing rows with at least one changed column.
+
+    unchanged : int
+        Existing rows identical to the incoming row, which are not written.
+
+    seconds : float
+        Wall time spent diffing and writing.
+    """
+
+    table: str
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+
+
+def _primary_key(table: Table, frame: pd.DataFrame) -> List[str]:
+    keys = [column.name for column in table.primary_key.columns]
+    missing = [key for key in keys if key not in frame.columns]
+
+    if missing:
+        raise ValueError(f"Rows for `{table.name}` are missing primary key columns {missing}.")
+
+    return keys
+
+
+def _current_rows(connection: Connection, table: Table, keys: List[str],
+                  columns: List[str], frame: pd.DataFrame) -> pd.DataFrame:
+    key_columns = [table.c[key] for key in keys]
+    incoming = list(frame[keys].itertuples(index=False, name=None))
+    chunks = []
+
+    for start in range(0, len(incoming), KEY_CHUNK):
+        chunk = incoming[start:start + KEY_CHUNK]
+        condition = key_columns[0].in_([key for key, in chunk]) if len(keys) == 1 \
+            else tuple_(*key_columns).in_(chunk)
+        result = connection.execute(select(*(table.c[column] for column in columns)).where(condition))
+        chunks.append(pd.DataFrame(result.fetchall(), columns=columns))
+
+    current = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+    if current.empty:
+        return frame[columns].iloc[0:0]
+
+    return current.astype({key: frame[key].dtype for key in keys})
+
+
+def _coerce(values: pd.Series, column_type) -> pd.Series:
+    # Values read from text, such as CSV files, are compared as the column's type.
+    if isinstance(column_type, (DateTime, Date)):
+        return pd.to_datetime(values)
+
+    if isinstance(column_type, (Integer, Numeric, Money)):
+        return pd.to_numeric(values)
+
+    return values
+
+
+def _differs(incoming: pd.Series, current: pd.Series) -> np.ndarray:
+    both_missing = incoming.isna().to_numpy() & current.isna().to_numpy()
+    equal = incoming.to_numpy(dtype=object) == current.to_numpy(dtype=object)
+
+    return ~(equal.astype(bool) | both_missing)
+
+
+def diff_frame(connection: Connection, table: Table, frame: pd.DataFrame) -> pd.Series:
+    """
+    Classify incoming rows against the rows currently in a table.
+
+    Only columns present in both the DataFrame and the table are compared, as the
+    table's types: date and time columns as timestamps and numeric and `Money`
+    columns as numbers, so values parsed from text compare equal to stored ones.
+    Missing values compare equal to `NULL`.
+
+    Parameters
+    ----------
+    connection : Connection
+        Connection used to read the current rows.
+
+    table : Table
+        Target table.
+
+    frame : pd.DataFrame
+        Incoming rows, including every primary key column.
+
+    Returns
+    -------
+    pd.Series
+        `insert`, `update` or `unchanged` for each row, aligned with `frame`.
+
+    Raises
+    ------
+    ValueError
+        If a primary key column is missing or a primary key appears twice.
+    """
+    keys = _primary_key(table, frame)
+
+    if frame.duplicated(keys).any():
+        raise ValueError(f"Rows for `{table.name}` contain duplicate primary keys.")
+
+    columns = [column for column in frame.columns if column in table.columns]
+    values = [column for column in columns if column not in keys]
+    current = _current_rows(connection, table, keys, columns, frame)
+
+    merged = frame[columns].reset_index(drop=True).merge(
+        current, on=keys, how="left", suffixes=("", "__current"), indicator=True)
+    exists = (merged["_merge"] == "both").to_numpy()
+    changed = np.zeros(len(merged), dtype=bool)
+
+    for column in values:
+        column_type = table.c[column].type
+        changed |= _differs(_coerce(merged[column], column_type),
+                            _coerce(merged[f"{column}__current"], column_type))
+
+    status = np.where(~exists, "insert", np.where(changed, "update", "unchanged"))
+
+    return pd.Series(status, index=frame.index)
+
+
+def _upsert_statement(table: Table, dialect: str, keys: List[str],
+                      values: List[str]) -> Optional[Executable]:
+    if dialect in _ON_CONFLICT:
+        statement = _ON_CONFLICT[dialect](table)
+
+        if not values:
+            return statement.on_conflict_do_nothing(index_elements=keys)
+
+        return statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: statement.excluded[column] for column in values}
+        )
+
+    if dialect in _ON_DUPLICATE_KEY:
+        statement = mysql.insert(table)
+        assigned = values or keys[:1]
+
+        return statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in assigned})
+
+    return None
+
+
+def upsert_frame(connection: Connection, model: type, frame: pd.DataFrame,
+                 batch_size: int = 10_000) -> UpsertReport:
+    """
+    Upsert a DataFrame into a model's table.
+
+    Parameters
+    ----------
+    connection : Connection
+        Connection inside the transaction to write in.
+
+    model : type
+        ORM model class of the target table.
+
+    frame : pd.DataFrame
+        Incoming rows with the model's column names, including the primary key. Only
+        columns present in the DataFrame are written; other columns of existing rows
+        are left as they are.
+
+    batch_size : int
+        Rows per `executemany` call.
+
+    Returns
+    -------
+    UpsertReport
+        Inserted, updated and unchanged row counts.
+    """
+    started = perf_counter()
+    table = model.__table__
+    status = diff_frame(connection, table, frame)
+    keys = _primary_key(table, frame)
+    columns = [column for column in frame.columns if column in table.columns]
+    values = [column for column in columns if column not in keys]
+    counts = status.value_counts()
+
+    written = frame.loc[status != "unchanged", columns]
+    statement = _upsert_statement(table, connection.dialect.name, keys, values)
+
+    for start in range(0, len(written), batch_size):
+        batch = written.iloc[start:start + batch_size]
+        batch_status = status.loc[batch.index]
+
+        if statement is not None:
+            connection.execute(statement, frame_records(batch))
+            continue
+
+        inserts = batch[batch_status == "insert"]
+        updates = batch[batch_status == "update"]
+
+        if len(inserts):
+            connection.execute(insert(table), frame_records(inserts))
+
+        if len(updates):
+            renamed = updates.add_prefix("new_")
+            connection.execute(
+                update(table)
+                .where(and_(*(table.c[key] == bindparam(f"new_{key}") for key in keys)))
+                .values({column: bindparam(f"new_{column}") for column in values}),
+                frame_records(renamed)
+            )
+
+    if table.name in TRACK_DETAIL_SOURCES and len(written):
+        refresh_track_details(connection, table.name, written[keys[0]].tolist())
+
+    return UpsertReport(
+        table=table.name,
+        inserted=int(counts.get("insert", 0)),
+        updated=int(counts.get("update", 0)),
+        unchanged=int(counts.get("unchanged", 0)),
+        seconds=perf_counter() - started
+    )
+
+
+def upsert_frames(engine: Engine, frames: Dict[type, pd.DataFrame],
+                  batch_size: int = 10_000) -> Dict[str, UpsertReport]:
+    """
+    Upsert several tables in one transaction.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the target database.
+
+    frames : Dict[type, pd.DataFrame]
+        Incoming rows keyed by model, in foreign key dependency order, for example
+        artists, then albums, then tracks.
+
+    batch_size : int
+        Rows per `executemany` call.
+
+    Returns
+    -------
+    Dict[str, UpsertReport]
+        Report of each table, keyed by table name.
+    """
+    with engine.begin() as connection:
+        return {
+            model.__tablename__: upsert_frame(connection, model, frame, batch_size)
+            for model, frame in frames.items()
+        }
@@ -0,0 +1,204 @@
+"""
+verification.py
+
+Defines consistency checks of derived data.
+
+`Invoices.total` is stored alongside the invoice lines it is derived from. The check
+compares every invoice with the sum of `unit_price * quantity` of its lines using one
+grouped query per `invoice_id` range: the lines of the range are aggregated in a
+subquery, outer-joined to the invoices of the range, and only invoices whose total
+differs are returned. Invoices without lines are expected to total 0. Amounts are
+compared as integer cents, so float rounding never reports a false mismatch.
+
+Ranges are read one at a time, each in its own transaction, so memory and lock time
+stay bounded on large databases. With `repair`, mismatched totals are overwritten
+with the sum of their lines in batched `executemany` updates in the same
+transaction as the range's check.
+
+Classes
+-------
+TotalMismatch
+    An invoice whose total differs from the sum of its lines.
+
+VerificationReport
+    Counts, mismatches and timing of a verification run.
+
+Functions
+---------
+invoice_total_mismatches(low: int, high: int) -> Select
+    Builds the query of mismatched invoices in an `invoice_id` range.
+
+verify_invoice_totals(engine: Engine, repair: bool, range_size: int, ...)
+    Checks every invoice total against its lines, optionally repairing them.
+"""
+
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import List
+
+from sqlalchemy import Engine, Select, bindparam, func, select, update
+
+from .models import InvoiceItems, Invoices
+from .models.types import cents
+
+
+@dataclass
+class TotalMismatch:
+    """
+    An invoice whose stored total differs from the sum of its lines.
+
+    Attributes
+    ----------
+    invoice_id : int
+        Identifier of the invoice.
+
+    stored : float
+        `Invoices.total` in USD.
+
+    expected : float
+        Sum of `unit_price * quantity` of the invoice's lines in USD.
+    """
+
+    invoice_id: int
+    stored: float
+    expected: float
+
+
+@dataclass
+class VerificationReport:
+    """
+    Result of a verification run.
+
+    Attributes
+    ----------
+    invoices : int
+        Number of invoices checked.
+
+    ranges : int
+        Number of `invoice_id` ranges queried.
+
+    mismatches : List[TotalMismatch]
+        Invoices whose total differed from their lines, in `invoice_id` order.
+
+    repaired : int
+        Totals overwritten with the sum of their lines.
+
+    seconds : float
+        Wall time spent checking and repairing.
+    """
+
+    invoices: int = 0
+    ranges: int = 0
+    mismatches: List[TotalMismatch] = field(default_factory=list)
+    repaired: int = 0
+    seconds: float = 0.0
+
+    @property
+    def consistent(self) -> bool:
+        """Returns whether every checked invoice matched its lines."""
+        return not self.mismatches
+
+
+def invoice_total_mismatches(low: int, high: int) -> Select:
+    """
+    Build the query of invoices in a range whose total differs from their lines.
+
+    Parameters
+    ----------
+    low : int
+        Smallest `invoice_id` of the range.
+
+    high : int
+        `invoice_id` the range ends before.
+
+    Returns
+    -------
+    Select
+        Query returning `invoice_id`, `stored` and `expected`, the latter two in
+        integer cents, ordered by `invoice_id`.
+    """
+    lines = (
+        select(
+            InvoiceItems.invoice_id,
+            func.sum(cents(InvoiceItems.unit_price) * InvoiceItems.quantity).label("cents")
+        )
+        .where(InvoiceItems.invoice_id >= low, InvoiceItems.invoice_id < high)
+        .group_by(InvoiceItems.invoice_id)
+        .subquery()
+    )
+    stored = cents(Invoices.total)
+    expected = func.coalesce(lines.c.cents, 0)
+
+    return (
+        select(Invoices.invoice_id, stored.label("stored"), expected.label("expected"))
+        .outerjoin(lines, lines.c.invoice_id == Invoices.invoice_id)
+        .where(Invoices.invoice_id >= low, Invoices.invoice_id < high, stored != expected)
+        .order_by(Invoices.invoice_id)
+    )
+
+
+def verify_invoice_totals(engine: Engine, repair: bool = False, range_size: int = 100_000,
+                          batch_size: int = 5_000) -> VerificationReport:
+    """
+    Check every invoice total against the sum of its lines.
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the Chinook database.
+
+    repair : bool
+        Whether to overwrite mismatched totals with the sum of their lines.
+
+    range_size : int
+        Width of the `invoice_id` ranges checked per query and transaction.
+
+    batch_size : int
+        Rows per `executemany` call when repairing.
+
+    Returns
+    -------
+    VerificationReport
+        Counts, mismatches and timing of the run. With `repair`, the mismatches are
+        those found before they were repaired.
+    """
+    if range_size < 1 or batch_size < 1:
+        raise ValueError("`range_size` and `batch_size` must be positive.")
+
+    started = perf_counter()
+    report = VerificationReport()
+    statement = (
+        update(Invoices.__table__)
+        .where(Invoices.__table__.c.invoice_id == bindparam("key"))
+        .values(total=bindparam("amount"))
+    )
+
+    with engine.connect() as connection:
+        first, last, count = connection.execute(
+            select(func.min(Invoices.invoice_id), func.max(Invoices.invoice_id), func.count())
+        ).one()
+
+    report.invoices = count
+
+    for low in range(first or 0, (last or -1) + 1, range_size):
+        with engine.begin() as connection:
+            rows = connection.execute(invoice_total_mismatches(low, low + range_size)).all()
+            report.ranges += 1
+            report.mismatches.extend(
+                TotalMismatch(invoice_id, stored / 100, expected / 100)
+                for invoice_id, stored, expected in rows
+            )
+
+            if not repair:
+                continue
+
+            for start in range(0, len(rows), batch_size):
+                connection.execute(statement, [
+                    {"key": invoice_id, "amount": expected / 100}
+                    for invoice_id, _, expected in rows[start:start + batch_size]
+                ])
+
+            report.repaired += len(rows)
+
+    report.seconds = perf_counter() - started
+    return report
@@ -0,0 +1,8 @@
+"""
+Shared fixtures for the Chinook test suite.
+
+Fixtures are provided by the package's pytest plugin, which is enabled explicitly so
+the suite also runs from a source checkout.
+"""
+
+pytest_plugins = ["chinook.pytest_plugin"]
@@ -0,0 +1,111 @@
+"""
+Test change data capture.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session, load_only
+
+from chinook.cdc import ChangeCapture, ChangeFeed, drop_triggers, install_triggers
+from chinook.cube import InvoiceCube
+from chinook.ingest import ingest_invoices
+from chinook.models import Customers, Genres, InvoiceItems, Tracks
+
+
+def test_orm_capture_and_resumable_feed(chinook_engine):
+    """Test that ORM flushes are logged and consumers resume from their cursor"""
+    capture = ChangeCapture().attach()
+
+    try:
+        with Session(chinook_engine) as session:
+            session.get(Tracks, 1).unit_price = 1.29
+            session.get(Customers, 1).city = "Lisbon"
+            session.add(Genres(genre_id=1000, name="Not tracked"))
+            session.commit()
+    finally:
+        capture.detach()
+
+    feed = ChangeFeed(chinook_engine, "search", batch_size=1)
+    first = feed.poll()
+
+    assert [(record.table, record.operation, record.key) for record in first] == \
+        [("tracks", "update", {"track_id": 1})]
+    assert first[0].data["unit_price"] == 1.29
+    assert feed.poll() == first
+
+    feed.commit(first)
+    resumed = ChangeFeed(chinook_engine, "search")
+
+    assert resumed.position == first[0].change_id
+    assert [record.key for batch in resumed for record in batch] == [{"customer_id": 1}]
+    assert ChangeFeed(chinook_engine, "search").lag() == 0
+
+
+def test_unloaded_columns_are_logged(chinook_engine):
+    """Test that changes to partially loaded rows log every column, in UTC"""
+    capture = ChangeCapture().attach()
+
+    try:
+        with Session(chinook_engine) as session:
+            updated, deleted = session.scalars(
+                select(InvoiceItems).options(load_only(InvoiceItems.quantity))
+                .where(InvoiceItems.invoice_line_id.in_([1, 2]))
+                .order_by(InvoiceItems.invoice_line_id)
+            ).all()
+
+            updated.quantity = 2
+            session.delete(deleted)
+            session.commit()
+    finally:
+        capture.detach()
+
+    changes = ChangeFeed(chinook_engine, "lines").poll()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    assert [(record.operation, record.data["invoice_id"], record.data["quantity"])
+            for record in changes] == [("update", 1, 2), ("delete", 1, 1)]
+    assert all(abs(now - record.changed_at) < timedelta(minutes=1) for record in changes)
+
+
+def test_triggers_capture_bulk_writes(chinook_engine):
+    """Test that triggers log Core writes, which ORM capture cannot see"""
+    install_triggers(chinook_engine)
+
+    with chinook_engine.begin() as connection:
+        connection.execute(update(Tracks).where(Tracks.track_id <= 3).values(unit_price=0.49))
+        connection.execute(insert(Genres).values(genre_id=1000, name="Not tracked"))
+
+    drop_triggers(chinook_engine)
+
+    with chinook_engine.begin() as connection:
+        connection.execute(update(Tracks).where(Tracks.track_id == 4).values(unit_price=0.49))
+
+    records = [record for batch in ChangeFeed(chinook_engine, "cache") for record in batch]
+
+    assert [record.key["track_id"] for record in records] == [1, 2, 3]
+    assert {record.data["unit_price"] for record in records} == {0.49}
+
+
+def test_cube_applies_changes_incrementally(chinook_engine):
+    """Test that the cube appends new invoices and reloads on updates"""
+    cube = InvoiceCube(chinook_engine)
+    lines = len(cube)
+    install_triggers(chinook_engine, ["invoices", "invoice_items", "tracks"])
+    feed = ChangeFeed(chinook_engine, "cube")
+
+    ingest_invoices(chinook_engine, [{
+        "customer_id": 1,
+        "invoice_date": datetime(2025, 1, 1),
+        "lines": [{"track_id": 1}, {"track_id": 2}]
+    }])
+
+    assert cube.apply_changes(feed.poll()) == 2
+    assert len(cube) == lines + 2
+
+    feed.commit(feed.poll())
+
+    with chinook_engine.begin() as connection:
+        connection.execute(update(Tracks).where(Tracks.track_id == 1).values(name="Renamed"))
+
+    assert cube.apply_changes(feed.poll()) == lines + 2
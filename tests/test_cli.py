@@ -0,0 +1,101 @@
+"""
+Test the command line interface.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import Engine, create_engine, update
+
+from chinook.cli import build_parser, engine_options, main
+from chinook.models import Invoices
+from chinook.protocols.sql_alchemy_config import ISQLAlchemyConfig
+
+
+def test_engine_options_are_collected():
+    """Test that pool flags and KEY=VALUE options become engine arguments"""
+    args = build_parser().parse_args([
+        "--pool-size", "5", "verify", "--pool-pre-ping",
+        "--engine-option", "pool_recycle=60", "--engine-option", "isolation_level=AUTOCOMMIT"
+    ])
+
+    assert engine_options(args) == {
+        "pool_size": 5,
+        "pool_pre_ping": True,
+        "pool_recycle": 60,
+        "isolation_level": "AUTOCOMMIT"
+    }
+
+
+def test_seed_and_verify(tmp_path, capsys, chinook_di):
+    """Test seeding a scaled database and verifying it from the command line"""
+    url = f"sqlite:///{tmp_path / 'chinook.db'}"
+
+    assert main(["--url", url, "--json", "seed", "--scale", "2"]) == 0
+    seeded = json.loads(capsys.readouterr().out)
+    assert seeded["invoices"] == 2 * 412 and seeded["track_details"] == seeded["tracks"]
+
+    engine = create_engine(url)
+
+    with engine.begin() as connection:
+        connection.execute(update(Invoices).where(Invoices.invoice_id == 9).values(total=0))
+
+    engine.dispose()
+
+    assert main(["--url", url, "verify", "--json"]) == 1
+    assert [mismatch["invoice_id"] for mismatch
+            in json.loads(capsys.readouterr().out)["mismatches"]] == [9]
+    assert main(["--url", url, "verify", "--repair"]) == 0
+    assert main(["--url", url, "verify"]) == 0
+    assert "0 mismatched" in capsys.readouterr().out.splitlines()[-1]
+
+
+def test_export(tmp_path, capsys, chinook_di, chinook_template):
+    """Test exporting a snapshot as Feather files"""
+    pytest.importorskip("pyarrow")
+
+    assert main(["--url", chinook_template, "export", str(tmp_path / "snapshot"),
+                 "--format", "feather", "--compression", "none"]) == 0
+
+    manifest = json.loads((tmp_path / "snapshot" / "manifest.json").read_text())
+    assert manifest["format"] == "feather"
+    assert capsys.readouterr().out.startswith(f"exported {len(manifest['tables'])} tables")
+
+
+def test_jobs_are_rejected_on_sqlite(tmp_path, capsys):
+    """Test that parallel seeding is accepted but refused with a clear error on SQLite"""
+    args = build_parser().parse_args(["seed", "--scale", "50", "--jobs", "8", "--bulk"])
+
+    assert args.jobs == 8
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--url", f"sqlite:///{tmp_path / 'chinook.db'}",
+              "seed", "--scale", "50", "--jobs", "8", "--bulk"])
+
+    assert exit_info.value.code == 2
+    assert "single job" in capsys.readouterr().err
+    assert not (tmp_path / "chinook.db").exists()
+
+
+def test_global_options_apply_without_subcommand(tmp_path, capsys, chinook_di):
+    """Test that initializing without a subcommand honours the global options"""
+    url = f"sqlite:///{tmp_path / 'chinook.db'}"
+
+    assert main(["--url", url, "--pool-pre-ping", "--money-storage", "cents"]) == 0
+
+    engine = chinook_di[Engine]
+
+    assert engine.url.database == str(tmp_path / "chinook.db")
+    assert engine.pool._pre_ping
+    assert chinook_di[ISQLAlchemyConfig].money_storage == "cents"
+
+    engine.dispose()
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--url", url, "seed", "--read-only"])
+
+    assert exit_info.value.code == 2
+    assert "cannot be seeded" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit, match="source checkout"):
+        main(["bench", "--path", str(tmp_path / "benchmarks")])
@@ -0,0 +1,91 @@
+"""
+Test the typed Chinook configuration.
+"""
+
+import pytest
+from sqlalchemy import func, make_url, select
+
+from chinook import ChinookConfig, get_engine, initialize
+from chinook.models import Invoices, Tracks
+from chinook.registry import EngineRegistry
+
+
+def test_from_env_reads_every_option():
+    """Test that environment variables map to configuration attributes"""
+    config = ChinookConfig.from_env({
+        "CHINOOK_SQLITE": "0",
+        "CHINOOK_CONN_STRING": "postgresql://localhost/chinook",
+        "CHINOOK_SEED": "bulk",
+        "CHINOOK_SCALE": "5",
+        "CHINOOK_JOBS": "4",
+        "CHINOOK_POOL_SIZE": "8",
+        "CHINOOK_POOL_PRE_PING": "1",
+        "CHINOOK_PRAGMAS": "fast",
+        "CHINOOK_SQLITE_CACHE_KIB": "65536"
+    })
+
+    assert config.connection_string == "postgresql://localhost/chinook"
+    assert (config.seed, config.scale, config.jobs) == ("bulk", 5, 4)
+    assert config.engine_options == {"pool_size": 8, "pool_pre_ping": True}
+    assert config.sqlite_pragmas["cache_size"] == -65536
+    assert ChinookConfig.from_env({}).in_memory
+
+    with pytest.raises(ValueError):
+        ChinookConfig.from_env({"CHINOOK_SEED": "fast"})
+
+    with pytest.raises(ValueError):
+        ChinookConfig(scale=3)
+
+    with pytest.raises(ValueError):
+        ChinookConfig(seed="bulk", jobs=2)
+
+
+def test_differently_tuned_databases(tmp_path, chinook_di):
+    """Test that one process initializes databases with different configurations"""
+    initialize(config=ChinookConfig())
+    bulk = ChinookConfig(connection_string=f"sqlite:///{tmp_path / 'scaled.db'}",
+                         seed="bulk", scale=2, pragmas="fast", sqlite_cache_kib=4096)
+    report = initialize(name="scaled", config=bulk)
+
+    assert [phase.name for phase in report.phases] == ["config", "init_db", "insert"]
+
+    with get_engine().connect() as connection:
+        tracks = connection.execute(select(func.count()).select_from(Tracks)).scalar()
+
+    with get_engine("scaled").connect() as connection:
+        assert connection.execute(select(func.count()).select_from(Tracks)).scalar() \
+            == 2 * tracks
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA cache_size").scalar() == -4096
+
+    chinook_di[EngineRegistry].unregister("scaled")
+
+
+def test_snapshot_is_reused(tmp_path, chinook_di, chinook_template):
+    """Test that a seeded SQLite file is restored instead of seeding again"""
+    config = ChinookConfig(connection_string=f"sqlite:///{tmp_path / 'restored.db'}",
+                           snapshot=make_url(chinook_template).database)
+    report = initialize(name="restored", config=config)
+
+    assert [phase.name for phase in report.phases] == ["config", "restore", "init_db"]
+
+    with get_engine("restored").connect() as connection:
+        assert connection.execute(select(func.count()).select_from(Invoices)).scalar() == 412
+
+    chinook_di[EngineRegistry].unregister("restored")
+
+
+def test_missing_snapshot_is_an_error(tmp_path):
+    """Test that a snapshot path that does not exist is not seeded as an empty database"""
+    from chinook.bootstrap import seed_database
+    from chinook.models.engine import create_db_engine
+
+    config = ChinookConfig(connection_string=f"sqlite:///{tmp_path / 'restored.db'}",
+                           snapshot=str(tmp_path / "missing.db"))
+    engine = create_db_engine(sql_config=config)
+
+    try:
+        with pytest.raises(FileNotFoundError):
+            seed_database(engine, config)
+    finally:
+        engine.dispose()
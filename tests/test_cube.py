@@ -0,0 +1,67 @@
+"""
+Test the columnar invoice cube against equivalent SQL aggregations.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+
+from chinook.cube import InvoiceCube
+from chinook.models import Genres, InvoiceItems, Invoices, Tracks
+
+
+def test_revenue_by_genre_matches_sql(chinook_engine):
+    """Test that cube revenue per genre equals the SQL group-by"""
+    cube = InvoiceCube(chinook_engine)
+
+    statement = (
+        select(Genres.name, func.sum(InvoiceItems.unit_price * InvoiceItems.quantity))
+        .join(Tracks, Tracks.genre_id == Genres.genre_id)
+        .join(InvoiceItems, InvoiceItems.track_id == Tracks.track_id)
+        .group_by(Genres.name)
+    )
+
+    with chinook_engine.connect() as connection:
+        expected = dict(connection.execute(statement).all())
+
+    result = cube.aggregate("genre")
+
+    assert set(result.index) == set(expected)
+    for genre, revenue in expected.items():
+        assert abs(result[genre] - revenue) < 1e-6
+
+
+def test_filtered_top_and_multi_dimension(chinook_engine):
+    """Test that filters, top-N and multi-dimension group-bys are consistent"""
+    cube = InvoiceCube(chinook_engine)
+
+    usa = cube.aggregate("genre", func="count", where={"country": "USA"})
+    top = cube.top("genre", n=3, func="count", where={"country": "USA"})
+    by_two = cube.aggregate(("country", "genre"), func="count")
+
+    assert list(top.values) == sorted(usa.values, reverse=True)[:3]
+    assert by_two.loc["USA"].sum() == usa.sum()
+    assert cube.aggregate("year", func="count").sum() == len(cube)
+
+
+def test_refresh_appends_new_invoices(chinook_engine):
+    """Test that refresh only loads invoices newer than the last load"""
+    cube = InvoiceCube(chinook_engine)
+    lines = len(cube)
+
+    with chinook_engine.begin() as connection:
+        invoice_id = connection.execute(select(func.max(Invoices.invoice_id))).scalar() + 1
+        connection.execute(insert(Invoices), [{
+            "invoice_id": invoice_id,
+            "customer_id": 1,
+            "invoice_date": datetime(2014, 1, 1),
+            "billing_country": "Brazil",
+            "total": 1.98
+        }])
+        connection.execute(insert(InvoiceItems), [{
+            "invoice_id": invoice_id, "track_id": 1, "unit_price": 0.99, "quantity": 2
+        }])
+
+    assert cube.refresh() == 1
+    assert len(cube) == lines + 1
+    assert cube.refresh() == 0
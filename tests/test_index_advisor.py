@@ -0,0 +1,41 @@
+"""
+Test plan capture, index proposals and opt-in index sets.
+"""
+
+from sqlalchemy import select
+
+from chinook.index_advisor import IndexAdvisor, explain
+from chinook.models import Customers
+from chinook.models.index_sets import apply_index_set, drop_index_set
+
+
+def test_advisor_flags_scans_and_proposals_remove_them(chinook_engine):
+    """Test that applying the proposals leaves no flagged statements"""
+    advisor = IndexAdvisor(chinook_engine)
+
+    report = advisor.run()
+    proposed = {(p.table, p.columns[0]) for p in report.proposals}
+
+    assert report.flagged
+    assert ("customers", "email") in proposed
+    assert ("tracks", "name") in proposed
+
+    report.apply(chinook_engine)
+
+    assert not advisor.run().flagged
+
+
+def test_index_sets_are_opt_in(chinook_engine):
+    """Test that an index set changes the plan only once applied"""
+    lookup = select(Customers).where(Customers.email == "luisg@embraer.com.br")
+
+    with chinook_engine.connect() as connection:
+        assert explain(connection, lookup).full_scans == ["customers"]
+
+    assert apply_index_set(chinook_engine, "lookup") == ["ix_customers_email", "ix_tracks_name"]
+    assert apply_index_set(chinook_engine, "lookup") == []
+
+    with chinook_engine.connect() as connection:
+        assert not explain(connection, lookup).flagged
+
+    assert drop_index_set(chinook_engine, "lookup") == ["ix_customers_email", "ix_tracks_name"]
@@ -0,0 +1,104 @@
+"""
+Test the invoice ingestion write path.
+"""
+
+import gc
+import weakref
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+
+from chinook.ingest import IdAllocator, InvalidInvoiceLines, InvoiceIngestor, ingest_invoices
+from chinook.models import InvoiceItems, Invoices
+
+
+def test_ingest_prices_lines_and_totals(chinook_engine):
+    """Test that lines are priced from the catalog and totals are summed per invoice"""
+    with chinook_engine.connect() as connection:
+        before = connection.execute(select(func.max(Invoices.invoice_id))).scalar()
+
+    report = ingest_invoices(chinook_engine, [
+        {"customer_id": 1, "invoice_date": datetime(2025, 1, 1),
+         "lines": [{"track_id": 1, "quantity": 2}, {"track_id": 2, "unit_price": 0.99}]},
+        {"customer_id": 2, "invoice_date": datetime(2025, 1, 2),
+         "lines": [{"track_id": 3}]}
+    ])
+
+    assert report.invoices == 2 and report.lines == 3
+    assert report.invoice_ids == [before + 1, before + 2]
+    assert report.invoices_per_second > 0
+
+    with chinook_engine.connect() as connection:
+        totals = connection.execute(
+            select(Invoices.total).where(Invoices.invoice_id.in_(report.invoice_ids))
+            .order_by(Invoices.invoice_id)
+        ).scalars().all()
+        quantities = connection.execute(
+            select(func.sum(InvoiceItems.quantity))
+            .where(InvoiceItems.invoice_id == report.invoice_ids[0])
+        ).scalar()
+
+    assert totals == [pytest.approx(2.97), pytest.approx(0.99)]
+    assert quantities == 3
+
+
+def test_invalid_lines_write_nothing(chinook_engine):
+    """Test that a batch with an unknown track or a wrong price is rejected as a whole"""
+    ingestor = InvoiceIngestor(chinook_engine)
+    header = {"customer_id": 1, "invoice_date": datetime(2025, 1, 1)}
+
+    with pytest.raises(InvalidInvoiceLines) as error:
+        ingestor.ingest([{**header, "lines": [{"track_id": 1}, {"track_id": 10 ** 9}]}])
+
+    assert error.value.lines["track_id"].tolist() == [10 ** 9]
+
+    with pytest.raises(InvalidInvoiceLines):
+        ingestor.ingest([{**header, "lines": [{"track_id": 1, "unit_price": 5.00}]}])
+
+    with chinook_engine.connect() as connection:
+        assert connection.execute(
+            select(func.count()).select_from(Invoices)
+            .where(Invoices.invoice_date >= datetime(2025, 1, 1))
+        ).scalar() == 0
+
+
+def test_ids_are_reserved_in_blocks(chinook_engine):
+    """Test that allocators share the sequence without handing out an id twice"""
+    column = Invoices.__table__.c.invoice_id
+    first = IdAllocator(chinook_engine, column, block_size=10)
+    second = IdAllocator(chinook_engine, column, block_size=10)
+
+    ids = [*first.allocate(4), *second.allocate(4), *first.allocate(25)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids[4] == ids[0] + 10
+
+
+def test_reserving_a_block_skips_the_catalog(chinook_engine):
+    """Test that blocks are reserved without checking for the id_blocks table"""
+    allocator = IdAllocator(chinook_engine, Invoices.__table__.c.invoice_id, block_size=5)
+    statements = []
+    event.listen(chinook_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    for _ in range(3):
+        allocator.allocate(5)
+
+    assert sum(statement.startswith("SELECT id_blocks") for statement in statements) == 3
+    assert not any("PRAGMA" in statement for statement in statements)
+
+
+def test_empty_batch_and_engine_collection(chinook_template):
+    """Test that an empty batch writes nothing and cached ingestors do not pin engines"""
+    engine = create_engine(chinook_template)
+    report = ingest_invoices(engine, [])
+
+    assert (report.invoices, report.lines, report.invoice_ids) == (0, 0, [])
+
+    reference = weakref.ref(engine)
+    engine.dispose()
+    del engine
+    gc.collect()
+
+    assert reference() is None
@@ -0,0 +1,84 @@
+"""
+Test query instrumentation: statement normalization, timings and query budgets.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from chinook.instrumentation import QueryBudgetExceeded, normalize_statement
+from chinook.models import Albums, Artists
+
+
+def test_normalize_statement_collapses_literals_and_lists():
+    """Test that equivalent statements share a normalized form"""
+    first = normalize_statement("SELECT *  FROM t WHERE a = 'x' AND b IN (?, ?, ?)")
+    second = normalize_statement("SELECT * FROM t\nWHERE a = 'y' AND b IN (?, ?)")
+
+    assert first == second == "SELECT * FROM t WHERE a = ? AND b IN (?, ...)"
+    assert normalize_statement("SELECT * FROM invoices_p2009 LIMIT 10") \
+        == "SELECT * FROM invoices_p2009 LIMIT ?"
+
+
+def test_snapshot_and_repeated_statement_detection(chinook_engine, query_instrumentation):
+    """Test that per-statement latencies and N+1 patterns are recorded"""
+    query_instrumentation.attach(chinook_engine)
+
+    with query_instrumentation.request("albums") as scope:
+        with Session(chinook_engine) as session:
+            for album in session.scalars(select(Albums).limit(10)).all():
+                session.get(Artists, album.artist_id)
+
+    snapshot = query_instrumentation.snapshot()
+
+    assert scope.queries >= 6
+    assert len(scope.repeated) == 1
+    assert snapshot["repeated"] == scope.repeated
+    assert snapshot["connect"]["count"] == 0
+    assert all(s["latency"]["count"] > 0 for s in snapshot["statements"].values())
+
+
+def test_query_budget(chinook_engine, query_instrumentation):
+    """Test that a budget raises when exceeded"""
+    query_instrumentation.attach(chinook_engine)
+
+    with query_instrumentation.budget(max_queries=1):
+        with chinook_engine.connect() as connection:
+            connection.execute(select(Albums).limit(1)).all()
+
+    with pytest.raises(QueryBudgetExceeded):
+        with query_instrumentation.budget(max_repeats=2):
+            with chinook_engine.connect() as connection:
+                for album_id in range(3):
+                    connection.execute(select(Albums).where(Albums.album_id == album_id))
+
+
+def test_connects_and_failed_statements(tmp_path, query_instrumentation):
+    """Test that new connections are timed and errors keep the start stack balanced"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'instrumented.db'}")
+    query_instrumentation.attach(engine)
+
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.exec_driver_sql("SELECT * FROM missing")
+
+        assert connection.info["chinook_query_start"] == []
+
+        connection.exec_driver_sql("SELECT 1")
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+    connect = query_instrumentation.snapshot()["connect"]
+
+    assert connect["count"] == 1
+    assert connect["min_ms"] > 0
+    assert "SELECT ?" in query_instrumentation.statements
+
+    query_instrumentation.detach(engine)
+
+    assert not event.contains(engine, "handle_error", query_instrumentation._handle_error)
+    assert not event.contains(engine.pool, "connect", query_instrumentation._connect)
+
+    engine.dispose()
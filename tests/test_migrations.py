@@ -0,0 +1,106 @@
+"""
+Test schema versioning and migrations.
+"""
+
+import pytest
+from kink import di
+from sqlalchemy import Column, Integer, MetaData, create_engine, event, inspect, update
+from sqlalchemy.orm import DeclarativeBase
+
+from chinook.migrations import ensure_schema, head_version, plan_schema_changes
+from chinook.models import SchemaVersion
+
+
+@pytest.fixture(name="engine")
+def fixture_engine(tmp_path):
+    """Engine of an empty SQLite file"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'chinook.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_current_schema_costs_one_query(engine):
+    """Test that startup against a current schema issues a single statement"""
+    assert ensure_schema(engine) == "created"
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    assert ensure_schema(engine) == "current"
+    assert len(statements) == 1
+    assert "schema_version" in statements[0]
+
+
+def test_model_changes_are_synchronized(engine):
+    """Test that a changed fingerprint adds missing tables and columns"""
+    ensure_schema(engine)
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE change_cursors")
+        connection.execute(update(SchemaVersion).values(fingerprint="outdated"))
+
+    assert ensure_schema(engine) == "upgraded"
+    assert inspect(engine).has_table("change_cursors")
+    assert ensure_schema(engine) == "current"
+
+    metadata = MetaData()
+
+    for table in di[DeclarativeBase].metadata.sorted_tables:
+        table.to_metadata(metadata)
+
+    metadata.tables["tracks"].append_column(Column("rating", Integer))
+
+    with engine.begin() as connection:
+        changes = plan_schema_changes(connection, metadata)
+
+        assert [str(change).strip() for change in changes] == \
+            ['ALTER TABLE "tracks" ADD COLUMN "rating" INTEGER']
+
+        connection.execute(changes[0])
+
+    assert "rating" in {column["name"] for column in inspect(engine).get_columns("tracks")}
+
+
+def test_newer_database_is_rejected(engine):
+    """Test that a database migrated by a newer release is not touched"""
+    ensure_schema(engine)
+
+    with engine.begin() as connection:
+        connection.execute(update(SchemaVersion).values(version=head_version() + 1))
+
+    with pytest.raises(RuntimeError):
+        ensure_schema(engine)
+
+
+def test_unversioned_database_is_migrated(engine):
+    """Test that a database created before versioning gets every migration"""
+    from chinook.commit_samples import commit_sample_data
+
+    ensure_schema(engine)
+    commit_sample_data(engine)
+
+    # Reduce the database to the schema created before versioning.
+    with engine.begin() as connection:
+        for statement in (
+            "DROP TABLE schema_version",
+            "DROP TABLE track_details",
+            "DROP INDEX ix_invoices_invoice_date_customer_id",
+            "DROP INDEX ix_playlist_track_playlist_id_position",
+            "ALTER TABLE playlist_track DROP COLUMN position"
+        ):
+            connection.exec_driver_sql(statement)
+
+    assert ensure_schema(engine) == "upgraded"
+
+    inspector = inspect(engine)
+    assert "position" in {column["name"] for column in inspector.get_columns("playlist_track")}
+    assert "ix_invoices_invoice_date_customer_id" in \
+        {index["name"] for index in inspector.get_indexes("invoices")}
+
+    with engine.connect() as connection:
+        details, tracks = connection.exec_driver_sql(
+            "SELECT (SELECT count(*) FROM track_details), (SELECT count(*) FROM tracks)").one()
+
+    assert details == tracks > 0
+    assert ensure_schema(engine) == "current"
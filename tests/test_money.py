@@ -0,0 +1,143 @@
+"""
+Test the fixed-point money representation.
+"""
+
+import sqlite3
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, func, inspect, make_url, select
+from sqlalchemy.orm import Session
+
+from chinook.migrations import ensure_schema
+from chinook.models import InvoiceItems, Invoices, TrackDetails, Tracks
+from chinook.models.types import Money, cents
+from chinook.protocols.sql_alchemy_config import ISQLAlchemyConfig
+from chinook.read_models import track_page
+
+
+@pytest.fixture(name="cents_engine")
+def fixture_cents_engine(chinook_template, chinook_di, tmp_path):
+    """Engine of a copy of the template database converted to integer cents"""
+    path = tmp_path / "chinook.db"
+    source = sqlite3.connect(make_url(chinook_template).database)
+    target = sqlite3.connect(path)
+
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+    chinook_di[ISQLAlchemyConfig] = SimpleNamespace(
+        connection_string=f"sqlite:///{path}", money_storage="cents")
+    engine = create_engine(f"sqlite:///{path}")
+
+    yield engine
+
+    engine.dispose()
+
+
+def test_conversion_preserves_amounts(chinook_engine, cents_engine):
+    """Test that switching the storage converts every money column in place"""
+    with chinook_engine.connect() as connection:
+        expected = (
+            connection.exec_driver_sql(
+                "SELECT track_id, unit_price FROM tracks ORDER BY track_id").all(),
+            connection.exec_driver_sql(
+                "SELECT invoice_id, total FROM invoices ORDER BY invoice_id").all()
+        )
+
+    assert ensure_schema(cents_engine) == "upgraded"
+    assert ensure_schema(cents_engine) == "current"
+
+    with cents_engine.connect() as connection:
+        tracks = connection.execute(
+            select(Tracks.track_id, Tracks.unit_price).order_by(Tracks.track_id)).all()
+        invoices = connection.execute(
+            select(Invoices.invoice_id, Invoices.total).order_by(Invoices.invoice_id)).all()
+        storage = connection.exec_driver_sql(
+            "SELECT DISTINCT typeof(unit_price) FROM invoice_items").scalars().all()
+
+    assert tracks == [(key, round(value, 2)) for key, value in expected[0]]
+    assert invoices == [(key, round(value, 2)) for key, value in expected[1]]
+    assert storage == ["integer"]
+
+    indexes = {index["name"] for index in inspect(cents_engine).get_indexes("track_details")}
+    assert "ix_track_details_unit_price_track_id" in indexes
+
+
+def test_amount_arithmetic_is_exact(cents_engine):
+    """Test that amount expressions stay typed and convert numbers as needed"""
+    ensure_schema(cents_engine)
+    revenue = func.sum(InvoiceItems.unit_price * InvoiceItems.quantity)
+
+    assert isinstance(revenue.type, Money)
+    assert isinstance((Tracks.unit_price * 2).type, Money)
+    assert isinstance((Tracks.unit_price + Tracks.unit_price).type, Money)
+
+    with cents_engine.connect() as connection:
+        total = connection.execute(select(revenue)).scalar()
+        invoiced = connection.execute(select(func.sum(Invoices.total))).scalar()
+        integer = connection.execute(select(func.sum(cents(Invoices.total)))).scalar()
+        doubled = connection.execute(
+            select(Tracks.unit_price * 2).where(Tracks.track_id == 1)).scalar()
+        cheap = connection.execute(
+            select(func.count()).where(TrackDetails.unit_price < 1)).scalar()
+        stored = connection.exec_driver_sql(
+            "SELECT count(*) FROM track_details WHERE unit_price < 100").scalar()
+
+    assert total == invoiced == integer / 100
+    assert doubled == 1.98
+    assert cheap == stored > 0
+
+
+def test_storage_follows_each_database(chinook_template, chinook_di, tmp_path):
+    """Test that databases of different money storages are used side by side"""
+    from chinook.bootstrap import initialize
+    from chinook.config import ChinookConfig
+    from chinook.ingest import PriceCache
+    from chinook.models.engine import create_db_engine
+    from chinook.registry import EngineRegistry
+
+    chinook_di[ISQLAlchemyConfig] = ChinookConfig(money_storage="cents")
+    initialize(name="cents", config=ChinookConfig(
+        connection_string=f"sqlite:///{tmp_path / 'cents.db'}", money_storage="cents"))
+    floats = create_db_engine(sql_config=ChinookConfig(
+        connection_string=chinook_template, money_storage="float"))
+
+    try:
+        with chinook_di[EngineRegistry].get_engine("cents").connect() as connection:
+            stored = connection.exec_driver_sql(
+                "SELECT DISTINCT typeof(unit_price) FROM tracks").scalars().all()
+
+        prices = PriceCache(floats)
+        prices.refresh()
+
+        assert stored == ["integer"]
+        assert prices.lookup(np.array([1]))[0] == 99
+    finally:
+        floats.dispose()
+        chinook_di[EngineRegistry].unregister("cents")
+
+
+def test_track_pages_follow_cents(cents_engine):
+    """Test that keyset pagination on a money column converts the last row's amount"""
+    ensure_schema(cents_engine)
+
+    with Session(cents_engine) as session:
+        expected = session.scalars(
+            select(TrackDetails.track_id)
+            .order_by(TrackDetails.unit_price, TrackDetails.track_id)
+        ).all()
+        seen, page = [], None
+
+        while page is None or page:
+            after = page[-1] if page else None
+            page = session.scalars(track_page("unit_price", after=after, limit=1000)).all()
+            seen.extend(detail.track_id for detail in page)
+
+            assert len(seen) <= len(expected)
+
+    assert seen == expected
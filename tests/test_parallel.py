@@ -0,0 +1,138 @@
+"""
+Test process-pool analytics over invoice ranges.
+"""
+
+import pickle
+import shutil
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, make_url, select
+from sqlalchemy.exc import OperationalError
+
+from chinook import ChinookConfig
+from chinook.config import READ_ONLY_MMAP_SIZE
+from chinook.models import InvoiceItems, Invoices
+from chinook.models.engine import create_db_engine
+from chinook.models.types import money_storage
+from chinook.parallel import (
+    LineAggregate,
+    ParallelExecutor,
+    WorkerConfig,
+    invoice_ranges,
+    read_only_url
+)
+
+
+def test_read_only_url():
+    """Test that SQLite files are opened read-only and in-memory databases are rejected"""
+    assert read_only_url("sqlite:///db/chinook.db").endswith("db/chinook.db?mode=ro&uri=true")
+    assert read_only_url("postgresql://host/chinook") == "postgresql://host/chinook"
+
+    with pytest.raises(ValueError):
+        read_only_url("sqlite:///:memory:")
+
+
+def test_read_only_url_encodes_the_path(chinook_template, tmp_path):
+    """Test that a path with URI delimiters is still opened read-only"""
+    directory = tmp_path / "ro test#1"
+    directory.mkdir()
+    path = directory / "chinook.db"
+    shutil.copyfile(make_url(chinook_template).database, path)
+
+    engine = create_engine(read_only_url(f"sqlite:///{path}", immutable=True))
+
+    try:
+        with engine.connect() as connection:
+            assert connection.execute(select(func.count()).select_from(Invoices)).scalar() > 0
+
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql("DELETE FROM invoice_items")
+    finally:
+        engine.dispose()
+
+    assert sorted(item.name for item in tmp_path.iterdir()) == ["ro test#1"]
+
+
+def test_ranges_cover_every_invoice(chinook_template):
+    """Test that ranges are contiguous, disjoint and cover every invoice"""
+    engine = create_engine(chinook_template)
+
+    with engine.connect() as connection:
+        total = connection.execute(select(func.count()).select_from(Invoices)).scalar()
+
+        for by, column in (("invoice_id", Invoices.invoice_id),
+                           ("invoice_date", Invoices.invoice_date)):
+            ranges = invoice_ranges(connection, by, partitions=3)
+            counts = [
+                connection.execute(
+                    select(func.count()).where(column >= low, column < high)).scalar()
+                for low, high in ranges
+            ]
+
+            assert len(ranges) == 3 and sum(counts) == total
+            assert all(previous[1] == current[0] for previous, current in zip(ranges, ranges[1:]))
+
+    engine.dispose()
+
+
+def test_parallel_report_matches_single_query(chinook_template):
+    """Test that merged partials of worker processes equal a grouped query"""
+    engine = create_engine(chinook_template)
+    expected = pd.read_sql(
+        select(Invoices.billing_country,
+               func.sum(InvoiceItems.unit_price * InvoiceItems.quantity).label("revenue"),
+               func.count().label("lines"))
+        .join(Invoices, Invoices.invoice_id == InvoiceItems.invoice_id)
+        .group_by(Invoices.billing_country),
+        engine, index_col="billing_country")
+    engine.dispose()
+
+    config = WorkerConfig.from_config(WorkerConfig(chinook_template))
+
+    with ParallelExecutor(config, processes=2) as executor:
+        for by in ("invoice_id", "invoice_date"):
+            result = executor.run(LineAggregate("billing_country"), by=by, partitions=3)
+
+            assert result["lines"].to_dict() == expected["lines"].to_dict()
+            assert result["revenue"].to_numpy() == pytest.approx(
+                expected.loc[result.index, "revenue"].to_numpy())
+
+
+def test_worker_config_keeps_engine_settings(chinook_template):
+    """Test that workers get the engine options, pragmas and read-only mode of a config"""
+    source = ChinookConfig(connection_string=chinook_template, read_only=True,
+                           pool_pre_ping=True, sqlite_cache_kib=4096, money_storage="cents")
+    config = pickle.loads(pickle.dumps(WorkerConfig.from_config(source)))
+    engine = create_db_engine(sql_config=config)
+
+    try:
+        with engine.connect() as connection:
+            pragmas = [connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                       for name in ("cache_size", "mmap_size", "query_only")]
+
+        assert engine.url.query["immutable"] == "1"
+        assert config.engine_options == {"pool_pre_ping": True}
+        assert pragmas == [-4096, READ_ONLY_MMAP_SIZE, 1]
+        assert money_storage(engine.dialect) == "cents"
+    finally:
+        engine.dispose()
+
+    writable = WorkerConfig.from_config(ChinookConfig(connection_string=chinook_template,
+                                                      pragmas="fast"))
+
+    assert "journal_mode" not in writable.sqlite_pragmas
+    assert not writable.read_only and "mode=ro" in writable.connection_string
+
+
+def test_chunks_with_missing_keys_merge():
+    """Test that a chunk with a missing integer key still merges with the others"""
+    report = LineAggregate("customer_id")
+    merged = report.combine([
+        report.reduce([(7, 99, 1), (None, 99, 1)]),
+        report.reduce([(7, 199, 2)])
+    ])
+
+    assert merged.loc[7, "revenue"] == 99 + 2 * 199
+    assert merged.loc[-1, "lines"] == 1
+    assert len(merged) == 2
@@ -0,0 +1,124 @@
+"""
+Test date partitioning of invoices and partition pruning on SQLite.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, func, insert, select, update
+
+from chinook.cdc import ChangeFeed, install_triggers
+from chinook.models import InvoiceItems, Invoices
+from chinook.partitioning import InvoicePartitioner
+
+
+def test_sync_creates_yearly_partitions(chinook_engine):
+    """Test that every invoice is copied into exactly one yearly partition"""
+    partitioner = InvoicePartitioner(chinook_engine, granularity="year")
+
+    copied = partitioner.sync()
+
+    with chinook_engine.connect() as connection:
+        total = connection.execute(select(func.count()).select_from(Invoices)).scalar()
+
+    assert copied == total
+    assert [p.year for p in partitioner.partitions] == [2009, 2010, 2011, 2012, 2013]
+    assert partitioner.sync() == 0
+
+
+def test_window_queries_prune_partitions(chinook_engine):
+    """Test that a window query only touches overlapping partitions"""
+    partitioner = InvoicePartitioner(chinook_engine, granularity="month")
+    partitioner.sync()
+
+    start, end = datetime(2010, 3, 1), datetime(2010, 6, 1)
+    window = partitioner.invoices_between(start, end).subquery()
+    lines = partitioner.items_between(start, end).subquery()
+
+    with chinook_engine.connect() as connection:
+        expected_invoices = connection.execute(
+            select(func.count()).select_from(Invoices)
+            .where(Invoices.invoice_date >= start, Invoices.invoice_date < end)
+        ).scalar()
+        expected_lines = connection.execute(
+            select(func.count()).select_from(InvoiceItems)
+            .join(Invoices, Invoices.invoice_id == InvoiceItems.invoice_id)
+            .where(Invoices.invoice_date >= start, Invoices.invoice_date < end)
+        ).scalar()
+
+        assert connection.execute(select(func.count()).select_from(window)).scalar() \
+            == expected_invoices
+        assert connection.execute(select(func.count()).select_from(lines)).scalar() \
+            == expected_lines
+
+    assert len(partitioner.prune(start, end)) == 3
+    assert partitioner.prune(datetime(2020, 1, 1), datetime(2021, 1, 1)) == []
+
+
+def test_sync_applies_captured_changes(chinook_engine):
+    """Test that base updates and deletes reach the partitions through the change log"""
+    install_triggers(chinook_engine, ("invoices", "invoice_items"))
+    feed = ChangeFeed(chinook_engine, "partitions")
+    partitioner = InvoicePartitioner(chinook_engine, granularity="year")
+    partitioner.sync(feed)
+
+    with chinook_engine.begin() as connection:
+        connection.execute(update(Invoices).where(Invoices.invoice_id == 1)
+                           .values(total=100, invoice_date=datetime(2013, 6, 1)))
+        connection.execute(delete(InvoiceItems).where(InvoiceItems.invoice_id == 2))
+        connection.execute(delete(Invoices).where(Invoices.invoice_id == 2))
+
+    assert partitioner.sync(feed) == 0
+    assert feed.lag() == 0
+
+    invoices = partitioner.invoices_between(datetime(2009, 1, 1), datetime(2014, 1, 1)) \
+        .subquery()
+    lines = partitioner.items_between(datetime(2009, 1, 1), datetime(2014, 1, 1)).subquery()
+
+    with chinook_engine.connect() as connection:
+        refreshed = connection.execute(
+            select(invoices.c.invoice_id, invoices.c.invoice_date, invoices.c.total)
+            .where(invoices.c.invoice_id.in_([1, 2]))).all()
+        partitioned = connection.execute(select(func.count()).select_from(lines)).scalar()
+        expected = connection.execute(select(func.count()).select_from(InvoiceItems)).scalar()
+
+    assert [tuple(row) for row in refreshed] == [(1, datetime(2013, 6, 1), 100)]
+    assert partitioned == expected
+
+
+def test_reads_are_refused_while_behind(chinook_engine):
+    """Test that stale partitions are not read until they are synced"""
+    install_triggers(chinook_engine, ("invoices", "invoice_items"))
+    feed = ChangeFeed(chinook_engine, "partitions")
+    partitioner = InvoicePartitioner(chinook_engine, granularity="year")
+    window = (datetime(2009, 1, 1), datetime(2014, 1, 1))
+
+    partitioner.sync()
+
+    with chinook_engine.begin() as connection:
+        connection.execute(insert(Invoices).values(
+            invoice_id=10_000, customer_id=1, invoice_date=datetime(2013, 1, 1), total=0))
+
+    assert partitioner.behind()
+
+    with pytest.raises(RuntimeError):
+        partitioner.invoices_between(*window)
+
+    assert partitioner.sync(feed) == 1
+    assert not InvoicePartitioner(chinook_engine, granularity="year").behind()
+
+    with chinook_engine.begin() as connection:
+        connection.execute(update(Invoices).where(Invoices.invoice_id == 10_000)
+                           .values(total=5))
+
+    with pytest.raises(RuntimeError):
+        partitioner.items_between(*window)
+
+    partitioner.sync(feed)
+    invoices = partitioner.invoices_between(*window).subquery()
+
+    with chinook_engine.connect() as connection:
+        totals = connection.execute(
+            select(invoices.c.total).where(invoices.c.invoice_id == 10_000)).scalars().all()
+
+    assert totals == [5]
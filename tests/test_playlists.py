@@ -0,0 +1,74 @@
+"""
+Test set-based playlist operations.
+"""
+
+import pytest
+from sqlalchemy import func, select
+
+from chinook.models import PlaylistTrack, Tracks
+from chinook.playlists import PlaylistService, playlist_tracks
+
+
+def track_ids(engine, playlist_id):
+    """Return the tracks of a playlist in playlist order"""
+    with engine.connect() as connection:
+        return connection.execute(playlist_tracks(playlist_id)).scalars().all()
+
+
+def test_set_algebra_and_bulk_changes(chinook_engine):
+    """Test genre adds, union, intersection, difference and removal by query"""
+    playlists = PlaylistService(chinook_engine)
+    rock, jazz, both = playlists.create("Rock"), playlists.create("Jazz"), playlists.create("Both")
+
+    with chinook_engine.connect() as connection:
+        genre_sizes = dict(connection.execute(
+            select(Tracks.genre_id, func.count()).group_by(Tracks.genre_id)).all())
+
+    assert playlists.add_genre(rock, 1) == genre_sizes[1]
+    assert playlists.add_genre(rock, 1) == 0
+    assert playlists.add_genre(jazz, 2) == genre_sizes[2]
+    assert playlists.combine(both, rock, jazz, "union") == genre_sizes[1] + genre_sizes[2]
+    assert playlists.combine(playlists.create("None"), rock, jazz, "intersect") == 0
+
+    music = set(track_ids(chinook_engine, 1))
+    difference = playlists.create("Rock not in Music")
+    playlists.combine(difference, rock, 1, "difference")
+    assert not set(track_ids(chinook_engine, difference)) & music
+
+    shared = music & set(track_ids(chinook_engine, both))
+    removed = playlists.remove_query(
+        both, select(PlaylistTrack.track_id).where(PlaylistTrack.playlist_id == 1))
+    assert removed == len(shared)
+    assert not set(track_ids(chinook_engine, both)) & music
+    assert playlists.remove(jazz, track_ids(chinook_engine, jazz)[:10] + [10 ** 9]) == 10
+
+
+def test_move_updates_only_moved_rows(chinook_engine):
+    """Test that moves use the gaps between positions and renumber when none is left"""
+    playlists = PlaylistService(chinook_engine, gap=4)
+    playlist = playlists.create("Ordered")
+    playlists.add(playlist, range(1, 11))
+
+    assert playlists.move(playlist, [9, 10], before=2) == 2
+    assert track_ids(chinook_engine, playlist) == [1, 9, 10, 2, 3, 4, 5, 6, 7, 8]
+
+    assert playlists.move(playlist, [7, 8], before=9) == 10
+    assert track_ids(chinook_engine, playlist) == [1, 7, 8, 9, 10, 2, 3, 4, 5, 6]
+
+    assert playlists.move(playlist, [1]) == 1
+    assert track_ids(chinook_engine, playlist)[-1] == 1
+
+    with pytest.raises(ValueError):
+        playlists.move(playlist, [11], before=1)
+
+
+def test_unordered_playlists_are_numbered_on_first_move(chinook_engine):
+    """Test that seeded playlists without positions keep their order when moved"""
+    playlists = PlaylistService(chinook_engine)
+    before = track_ids(chinook_engine, 1)
+
+    playlists.move(1, [before[-1]], before=before[0])
+
+    assert track_ids(chinook_engine, 1) == [before[-1]] + before[:-1]
+    assert playlists.renumber(1) == len(before)
+    assert track_ids(chinook_engine, 1) == [before[-1]] + before[:-1]
@@ -0,0 +1,26 @@
+"""
+Test the seeding report returned by initialize().
+"""
+
+from sqlalchemy import func, select
+
+from chinook import initialize, get_engine
+from chinook.models import PlaylistTrack
+
+
+def test_initialize_reports_phases_and_tables():
+    """Test that every phase and table is timed and row counts match the database"""
+    report = initialize(profile=True)
+    engine = get_engine()
+
+    with engine.connect() as connection:
+        playlist_tracks = connection.execute(
+            select(func.count()).select_from(PlaylistTrack)).scalar()
+
+    assert [phase.name for phase in report.phases] == ["config", "init_db", "load_csv", "insert"]
+    assert all(phase.peak_memory_bytes is not None for phase in report.phases)
+    assert report.tables["playlist_track"].rows == playlist_tracks
+    assert report.tables["playlist_track"].rows_per_second > 0
+    assert set(report.as_dict()["tables"]) == set(report.tables)
+
+    engine.dispose()
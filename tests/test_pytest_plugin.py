@@ -0,0 +1,63 @@
+"""
+Test the fixtures provided by the Chinook pytest plugin.
+"""
+
+from kink import di
+from sqlalchemy import Engine, create_engine, delete, func, select
+from sqlalchemy.orm import sessionmaker
+
+from chinook.models import Tracks
+from chinook.pytest_plugin import _sqlite_clone, chinook_di
+
+
+def count_tracks(engine: Engine) -> int:
+    """Return the number of tracks in a database"""
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(Tracks)).scalar()
+
+
+def test_engine_is_seeded_and_registered(chinook_engine):
+    """Test that the isolated engine holds the sample data and is registered in di"""
+    assert di[Engine] is chinook_engine
+    assert count_tracks(chinook_engine) > 0
+
+
+def test_clones_are_independent(chinook_template):
+    """Test that changes to one clone are invisible to another"""
+    first = _sqlite_clone(chinook_template)
+    second = _sqlite_clone(chinook_template)
+
+    with first.begin() as connection:
+        connection.execute(delete(Tracks))
+
+    assert count_tracks(first) == 0
+    assert count_tracks(second) > 0
+
+    first.dispose()
+    second.dispose()
+
+
+def test_session_commits_stay_inside_the_test_transaction(chinook_session, chinook_connection):
+    """Test that a session commit is a savepoint within the outer transaction"""
+    chinook_session.execute(delete(Tracks))
+    chinook_session.commit()
+
+    assert chinook_connection.in_transaction()
+    assert chinook_session.scalar(select(func.count()).select_from(Tracks)) == 0
+
+
+def test_di_registrations_are_restored(chinook_engine):
+    """Test that replaced and added registrations are undone after a test"""
+    factory = di[sessionmaker] if sessionmaker in di else None
+    restore = chinook_di.__wrapped__()
+    next(restore)
+
+    replacement = create_engine("sqlite://")
+    di[Engine] = replacement
+    di[sessionmaker] = sessionmaker(replacement)
+
+    assert next(restore, None) is None
+    assert di[Engine] is chinook_engine
+    assert (di[sessionmaker] if sessionmaker in di else None) is factory
+
+    replacement.dispose()
@@ -0,0 +1,92 @@
+"""
+Test the denormalized track_details read model.
+"""
+
+import pandas as pd
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from chinook.models import Genres, TrackDetails, Tracks
+from chinook.read_models import (
+    TrackDetailsSync,
+    track_details_source,
+    track_page
+)
+from chinook.upsert import upsert_frames
+
+
+def test_seeding_fills_read_model(chinook_engine):
+    """Test that every track has a detail row matching the five-way join"""
+    with chinook_engine.connect() as connection:
+        details = connection.execute(
+            select(TrackDetails.__table__).order_by(TrackDetails.track_id)).all()
+        joined = connection.execute(
+            track_details_source().order_by(Tracks.track_id)).all()
+
+    assert details
+    assert [tuple(row) for row in details] == [tuple(row) for row in joined]
+
+
+def test_catalog_writes_refresh_read_model(chinook_engine):
+    """Test that ORM flushes and upserts of catalog rows update the affected details"""
+    sync = TrackDetailsSync().attach()
+
+    try:
+        with Session(chinook_engine) as session:
+            session.get(Genres, 1).name = "Rock & Roll"
+            session.delete(session.get(Tracks, 2))
+            session.commit()
+    finally:
+        sync.detach()
+
+    track = pd.read_sql(select(Tracks.__table__).where(Tracks.track_id == 3), chinook_engine)
+    upsert_frames(chinook_engine, {Tracks: track.assign(unit_price=1.29)})
+
+    with Session(chinook_engine) as session:
+        rock = session.scalars(
+            select(TrackDetails.genre_name).where(TrackDetails.genre_id == 1)).unique().all()
+
+        assert rock == ["Rock & Roll"]
+        assert session.get(TrackDetails, 2) is None
+        assert session.get(TrackDetails, 3).unit_price == 1.29
+
+
+def test_track_page_continues_after_last_row(chinook_engine):
+    """Test that keyset pages follow the sort order without gaps or repeats"""
+    with Session(chinook_engine) as session:
+        expected = session.scalars(
+            select(TrackDetails.track_id)
+            .order_by(TrackDetails.unit_price.desc(), TrackDetails.track_id.desc())
+        ).all()
+        seen, page = [], None
+
+        while page is None or page:
+            after = page[-1] if page else None
+            page = session.scalars(
+                track_page("unit_price", after=after, limit=500, descending=True)).all()
+            seen.extend(detail.track_id for detail in page)
+
+    assert seen == expected
+
+
+def test_sync_ignores_unwatched_engines(chinook_engine):
+    """Test that sessions of other databases are not refreshed"""
+    other = create_engine("sqlite://")
+    Genres.__table__.create(other)
+    sync = TrackDetailsSync(engines=()).watch(chinook_engine).attach()
+
+    try:
+        with Session(other) as session:
+            session.add(Genres(genre_id=1, name="Ambient"))
+            session.commit()
+
+        with Session(chinook_engine) as session:
+            session.get(Genres, 1).name = "Stoner Rock"
+            session.commit()
+    finally:
+        sync.detach()
+        other.dispose()
+
+    with Session(chinook_engine) as session:
+        assert session.scalars(select(TrackDetails.genre_name)
+                               .where(TrackDetails.genre_id == 1)).first() == "Stoner Rock"
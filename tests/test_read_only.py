@@ -0,0 +1,47 @@
+"""
+Test the memory-mapped read-only SQLite mode.
+"""
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import OperationalError
+
+from chinook import ChinookConfig, get_engine, initialize
+from chinook.bootstrap import seed_database
+from chinook.config import READ_ONLY_MMAP_SIZE
+from chinook.models import Albums
+from chinook.registry import EngineRegistry
+
+
+def test_read_only_engine_skips_seeding(chinook_di, chinook_template):
+    """Test that a read-only database is opened immutable and memory-mapped"""
+    config = ChinookConfig(connection_string=chinook_template, read_only=True)
+    report = initialize(name="reader", config=config)
+    engine = get_engine("reader")
+
+    assert [phase.name for phase in report.phases] == ["config"]
+    assert engine.url.query["immutable"] == "1" and engine.url.query["mode"] == "ro"
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA mmap_size").scalar() == READ_ONLY_MMAP_SIZE
+        assert connection.execute(select(func.count()).select_from(Albums)).scalar() == 347
+
+        with pytest.raises(OperationalError):
+            connection.execute(update(Albums).values(title="x"))
+
+    chinook_di[EngineRegistry].unregister("reader")
+
+
+def test_read_only_mode_needs_a_file(chinook_template):
+    """Test that read-only mode rejects in-memory databases and seeding"""
+    with pytest.raises(ValueError):
+        ChinookConfig(read_only=True)
+
+    config = ChinookConfig(connection_string=chinook_template, read_only=True,
+                           mmap_size=2 ** 20, pragmas="fast")
+
+    assert config.sqlite_pragmas == {
+        "synchronous": "NORMAL", "temp_store": "MEMORY", "query_only": 1, "mmap_size": 2 ** 20}
+
+    with pytest.raises(ValueError):
+        seed_database(None, config)
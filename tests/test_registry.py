@@ -0,0 +1,98 @@
+"""
+Test the named engine registry.
+"""
+
+import pytest
+from kink import di
+from sqlalchemy import Engine, create_engine, event, func, select
+
+from chinook import initialize, get_engine
+from chinook.models import Albums
+from chinook.registry import EngineRegistry, HashRouter
+
+
+class FileConfig:
+    """Minimal ISQLAlchemyConfig pointing at a SQLite file"""
+
+    def __init__(self, path):
+        self.connection_string = f"sqlite:///{path}"
+
+
+def test_engines_are_created_lazily_and_cached(tmp_path):
+    """Test that each name gets one cached engine until disposed"""
+    registry = EngineRegistry()
+    registry.register("a", FileConfig(tmp_path / "a.db"))
+    registry.register("b", FileConfig(tmp_path / "b.db"), pool_size=2)
+
+    first = registry.get_engine("a")
+
+    assert registry.get_engine("a") is first
+    assert registry.get_engine("b") is not first
+    assert registry.get_engine("b").pool.size() == 2
+
+    registry.dispose("a")
+
+    assert registry.get_engine("a") is not first
+
+    with pytest.raises(KeyError):
+        registry.get_engine("missing")
+
+    registry.dispose()
+
+
+def test_routing_is_stable(tmp_path):
+    """Test that the hash router maps a key to the same engine every time"""
+    registry = EngineRegistry()
+
+    for name in ("a", "b", "c"):
+        registry.register(name, FileConfig(tmp_path / f"{name}.db"))
+
+    router = HashRouter(registry.names())
+    routed = {router(customer_id) for customer_id in range(100)}
+
+    assert routed == {"a", "b", "c"}
+    assert registry.route(42) is registry.get_engine(router(42))
+
+    with registry.using("b") as engine:
+        assert di[Engine] is engine
+
+    registry.dispose()
+
+
+def test_initialize_registers_named_engines(chinook_di):
+    """Test that a named initialize() leaves the default engine in place"""
+    default = initialize()
+    default_engine = get_engine()
+    initialize(name="replica")
+
+    assert get_engine() is default_engine
+    assert get_engine("replica") is not default_engine
+
+    with get_engine("replica").connect() as connection:
+        assert connection.execute(select(func.count()).select_from(Albums)).scalar() > 0
+
+    di[EngineRegistry].unregister("replica")
+    default_engine.dispose()
+    assert default.tables
+
+
+def test_replaced_engines_are_disposed(tmp_path):
+    """Test that registering a new engine under a name disposes the old one"""
+    registry = EngineRegistry()
+    engines = [create_engine(f"sqlite:///{tmp_path / 'a.db'}") for _ in range(2)]
+    disposed = []
+
+    for engine in engines:
+        event.listen(engine, "engine_disposed", disposed.append)
+
+    registry.register_engine("a", engines[0])
+    registry.register_engine("a", engines[0])
+
+    assert disposed == []
+
+    registry.register_engine("a", engines[1])
+
+    assert disposed == [engines[0]]
+    assert registry.get_engine("a") is engines[1]
+
+    registry.dispose()
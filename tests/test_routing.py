@@ -0,0 +1,126 @@
+"""
+Test read-replica routing.
+"""
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+
+from chinook import ChinookConfig
+from chinook.models import Genres, init_db
+from chinook.routing import LeastLatency, ReplicaSet, create_replica_set
+
+
+class ReplicatedConfig:
+    """Minimal ISQLAlchemyConfig with SQLite files as primary and replicas"""
+
+    def __init__(self, directory, replicas):
+        self.connection_string = f"sqlite:///{directory / 'primary.db'}"
+        self.replica_connection_strings = [
+            f"sqlite:///{directory / f'replica_{index}.db'}" for index in range(replicas)
+        ]
+
+
+@pytest.fixture
+def replica_set(tmp_path):
+    """Replica set over three empty Chinook schemas"""
+    replica_set = create_replica_set(sql_config=ReplicatedConfig(tmp_path, 2))
+
+    for engine in [replica_set.primary, *replica_set.replicas]:
+        init_db(engine)
+
+    yield replica_set
+
+    replica_set.dispose()
+
+
+def test_reads_are_spread_and_writes_go_to_primary(replica_set):
+    """Test that reads alternate between replicas and commits land on the primary"""
+    query = select(Genres)
+
+    with replica_set.sessionmaker()() as session:
+        binds = [session.get_bind(clause=query) for _ in range(4)]
+
+        assert binds == [*replica_set.replicas, *replica_set.replicas]
+
+        session.add(Genres(genre_id=1, name="Rock"))
+        session.commit()
+
+    with replica_set.primary.connect() as connection:
+        assert connection.execute(select(Genres.name)).scalars().all() == ["Rock"]
+
+    for replica in replica_set.replicas:
+        with replica.connect() as connection:
+            assert connection.execute(select(Genres.name)).scalars().all() == []
+
+
+def test_transaction_reads_its_own_writes(replica_set):
+    """Test that reads stick to the primary after a write until the transaction ends"""
+    query = select(Genres).where(Genres.genre_id == 1)
+
+    with replica_set.sessionmaker()() as session:
+        session.add(Genres(genre_id=1, name="Jazz"))
+
+        assert session.scalars(query).one().name == "Jazz"
+        assert session.get_bind(clause=query) is replica_set.primary
+
+        session.commit()
+
+        assert session.get_bind(clause=query) in replica_set.replicas
+
+
+def test_least_latency_prefers_fastest_replica(tmp_path):
+    """Test that the least latency policy picks the replica with the lowest average"""
+    engines = [create_engine(f"sqlite:///{tmp_path / f'{name}.db'}") for name in "pab"]
+    replica_set = ReplicaSet(engines[0], engines[1:], policy="least_latency")
+
+    replica_set.policy.observe(engines[1], 0.050)
+    replica_set.policy.observe(engines[2], 0.005)
+
+    assert replica_set.reader() is engines[2]
+
+    with pytest.raises(ValueError):
+        ReplicaSet(engines[0], policy="random")
+
+    replica_set.dispose()
+
+
+def test_replicas_share_the_primary_settings(tmp_path):
+    """Test that replica engines get the configured pragmas and engine options"""
+    config = ChinookConfig(
+        connection_string=f"sqlite:///{tmp_path / 'primary.db'}",
+        replica_connection_strings=(f"sqlite:///{tmp_path / 'replica.db'}",),
+        sqlite_cache_kib=2048,
+        echo=True
+    )
+    replica_set = create_replica_set(sql_config=config)
+    replica, = replica_set.replicas
+
+    try:
+        with replica.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA cache_size").scalar() == -2048
+
+        assert replica.echo
+        assert replica.url.database.endswith("replica.db")
+    finally:
+        replica_set.dispose()
+
+
+def test_failed_statements_keep_latency_balanced(tmp_path):
+    """Test that a failed statement does not leave its start time behind"""
+    policy = LeastLatency()
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    policy.attach(engine)
+
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql("SELECT * FROM missing")
+
+        connection.exec_driver_sql("SELECT 1")
+
+        assert connection.info["chinook_replica_start"] == []
+
+    assert engine in policy.latency
+
+    engine.dispose()
@@ -0,0 +1,60 @@
+"""
+Test RFM scoring and customer lifetime value.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from chinook.ingest import ingest_invoices
+from chinook.models import CustomerScores, Invoices
+from chinook.scoring import SEGMENTS, CustomerScorer, score_customers
+
+
+def scores(engine) -> pd.DataFrame:
+    """Read the stored scores indexed by customer"""
+    return pd.read_sql(select(CustomerScores.__table__), engine).set_index("customer_id")
+
+
+def test_scores_match_invoice_aggregates(chinook_engine):
+    """Test that aggregates, scores and CLV are derived from every invoice"""
+    report = CustomerScorer(chinook_engine, horizon_years=2.0, margin=0.5).score()
+    invoices = pd.read_sql(select(Invoices.__table__), chinook_engine)
+    expected = invoices.groupby("customer_id").agg(
+        frequency=("invoice_id", "count"),
+        monetary=("total", "sum"),
+        last_invoice_date=("invoice_date", "max"))
+    stored = scores(chinook_engine)
+
+    assert not report.incremental
+    assert report.invoices == len(invoices) and report.customers == len(expected)
+    assert stored["frequency"].equals(expected["frequency"])
+    assert stored["monetary"].to_numpy() == pytest.approx(expected["monetary"].to_numpy())
+    assert (stored["last_invoice_date"] == expected["last_invoice_date"]).all()
+    assert stored[["r_score", "f_score", "m_score"]].isin(range(1, 6)).all().all()
+    assert set(stored["segment"]) <= set(SEGMENTS)
+
+    tenure = ((stored["scored_at"] - stored["first_invoice_date"]).dt.days / 365.25).clip(lower=1)
+    clv = stored["monetary"] / tenure * 2.0 * 0.5
+    assert stored["clv"].to_numpy() == pytest.approx(clv.to_numpy(), abs=0.01)
+
+
+def test_incremental_run_reads_only_new_invoices(chinook_engine):
+    """Test that an incremental run matches a full run after new invoices"""
+    score_customers(chinook_engine)
+    assert score_customers(chinook_engine).written == 0
+
+    ingest_invoices(chinook_engine, [
+        {"customer_id": 7, "invoice_date": datetime(2014, 1, 15),
+         "lines": [{"track_id": 1, "quantity": 30}]}
+    ])
+    report = score_customers(chinook_engine)
+    incremental = scores(chinook_engine)
+
+    assert report.incremental and report.invoices == 1
+    assert incremental.loc[7, "segment"] == "champions"
+
+    score_customers(chinook_engine, full=True)
+    pd.testing.assert_frame_equal(incremental, scores(chinook_engine))
@@ -0,0 +1,108 @@
+"""
+Test the registered session factories and unit-of-work helpers.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, inspect, select
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from chinook import ChinookConfig, initialize
+from chinook.models import Genres, Tracks
+from chinook.sessions import clear_periodically, create_session_factory, unit_of_work
+
+
+def test_scoped_sessions_are_local(chinook_di):
+    """Test that registered sessions are per thread, or per task with the task scope"""
+    initialize(config=ChinookConfig(seed="none", expire_on_commit=False))
+    sessions = chinook_di[scoped_session]
+
+    assert chinook_di[sessionmaker] is sessions.session_factory
+    assert sessions() is sessions()
+    assert not sessions().expire_on_commit
+
+    with ThreadPoolExecutor(1) as pool:
+        assert pool.submit(sessions).result() is not sessions()
+
+    tasks = create_session_factory(sessions().bind, scope="task")
+
+    async def session_ids():
+        async def current():
+            await asyncio.sleep(0)
+            return id(tasks())
+
+        return await asyncio.gather(current(), current())
+
+    first, second = asyncio.run(session_ids())
+    assert first != second
+
+    sessions.remove()
+    tasks.remove()
+
+
+def test_unit_of_work_commits_or_rolls_back(chinook_engine):
+    """Test that a unit commits on success and rolls back on error"""
+    factory = create_session_factory(chinook_engine).session_factory
+
+    with unit_of_work(expire_on_commit=False, factory=factory) as session:
+        genre = Genres(genre_id=26, name="Ambient")
+        session.add(genre)
+
+    assert not inspect(genre).expired and genre.name == "Ambient"
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work(factory=factory) as session:
+            session.add(Genres(genre_id=27, name="Drone"))
+            session.flush()
+            raise RuntimeError
+
+    with unit_of_work(factory=factory) as session:
+        assert session.scalar(select(func.count()).where(Genres.genre_id >= 26)) == 1
+
+
+def test_identity_map_is_cleared_periodically(chinook_engine):
+    """Test that streamed objects are expunged after every batch"""
+    factory = create_session_factory(chinook_engine).session_factory
+    sizes = []
+
+    with unit_of_work(factory=factory) as session:
+        tracks = session.scalars(select(Tracks).execution_options(yield_per=100))
+
+        for track in clear_periodically(session, tracks, every=250):
+            track.milliseconds += 1
+            sizes.append(len(session.identity_map))
+
+        assert len(session.identity_map) == 0
+
+    assert max(sizes) <= 250 + 100
+
+    with unit_of_work(factory=factory) as session:
+        assert session.scalar(select(Tracks.milliseconds).where(Tracks.track_id == 1)) \
+            == 343720
+
+
+def test_batches_are_committed_inside_a_unit_of_work(chinook_engine):
+    """Test that committing each batch works inside a unit and the last one is kept"""
+    factory = create_session_factory(chinook_engine).session_factory
+    genres = (Genres(genre_id=100 + number, name=f"Batch {number}") for number in range(5))
+
+    with unit_of_work(factory=factory) as session:
+        for genre in clear_periodically(session, genres, every=2, commit=True):
+            session.add(genre)
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work(factory=factory) as session:
+            for genre in clear_periodically(
+                    session, [Genres(genre_id=200, name="Committed")], commit=True):
+                session.add(genre)
+
+            session.add(Genres(genre_id=201, name="Rolled back"))
+            session.flush()
+            raise RuntimeError
+
+    with unit_of_work(factory=factory) as session:
+        assert session.scalars(select(Genres.genre_id).where(Genres.genre_id >= 100)
+                               .order_by(Genres.genre_id)).all() == \
+            [100, 101, 102, 103, 104, 200]
@@ -0,0 +1,90 @@
+"""
+Test the bulk upsert API.
+"""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+
+from chinook.models import Artists, Invoices, PlaylistTrack, init_db
+from chinook.sample_data import load_artist_data
+from chinook.upsert import diff_frame, upsert_frame, upsert_frames
+
+
+def test_upsert_reports_and_applies_changes(chinook_engine):
+    """Test that only new and changed rows are written and counted"""
+    artists = load_artist_data()
+    refresh = pd.concat([
+        artists.assign(name=artists["name"].where(artists["artist_id"] != 1, "Renamed")),
+        pd.DataFrame({"artist_id": [10_001, 10_002], "name": ["New A", "New B"]})
+    ], ignore_index=True)
+
+    report = upsert_frames(chinook_engine, {Artists: refresh})["artists"]
+
+    assert (report.inserted, report.updated, report.unchanged) == (2, 1, len(artists) - 1)
+
+    with chinook_engine.connect() as connection:
+        names = dict(connection.execute(
+            select(Artists.artist_id, Artists.name)
+            .where(Artists.artist_id.in_([1, 2, 10_001]))).all())
+
+    assert names[1] == "Renamed"
+    assert names[10_001] == "New A"
+    assert names[2] == artists.loc[artists["artist_id"] == 2, "name"].item()
+
+    again = upsert_frames(chinook_engine, {Artists: refresh})["artists"]
+
+    assert (again.inserted, again.updated, again.unchanged) == (0, 0, len(refresh))
+
+
+def test_upsert_composite_key_and_fallback_dialect(chinook_engine, monkeypatch):
+    """Test key-only tables and the plain INSERT/UPDATE path of other dialects"""
+    links = pd.DataFrame({"playlist_id": [1, 1], "track_id": [1, 2]})
+
+    with chinook_engine.begin() as connection:
+        report = upsert_frame(connection, PlaylistTrack, links)
+
+    assert report.inserted + report.unchanged == 2
+
+    monkeypatch.setattr("chinook.upsert._ON_CONFLICT", {})
+    frame = pd.DataFrame({"artist_id": [1, 20_000], "name": ["Fallback", "Inserted"]})
+
+    with chinook_engine.begin() as connection:
+        report = upsert_frame(connection, Artists, frame)
+        rows = dict(connection.execute(
+            select(Artists.artist_id, Artists.name)
+            .where(Artists.artist_id.in_([1, 20_000]))).all())
+
+    assert (report.inserted, report.updated) == (1, 1)
+    assert rows == {1: "Fallback", 20_000: "Inserted"}
+
+
+def test_upsert_rejects_bad_keys(tmp_path):
+    """Test that missing or duplicate primary keys are rejected before writing"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    init_db(engine)
+
+    with engine.begin() as connection:
+        with pytest.raises(ValueError):
+            upsert_frame(connection, Artists, pd.DataFrame({"name": ["No key"]}))
+
+        with pytest.raises(ValueError):
+            upsert_frame(connection, Artists, pd.DataFrame({"artist_id": [1, 1], "name": "x"}))
+
+        report = upsert_frame(connection, Artists, pd.DataFrame({"artist_id": [1], "name": "x"}))
+
+    assert report.inserted == 1
+
+    engine.dispose()
+
+
+def test_text_values_are_compared_as_column_types(chinook_engine):
+    """Test that dates and amounts read as text match the stored rows"""
+    with chinook_engine.connect() as connection:
+        stored = pd.read_sql(select(Invoices).where(Invoices.invoice_id <= 3), connection)
+        text = stored.astype(str)
+        text.loc[2, "total"] = "99.99"
+
+        status = diff_frame(connection, Invoices.__table__, text)
+
+    assert status.tolist() == ["unchanged", "unchanged", "update"]
@@ -0,0 +1,49 @@
+"""
+Test verification of invoice totals.
+"""
+
+from sqlalchemy import delete, func, select, update
+
+from chinook.models import InvoiceItems, Invoices
+from chinook.verification import verify_invoice_totals
+
+
+def test_sample_totals_are_consistent(chinook_engine):
+    """Test that every sample invoice matches its lines"""
+    report = verify_invoice_totals(chinook_engine, range_size=50)
+
+    with chinook_engine.connect() as connection:
+        invoices = connection.execute(select(func.count()).select_from(Invoices)).scalar()
+
+    assert report.consistent
+    assert report.invoices == invoices
+    assert report.ranges == -(-invoices // 50)
+
+
+def test_mismatches_are_reported_and_repaired(chinook_engine):
+    """Test that wrong totals and invoices without lines are found and fixed"""
+    with chinook_engine.begin() as connection:
+        expected = connection.execute(select(Invoices.total).where(Invoices.invoice_id == 5)) \
+            .scalar()
+        connection.execute(update(Invoices).where(Invoices.invoice_id == 5).values(total=100))
+        connection.execute(
+            update(Invoices).where(Invoices.invoice_id == 300).values(total=Invoices.total + 0.01))
+        connection.execute(delete(InvoiceItems).where(InvoiceItems.invoice_id == 120))
+
+    report = verify_invoice_totals(chinook_engine, range_size=64)
+    assert [mismatch.invoice_id for mismatch in report.mismatches] == [5, 120, 300]
+    assert report.mismatches[0].stored == 100
+    assert report.mismatches[1].expected == 0
+    assert report.repaired == 0
+
+    repaired = verify_invoice_totals(chinook_engine, repair=True, batch_size=2)
+    assert repaired.repaired == 3
+    assert verify_invoice_totals(chinook_engine).consistent
+
+    with chinook_engine.connect() as connection:
+        totals = dict(connection.execute(
+            select(Invoices.invoice_id, Invoices.total)
+            .where(Invoices.invoice_id.in_([5, 120]))).all())
+
+    assert totals[120] == 0
+    assert totals[5] == expected